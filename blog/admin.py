@@ -2,6 +2,30 @@ from django.contrib import admin
 
 from .models import Comment
 from .models import Post
+from .models import SyncOutbox
+from .models import SyncRun
 
 admin.site.register(Post)
 admin.site.register(Comment)
+admin.site.register(SyncOutbox)
+
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "started_at",
+        "command",
+        "outcome",
+        "duration",
+        "items_synced",
+        "num_errors",
+        "items_per_second",
+    )
+    list_filter = ("command", "outcome")
+    date_hierarchy = "started_at"
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
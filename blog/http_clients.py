@@ -0,0 +1,112 @@
+import gzip
+import importlib.util
+from typing import Any
+
+import httpx
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+from blog.sync_reports import ConnectionStats
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class RequestCompression:
+    """
+    Compresses request bodies of at least `min_size` bytes with `encoding`
+    ("gzip", or "zstd" if the zstandard package is installed). Smaller ones
+    aren't worth the CPU and are sent as they are.
+    """
+
+    ENCODINGS = ("gzip", "zstd")
+
+    def __init__(self, encoding: str = "gzip", min_size: int = 1024) -> None:
+        if encoding not in self.ENCODINGS:
+            error_msg = f"Unsupported request compression {encoding!r}"
+            raise ImproperlyConfigured(error_msg)
+        if encoding == "zstd" and zstandard is None:
+            error_msg = "zstd request compression requires the zstandard package"
+            raise ImproperlyConfigured(error_msg)
+        self.encoding = encoding
+        self.min_size = min_size
+
+    @classmethod
+    def from_settings(cls) -> "RequestCompression | None":
+        if not settings.BLOG_HTTP_REQUEST_COMPRESSION:
+            return None
+        return cls(
+            settings.BLOG_HTTP_REQUEST_COMPRESSION,
+            settings.BLOG_HTTP_COMPRESSION_MIN_SIZE,
+        )
+
+    def compress(self, content: bytes) -> tuple[bytes, str | None]:
+        """Returns the body to send and its Content-Encoding, if compressed."""
+        if len(content) < self.min_size:
+            return content, None
+        if self.encoding == "zstd":
+            return zstandard.ZstdCompressor().compress(content), self.encoding
+        return gzip.compress(content, compresslevel=6), self.encoding
+
+
+def get_http_options(max_connections: int | None = None) -> dict[str, Any]:
+    """
+    Returns the options of the HTTP clients of the remote API, read from the
+    BLOG_HTTP_* settings. `max_connections` overrides the pool size.
+    """
+    max_connections = max_connections or settings.BLOG_HTTP_MAX_CONNECTIONS
+    return {
+        "http2": settings.BLOG_HTTP2 and http2_available(),
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=settings.BLOG_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(
+            settings.BLOG_HTTP_READ_TIMEOUT,
+            connect=settings.BLOG_HTTP_CONNECT_TIMEOUT,
+        ),
+    }
+
+
+def create_client(
+    max_connections: int | None = None, stats: ConnectionStats | None = None
+) -> httpx.Client:
+    """
+    Creates an HTTP client for the remote API. With `stats`, every request
+    reports whether it opened a new connection or reused a pooled one.
+    """
+
+    def add_trace(request: httpx.Request) -> None:
+        if stats is not None:
+            request.extensions["trace"] = stats.trace
+
+    event_hooks = {"request": [add_trace]} if stats is not None else {}
+    return httpx.Client(**get_http_options(max_connections), event_hooks=event_hooks)
+
+
+def create_async_client(
+    max_connections: int | None = None, stats: ConnectionStats | None = None
+) -> httpx.AsyncClient:
+    async def add_trace(request: httpx.Request) -> None:
+        if stats is not None:
+            request.extensions["trace"] = stats.atrace
+
+    event_hooks = {"request": [add_trace]} if stats is not None else {}
+    return httpx.AsyncClient(
+        **get_http_options(max_connections), event_hooks=event_hooks
+    )
+
+
+def format_connection_stats(stats: ConnectionStats) -> str:
+    versions = ", ".join(sorted(stats.http_versions))
+    return (
+        f"HTTP connections: {stats.connections} opened for {stats.requests} "
+        f"requests, {stats.reused} reused ({versions})"
+    )
@@ -0,0 +1,47 @@
+"""
+JSON encoding and decoding for the API and the remote sync, backed by orjson
+when it's installed and by the standard library otherwise.
+
+Both backends produce compact UTF-8 JSON and encode the types orjson doesn't
+support natively (decimals, lazy strings, ...) like DRF's JSONEncoder.
+"""
+
+import json
+from typing import Any
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    # Unused where orjson and its stubs aren't installed.
+    orjson = None  # type: ignore[assignment, unused-ignore]
+
+_encoder = JSONEncoder()
+
+
+def default(obj: Any) -> Any:
+    return _encoder.default(obj)
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    # Datetimes are left to `default` so they are formatted as DRF does.
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(data: Any) -> bytes:
+        return orjson.dumps(data, default=default, option=OPTIONS)
+
+    def loads(content: bytes | str) -> Any:
+        return orjson.loads(content)
+
+else:  # pragma: no cover
+    BACKEND = "json"
+
+    def dumps(data: Any) -> bytes:
+        return json.dumps(
+            data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+    def loads(content: bytes | str) -> Any:
+        return json.loads(content)
@@ -1,6 +1,8 @@
+import time
 from collections.abc import Sequence
 
 import httpx
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 from django.core.management.color import no_style
@@ -10,14 +12,23 @@ from django.db import models
 from django.db import transaction
 from rest_framework.serializers import BaseSerializer
 
+from blog import json_backend
+from blog.http_clients import create_client
+from blog.http_clients import format_connection_stats
 from blog.models import Comment
 from blog.models import Post
+from blog.models import SyncRun
 from blog.models import set_status_to_synced
 from blog.remote_api import JSONAPIClient
 from blog.remote_api import RemoteAPIError
 from blog.remote_api import RemoteModelAPI
 from blog.serializers import RemoteCommentSerializer
 from blog.serializers import RemotePostSerializer
+from blog.sync_reports import ConnectionStats
+from blog.sync_reports import SyncBlogReport
+from blog.sync_reports import SyncModelReport
+
+COMMAND_NAME = "load_initial_data"
 
 
 def update_sequences(model_list: Sequence[type[models.Model]]) -> None:
@@ -35,7 +46,11 @@ def load_model(
 ) -> list[models.Model]:
     api_client = JSONAPIClient(client, url)
     loader = RemoteModelAPI(api_client, model_name, serializer)
-    return loader.get_initial_data()
+    instances = loader.get_initial_data()
+    # Stored by set_status_to_synced, so unchanged objects are never pushed
+    # and consistency checks don't have to serialize them.
+    loader.set_sync_hashes("create", (instances, []))
+    return instances
 
 
 def load_initial_data(
@@ -74,16 +89,40 @@ class Command(BaseCommand):
             type=str,
             help="Comments source",
         )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report of the load as JSON",
+        )
 
     def handle(self, *args, **options) -> None:
         posts_url = options["posts_url"]
         comments_url = options["comments_url"]
+        connection_stats = ConnectionStats()
+        start = time.perf_counter()
         try:
-            with httpx.Client() as client:
+            with create_client(stats=connection_stats) as client:
                 posts, comments = load_initial_data(client, posts_url, comments_url)
         except RemoteAPIError as e:
+            if settings.BLOG_SYNC_RUN_HISTORY:
+                SyncRun.objects.record_failure(
+                    COMMAND_NAME, str(e), time.perf_counter() - start
+                )
             raise CommandError(str(e)) from e
+        report = SyncBlogReport(
+            SyncModelReport(len(posts), 0, 0, []),
+            SyncModelReport(len(comments), 0, 0, []),
+        )
+        report.duration = time.perf_counter() - start
+        report.connections = connection_stats
+        if settings.BLOG_SYNC_RUN_HISTORY:
+            SyncRun.objects.record(COMMAND_NAME, report)
+        if options["json"]:
+            self.stdout.write(json_backend.dumps(report.to_dict()).decode())
+            return
         num_posts = len(posts)
         num_comments = len(comments)
         msg = f"Successfully loaded {num_posts} posts and {num_comments} comments."
         self.stdout.write(self.style.SUCCESS(msg))
+        if connection_stats.requests:
+            self.stdout.write(format_connection_stats(connection_stats))
@@ -1,24 +1,88 @@
+import asyncio
+import functools
+import signal
+import threading
+import time
 from collections import namedtuple
+from collections.abc import Callable
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
 import httpx
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.core.management.base import CommandError
 from django.db import models
+from django.db import transaction
 
+from blog import json_backend
+from blog.http_clients import RequestCompression
+from blog.http_clients import create_async_client
+from blog.http_clients import create_client
+from blog.http_clients import format_connection_stats
 from blog.models import Comment
 from blog.models import Post
+from blog.models import SyncOutbox
+from blog.models import SyncRun
+from blog.models import SyncStatusMixin
 from blog.models import set_status_to_synced
+from blog.remote_api import AsyncJSONAPIClient
+from blog.remote_api import AsyncRemoteModelAPI
+from blog.remote_api import BaseJSONAPIClient
+from blog.remote_api import BlockingRemoteModelAPI
 from blog.remote_api import JSONAPIClient
+from blog.remote_api import ModelSyncAPI
 from blog.remote_api import RemoteAPIError
+from blog.remote_api import RemoteConflictError
 from blog.remote_api import RemoteModelAPI
+from blog.remote_api import ThreadedRemoteModelAPI
+from blog.remote_resilience import AdaptiveConcurrencyLimit
+from blog.remote_resilience import CircuitBreaker
+from blog.remote_resilience import RetryPolicy
+from blog.remote_resilience import TokenBucket
 from blog.serializers import RemoteCommentSerializer
 from blog.serializers import RemotePostSerializer
+from blog.sync_budget import SyncBudget
+from blog.sync_daemon import SyncDaemon
+from blog.sync_daemon import get_change_listener
+from blog.sync_estimate import SyncEstimate
+from blog.sync_estimate import estimate_sync
+from blog.sync_metrics import SyncMetrics
+from blog.sync_metrics import serve_metrics
+from blog.sync_planner import DEFAULT_LEASE_TTL
+from blog.sync_planner import SYNC_MODELS
+from blog.sync_planner import SYNC_PHASES
+from blog.sync_planner import OutboxLease
+from blog.sync_planner import SyncPlan
+from blog.sync_planner import iter_fair_plans
+from blog.sync_planner import iter_plans
+from blog.sync_reports import ConnectionStats
+from blog.sync_reports import RequestStats
 from blog.sync_reports import SyncBlogReport
 from blog.sync_reports import SyncModelReport
+from blog.sync_reports import WorkerReport
+from blog.sync_reports import WorkerStats
+from blog.sync_scheduler import SyncScheduler
 
 SyncResult = namedtuple("SyncResult", ("instances", "errors"))  # noqa: PYI024
 
+DEFAULT_CHUNK_SIZE = 500
+
+DEFAULT_BATCH_SIZE = 100
+
+DEFAULT_CHECKPOINT_SIZE = 100
+
+DEFAULT_DEBOUNCE = 0.5
+
+DEFAULT_POLL_INTERVAL = 5.0
+
+DEFAULT_HEARTBEAT = 60.0
+
+ACTION_NAMES = {"create": "creating", "update": "updating", "delete": "deleting"}
+
+COMMAND_NAME = "sync_remote_data"
+
 
 def make_error_messages(
     errors: list[tuple[models.Model, Exception]], action: str
@@ -34,85 +98,517 @@ def make_error_messages(
 
 
 def format_report(name: str, report: SyncModelReport) -> str:
-    return (
+    msg = (
         f"{name} (created={report.created}, "
         f"updated={report.updated}, deleted={report.deleted})"
     )
+    extras = [
+        f"{count} {label}"
+        for count, label in (
+            (report.avoided, "remote calls avoided"),
+            (report.skipped, "unchanged skipped"),
+            (report.deferred, "deferred"),
+            (report.cascaded, "deletes cascaded"),
+            (report.conflicts, "conflicts"),
+            (report.retries, "retries"),
+            (report.throttled, "requests throttled"),
+        )
+        if count
+    ]
+    if report.circuit_trips:
+        extras.append(
+            f"circuit opened {report.circuit_trips} times, "
+            f"{report.rejected} requests rejected"
+        )
+    if report.bytes_sent != report.bytes_sent_uncompressed:
+        extras.append(
+            f"{report.bytes_sent} bytes sent "
+            f"({report.bytes_sent_uncompressed} uncompressed)"
+        )
+    if report.bytes_received != report.bytes_received_uncompressed:
+        extras.append(
+            f"{report.bytes_received} bytes received "
+            f"({report.bytes_received_uncompressed} uncompressed)"
+        )
+    if extras:
+        msg += " " + ", ".join(extras)
+    return msg
+
+
+def format_estimate(estimate: SyncEstimate) -> str:
+    lines = ["Sync plan (dry run, nothing was sent):"]
+    for name, operation in SYNC_PHASES:
+        operation_estimate = estimate.operations.get((name, operation))
+        if operation_estimate is None:
+            continue
+        msg = (
+            f"{name} {operation}: {operation_estimate.objects} objects in "
+            f"{operation_estimate.num_requests} requests, "
+            f"{operation_estimate.num_bytes} bytes"
+        )
+        if operation_estimate.skipped:
+            msg += f" ({operation_estimate.skipped} unchanged skipped)"
+        lines.append(msg)
+    for name in ("posts", "comments"):
+        extras = []
+        if avoided := estimate.avoided.get(name):
+            extras.append(f"{avoided} recorded changes coalesced")
+        if purged := estimate.purged.get(name):
+            extras.append(f"{purged} purged locally")
+        if cascaded := estimate.cascaded.get(name):
+            extras.append(f"{cascaded} deletes cascaded by the remote")
+        if extras:
+            lines.append(f"{name}: " + ", ".join(extras))
+    latency_source = (
+        "measured by the last sync runs"
+        if estimate.latency_measured
+        else "assumed, no sync run measured it yet"
+    )
+    lines.append(
+        f"Estimated {estimate.num_requests} requests sending "
+        f"{estimate.num_bytes} bytes in about {estimate.duration:.1f}s with "
+        f"{estimate.parallelism} concurrent requests (latency {latency_source})"
+    )
+    return "\n\t".join(lines)
 
 
-def format_errors(create_errors, update_errors, delete_errors) -> list[str]:
+def format_worker_report(report: WorkerReport) -> str:
     return (
-        make_error_messages(create_errors, "creating")
-        + make_error_messages(update_errors, "updating")
-        + make_error_messages(delete_errors, "deleting")
+        f"{report.name}: {report.items} items in {report.elapsed:.2f}s "
+        f"({report.items_per_second:.2f} items/s)"
     )
 
 
+def commit_synced(
+    model: type[SyncStatusMixin],
+    operation: str,
+    instances: list[SyncStatusMixin],
+    up_to: int | None = None,
+) -> None:
+    """
+    Flips synced objects to SYNCED (or purges them if they were deleted) and
+    acknowledges their outbox entries up to the `up_to` sequence number.
+    """
+    if operation == "delete":
+        model.all_objects.filter(pk__in=[obj.pk for obj in instances]).delete()
+    elif instances:
+        set_status_to_synced(model, instances)
+    SyncOutbox.objects.acknowledge(model, [obj.pk for obj in instances], up_to)
+
+
 def update_synced_models(
     posts_synced: Iterable[Post],
     posts_deleted: Iterable[Post],
     comments_synced: Iterable[Comment],
     comments_deleted: Iterable[Comment],
 ):
-    if posts_synced:
-        set_status_to_synced(Post, posts_synced)
-    if comments_synced:
-        set_status_to_synced(Comment, comments_synced)
+    commit_synced(Post, "update", list(posts_synced))
+    commit_synced(Comment, "update", list(comments_synced))
+    commit_synced(Comment, "delete", list(comments_deleted))
+    commit_synced(Post, "delete", list(posts_deleted))
 
-    Comment.all_objects.filter(id__in=[obj.pk for obj in comments_deleted]).delete()
-    Post.all_objects.filter(id__in=[obj.pk for obj in posts_deleted]).delete()
 
+def push_objects(
+    api: ModelSyncAPI, operation: str, objects: list[SyncStatusMixin]
+) -> SyncResult:
+    match operation:
+        case "create":
+            return SyncResult(*api.sync_created(objects))
+        case "update":
+            return SyncResult(*api.sync_updated(objects))
+        case _:
+            return SyncResult(*api.sync_deleted(objects))
 
-def sync_remote_data(
-    client: httpx.Client, posts_url: str, comments_url: str
+
+def skip_unchanged(
+    api: ModelSyncAPI,
+    name: str,
+    objects: list[SyncStatusMixin],
+    up_to: int,
+    blog_report: SyncBlogReport,
+) -> list[SyncStatusMixin]:
+    """
+    Marks as synced the objects whose payload is the one last synced and
+    returns the ones that still have to be updated in the remote.
+    """
+    unchanged = [obj for obj in objects if api.is_unchanged(obj)]
+    if not unchanged:
+        return objects
+    with transaction.atomic():
+        commit_synced(SYNC_MODELS[name], "update", unchanged, up_to)
+    getattr(blog_report, name).skipped += len(unchanged)
+    unchanged_ids = {obj.pk for obj in unchanged}
+    return [obj for obj in objects if obj.pk not in unchanged_ids]
+
+
+def overwrite_conflicts(
+    model: type[SyncStatusMixin], errors: list[tuple[SyncStatusMixin, Exception]]
+) -> None:
+    """
+    Clears the stored ETag of the objects whose write was rejected as a
+    conflict, if BLOG_SYNC_OVERWRITE_CONFLICTS is enabled, so their next
+    write is unconditional and the local version wins.
+    """
+    if not settings.BLOG_SYNC_OVERWRITE_CONFLICTS:
+        return
+    conflicted = [obj.pk for obj, exc in errors if isinstance(exc, RemoteConflictError)]
+    if conflicted:
+        model.all_objects.filter(pk__in=conflicted).update(remote_etag="")
+
+
+def commit_resolved(plan: SyncPlan, blog_report: SyncBlogReport) -> None:
+    """Commits the work of `plan` that needs no remote call."""
+    with transaction.atomic():
+        for name, object_ids in plan.resolved.items():
+            SyncOutbox.objects.acknowledge(
+                SYNC_MODELS[name], object_ids, plan.last_entry_id
+            )
+        # Objects created and deleted since the last sync never reached
+        # the remote, so they are just purged.
+        for name in ("comments", "posts"):
+            if purged := plan.purged.get(name):
+                commit_synced(SYNC_MODELS[name], "delete", purged, plan.last_entry_id)
+    for name, avoided in plan.avoided.items():
+        getattr(blog_report, name).avoided += avoided
+
+
+def sync_plan(  # noqa: PLR0913
+    plan: SyncPlan,
+    apis: dict[str, ModelSyncAPI],
+    checkpoint_size: int,
+    blog_report: SyncBlogReport,
+    lease: OutboxLease | None = None,
+    budget: SyncBudget | None = None,
+) -> None:
+    commit_resolved(plan, blog_report)
+    scheduler = SyncScheduler(
+        plan,
+        checkpoint_size,
+        cascades=settings.BLOG_SYNC_CASCADE_DELETES,
+        budget=budget,
+    )
+    for step in scheduler:
+        if budget is not None and budget.exhausted:
+            break
+        api = apis[step.name]
+        objects = step.objects
+        if step.operation == "update":
+            objects = skip_unchanged(
+                api, step.name, objects, plan.last_entry_id, blog_report
+            )
+            if not objects:
+                continue
+        start = time.perf_counter()
+        result = push_objects(api, step.operation, objects)
+        if budget is not None:
+            budget.consume(len(objects))
+        cascaded = scheduler.resolve_cascaded(step, result.instances)
+        with transaction.atomic():
+            if cascaded is not None:
+                commit_synced(
+                    SYNC_MODELS[cascaded.name],
+                    "delete",
+                    cascaded.objects,
+                    plan.last_entry_id,
+                )
+            commit_synced(
+                SYNC_MODELS[step.name],
+                step.operation,
+                result.instances,
+                plan.last_entry_id,
+            )
+            overwrite_conflicts(SYNC_MODELS[step.name], result.errors)
+        if lease is not None:
+            lease.renew()
+        report = getattr(blog_report, step.name)
+        report.durations[step.operation] += time.perf_counter() - start
+        report.add(
+            step.operation,
+            len(result.instances),
+            make_error_messages(result.errors, ACTION_NAMES[step.operation]),
+        )
+        report.conflicts += sum(
+            isinstance(exc, RemoteConflictError) for _, exc in result.errors
+        )
+        if cascaded is not None:
+            getattr(blog_report, cascaded.name).cascaded += len(cascaded.objects)
+        scheduler.complete(step, result.instances)
+    for name, deferred in scheduler.deferred.items():
+        getattr(blog_report, name).deferred += deferred
+
+
+def sync_models(  # noqa: PLR0913
+    posts_sync: ModelSyncAPI,
+    comments_sync: ModelSyncAPI,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    checkpoint_size: int = DEFAULT_CHECKPOINT_SIZE,
+    lease: OutboxLease | None = None,
+    budget: SyncBudget | None = None,
 ) -> SyncBlogReport:
-    posts_sync = RemoteModelAPI(
-        JSONAPIClient(client, posts_url), "Posts", RemotePostSerializer
+    """
+    Consumes the sync outbox in sequence order, one chunk of entries at a time.
+
+    The pending changes of every object are coalesced by the planner into
+    their net effect. The objects of each chunk are pushed in the order set
+    by the SyncScheduler, in checkpoints of at most `checkpoint_size`
+    objects. Every checkpoint commits its status changes together with the
+    acknowledgement of the outbox entries before the next one is pushed, so
+    memory use doesn't depend on the backlog size and a killed run only
+    loses the checkpoint in flight: the next run resumes from the entries not
+    acknowledged yet.
+
+    With a `lease`, chunks are claimed so other workers can consume the
+    outbox concurrently. The lease is renewed at every checkpoint, and the
+    entries left (the ones that failed) are released once the run is over so
+    it doesn't claim them again.
+
+    With a `budget`, the run stops once it's used up, leaving the rest of
+    the outbox for the next one. Chunks take their entries from every model
+    in turn (see iter_fair_plans), and the budget is shared by the models
+    and operations of every chunk as explained in SyncScheduler.
+    """
+    blog_report = SyncBlogReport(
+        SyncModelReport(0, 0, 0, []), SyncModelReport(0, 0, 0, [])
     )
-    comments_sync = RemoteModelAPI(
-        JSONAPIClient(client, comments_url), "Comments", RemoteCommentSerializer
+    apis = {"posts": posts_sync, "comments": comments_sync}
+    start = time.perf_counter()
+    blog_report.backlog_before = SyncOutbox.objects.count()
+    if budget is not None:
+        budget.start()
+    try:
+        plans = (
+            iter_plans(chunk_size, lease)
+            if budget is None
+            else iter_fair_plans(chunk_size, lease)
+        )
+        for plan in plans:
+            sync_plan(plan, apis, checkpoint_size, blog_report, lease, budget)
+            if budget is not None and budget.exhausted:
+                blog_report.budget_exhausted = True
+                break
+    finally:
+        if lease is not None:
+            lease.release()
+    blog_report.backlog_after = SyncOutbox.objects.count()
+    blog_report.duration = time.perf_counter() - start
+    return blog_report
+
+
+def record_runs(
+    sync_pass: Callable[[], SyncBlogReport], *, skip_idle: bool = False
+) -> Callable[[], SyncBlogReport]:
+    """
+    Wraps `sync_pass` to store every run in the SyncRun history. With
+    `skip_idle`, runs that had nothing to sync aren't stored.
+    """
+
+    @functools.wraps(sync_pass)
+    def wrapper() -> SyncBlogReport:
+        start = time.perf_counter()
+        try:
+            report = sync_pass()
+        except RemoteAPIError as exc:
+            SyncRun.objects.record_failure(
+                COMMAND_NAME, str(exc), time.perf_counter() - start
+            )
+            raise
+        if not skip_idle or report.num_items_synced or report.num_errors:
+            SyncRun.objects.record(COMMAND_NAME, report)
+        return report
+
+    return wrapper
+
+
+def plan_sync(  # noqa: PLR0913
+    client: httpx.Client,
+    posts_url: str,
+    comments_url: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    parallelism: int = 1,
+) -> SyncEstimate:
+    """
+    Estimates the work of a sync run with the clients it would use, without
+    sending any request.
+    """
+    apis = {
+        "posts": RemoteModelAPI(
+            JSONAPIClient(client, posts_url, **get_client_options("posts")),
+            "Posts",
+            RemotePostSerializer,
+            batch_size,
+        ),
+        "comments": RemoteModelAPI(
+            JSONAPIClient(client, comments_url, **get_client_options("comments")),
+            "Comments",
+            RemoteCommentSerializer,
+            batch_size,
+        ),
+    }
+    return estimate_sync(
+        apis, chunk_size, parallelism, cascades=settings.BLOG_SYNC_CASCADE_DELETES
     )
 
-    posts_created = SyncResult(*posts_sync.sync_created(Post.objects.created()))
-    comments_created = SyncResult(
-        *comments_sync.sync_created(Comment.objects.created())
+
+def get_batch_urls(name: str) -> dict[str, str]:
+    return settings.BLOG_SYNC_BATCH_URLS.get(name, {})
+
+
+def get_client_options(name: str, **shared_options: Any) -> dict[str, Any]:
+    """
+    Returns the options of the client of the `name` collection.
+    `shared_options`, like rate and concurrency limits, apply to all the
+    clients of the remote.
+    """
+    stats = RequestStats()
+    return {
+        "batch_urls": get_batch_urls(name),
+        "partial_updates": settings.BLOG_SYNC_PARTIAL_UPDATES,
+        "retry_policy": RetryPolicy.from_settings(),
+        "circuit_breaker": CircuitBreaker.from_settings(stats),
+        "stats": stats,
+        "compression": RequestCompression.from_settings(),
+        **shared_options,
+    }
+
+
+def add_request_stats(
+    blog_report: SyncBlogReport,
+    posts_client: BaseJSONAPIClient,
+    comments_client: BaseJSONAPIClient,
+) -> SyncBlogReport:
+    blog_report.posts.add_request_stats(posts_client.stats)
+    blog_report.comments.add_request_stats(comments_client.stats)
+    if posts_client.concurrency_limit is not None:
+        blog_report.concurrency_limit = posts_client.concurrency_limit.limit
+    return blog_report
+
+
+def sync_remote_data(  # noqa: PLR0913
+    client: httpx.Client,
+    posts_url: str,
+    comments_url: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_size: int = DEFAULT_CHECKPOINT_SIZE,
+    lease: OutboxLease | None = None,
+    budget: SyncBudget | None = None,
+) -> SyncBlogReport:
+    rate_limiter = TokenBucket.from_settings()
+    posts_client = JSONAPIClient(
+        client, posts_url, **get_client_options("posts", rate_limiter=rate_limiter)
     )
-    posts_updated = SyncResult(*posts_sync.sync_updated(Post.objects.updated()))
-    comments_updated = SyncResult(
-        *comments_sync.sync_updated(Comment.objects.updated())
+    comments_client = JSONAPIClient(
+        client,
+        comments_url,
+        **get_client_options("comments", rate_limiter=rate_limiter),
     )
-    comments_deleted = SyncResult(
-        *comments_sync.sync_deleted(Comment.objects.deleted())
+    posts_sync = RemoteModelAPI(posts_client, "Posts", RemotePostSerializer, batch_size)
+    comments_sync = RemoteModelAPI(
+        comments_client, "Comments", RemoteCommentSerializer, batch_size
     )
-    posts_deleted = SyncResult(*posts_sync.sync_deleted(Post.objects.deleted()))
-
-    update_synced_models(
-        posts_created.instances + posts_updated.instances,
-        posts_deleted.instances,
-        comments_created.instances + comments_updated.instances,
-        comments_deleted.instances,
+    report = sync_models(
+        posts_sync, comments_sync, chunk_size, checkpoint_size, lease, budget
     )
+    return add_request_stats(report, posts_client, comments_client)
 
-    return SyncBlogReport(
-        SyncModelReport(
-            len(posts_created.instances),
-            len(posts_updated.instances),
-            len(posts_deleted.instances),
-            format_errors(
-                posts_created.errors, posts_updated.errors, posts_deleted.errors
-            ),
-        ),
-        SyncModelReport(
-            len(comments_created.instances),
-            len(comments_updated.instances),
-            len(comments_deleted.instances),
-            format_errors(
-                comments_created.errors,
-                comments_updated.errors,
-                comments_deleted.errors,
-            ),
-        ),
-    )
+
+def async_sync_remote_data(  # noqa: PLR0913
+    posts_url: str,
+    comments_url: str,
+    concurrency: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_size: int = DEFAULT_CHECKPOINT_SIZE,
+    lease: OutboxLease | None = None,
+    budget: SyncBudget | None = None,
+) -> SyncBlogReport:
+    with asyncio.Runner() as runner:
+        connection_stats = ConnectionStats()
+        client = create_async_client(concurrency, connection_stats)
+        shared_options = {
+            "rate_limiter": TokenBucket.from_settings(),
+            "concurrency_limit": AdaptiveConcurrencyLimit.from_settings(concurrency),
+        }
+        try:
+            posts_client = AsyncJSONAPIClient(
+                client, posts_url, **get_client_options("posts", **shared_options)
+            )
+            comments_client = AsyncJSONAPIClient(
+                client,
+                comments_url,
+                **get_client_options("comments", **shared_options),
+            )
+            posts_sync = AsyncRemoteModelAPI(
+                posts_client, "Posts", RemotePostSerializer, concurrency, batch_size
+            )
+            comments_sync = AsyncRemoteModelAPI(
+                comments_client,
+                "Comments",
+                RemoteCommentSerializer,
+                concurrency,
+                batch_size,
+            )
+            report = sync_models(
+                BlockingRemoteModelAPI(posts_sync, runner),
+                BlockingRemoteModelAPI(comments_sync, runner),
+                chunk_size,
+                checkpoint_size,
+                lease,
+                budget,
+            )
+            report.connections = connection_stats
+            return add_request_stats(report, posts_client, comments_client)
+        finally:
+            runner.run(client.aclose())
+
+
+def threaded_sync_remote_data(  # noqa: PLR0913
+    client: httpx.Client,
+    posts_url: str,
+    comments_url: str,
+    workers: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    checkpoint_size: int = DEFAULT_CHECKPOINT_SIZE,
+    lease: OutboxLease | None = None,
+    budget: SyncBudget | None = None,
+) -> SyncBlogReport:
+    stats = WorkerStats()
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="sync-worker"
+    ) as executor:
+        shared_options = {
+            "rate_limiter": TokenBucket.from_settings(),
+            "concurrency_limit": AdaptiveConcurrencyLimit.from_settings(workers),
+        }
+        posts_client = JSONAPIClient(
+            client, posts_url, **get_client_options("posts", **shared_options)
+        )
+        comments_client = JSONAPIClient(
+            client, comments_url, **get_client_options("comments", **shared_options)
+        )
+        posts_sync = ThreadedRemoteModelAPI(
+            posts_client,
+            "Posts",
+            RemotePostSerializer,
+            executor,
+            stats,
+            batch_size,
+        )
+        comments_sync = ThreadedRemoteModelAPI(
+            comments_client,
+            "Comments",
+            RemoteCommentSerializer,
+            executor,
+            stats,
+            batch_size,
+        )
+        report = sync_models(
+            posts_sync, comments_sync, chunk_size, checkpoint_size, lease, budget
+        )
+    report.workers = stats.reports()
+    return add_request_stats(report, posts_client, comments_client)
 
 
 class Command(BaseCommand):
@@ -133,16 +629,338 @@ class Command(BaseCommand):
             type=str,
             help="Comments source",
         )
+        parser.add_argument(
+            "--concurrency",
+            action="store",
+            default=None,
+            type=int,
+            help="Push changes asynchronously with up to N concurrent requests",
+        )
+        parser.add_argument(
+            "--workers",
+            action="store",
+            default=None,
+            type=int,
+            help="Push changes from a pool of N worker threads",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            action="store",
+            default=DEFAULT_CHUNK_SIZE,
+            type=int,
+            help="Number of pending changes read and planned at once",
+        )
+        parser.add_argument(
+            "--batch-size",
+            action="store",
+            default=DEFAULT_BATCH_SIZE,
+            type=int,
+            help="Objects sent per request to the remote bulk endpoints",
+        )
+        parser.add_argument(
+            "--checkpoint-size",
+            action="store",
+            default=DEFAULT_CHECKPOINT_SIZE,
+            type=int,
+            help="Objects pushed before committing their sync status",
+        )
+        parser.add_argument(
+            "--max-duration",
+            action="store",
+            default=None,
+            type=float,
+            help="Stop syncing after N seconds, leaving the rest for the next run",
+        )
+        parser.add_argument(
+            "--max-items",
+            action="store",
+            default=None,
+            type=int,
+            help="Stop syncing after pushing N objects, leaving the rest for later",
+        )
+        parser.add_argument(
+            "--lease",
+            action="store_true",
+            help="Claim pending changes so several sync processes can run at once",
+        )
+        parser.add_argument(
+            "--lease-ttl",
+            action="store",
+            default=DEFAULT_LEASE_TTL,
+            type=float,
+            help="Seconds before changes claimed by a crashed process are reclaimed",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Keep running and push changes as soon as they are committed",
+        )
+        parser.add_argument(
+            "--debounce",
+            action="store",
+            default=DEFAULT_DEBOUNCE,
+            type=float,
+            help="Seconds to gather further changes before a --watch sync pass",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            action="store",
+            default=DEFAULT_POLL_INTERVAL,
+            type=float,
+            help=(
+                "Seconds between sync passes in --watch mode without LISTEN/NOTIFY, "
+                "and between catch-up passes with it"
+            ),
+        )
+        parser.add_argument(
+            "--heartbeat",
+            action="store",
+            default=DEFAULT_HEARTBEAT,
+            type=float,
+            help="Seconds between --watch mode heartbeat messages",
+        )
+        parser.add_argument(
+            "--metrics-file",
+            action="store",
+            default=None,
+            type=str,
+            help="Write Prometheus metrics to this file after every sync run",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            action="store",
+            default=None,
+            type=int,
+            help="Serve Prometheus metrics at /metrics on this port in --watch mode",
+        )
+        parser.add_argument(
+            "--plan",
+            action="store_true",
+            help="Estimate the requests, bytes and time of a sync without sending it",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report of every sync run as a line of JSON",
+        )
+
+    def get_sync_options(self, options: dict[str, Any]) -> dict[str, Any]:
+        for option in (
+            "concurrency",
+            "workers",
+            "chunk_size",
+            "batch_size",
+            "checkpoint_size",
+            "max_items",
+        ):
+            if options[option] is not None and options[option] < 1:
+                error_msg = f"--{option.replace('_', '-')} must be a positive integer"
+                raise CommandError(error_msg)
+        if options["concurrency"] and options["workers"]:
+            error_msg = "--concurrency and --workers can't be used together"
+            raise CommandError(error_msg)
+        sync_options = {
+            "chunk_size": options["chunk_size"],
+            "batch_size": options["batch_size"],
+            "checkpoint_size": options["checkpoint_size"],
+        }
+        if options["lease"]:
+            if options["lease_ttl"] <= 0:
+                error_msg = "--lease-ttl must be positive"
+                raise CommandError(error_msg)
+            sync_options["lease"] = OutboxLease(ttl=options["lease_ttl"])
+        if options["max_duration"] is not None or options["max_items"] is not None:
+            if options["max_duration"] is not None and options["max_duration"] <= 0:
+                error_msg = "--max-duration must be positive"
+                raise CommandError(error_msg)
+            sync_options["budget"] = SyncBudget(
+                options["max_duration"], options["max_items"]
+            )
+        return sync_options
+
+    def get_metrics(self, options: dict[str, Any]) -> SyncMetrics | None:
+        if options["metrics_port"] is not None:
+            if not options["watch"]:
+                error_msg = "--metrics-port requires --watch"
+                raise CommandError(error_msg)
+            if not 0 <= options["metrics_port"] < 65536:  # noqa: PLR2004
+                error_msg = "--metrics-port must be a valid port number"
+                raise CommandError(error_msg)
+        if options["metrics_file"] is None and options["metrics_port"] is None:
+            return None
+        return SyncMetrics(options["metrics_file"])
+
+    json_output = False
 
     def handle(self, *args, **options):
-        posts_url = options["posts_url"]
-        comments_url = options["comments_url"]
+        self.json_output = options["json"]
+        concurrency = options["concurrency"]
+        sync_options = self.get_sync_options(options)
+        metrics = self.get_metrics(options)
+        if options["plan"]:
+            if options["watch"]:
+                error_msg = "--plan can't be used with --watch"
+                raise CommandError(error_msg)
+            self.plan(sync_options, options)
+            return
+        if options["watch"]:
+            if concurrency:
+                error_msg = "--watch can't be used with --concurrency"
+                raise CommandError(error_msg)
+            self.watch(sync_options, options, metrics)
+            return
+        sync_run = self.track_runs(
+            functools.partial(self.sync_once, sync_options, options), metrics
+        )
         try:
-            with httpx.Client() as client:
-                report = sync_remote_data(client, posts_url, comments_url)
-                self.process_report(report)
+            report = sync_run()
         except RemoteAPIError as exc:
             raise CommandError(str(exc)) from exc
+        self.output_report(report)
+
+    def track_runs(
+        self,
+        sync_pass: Callable[[], SyncBlogReport],
+        metrics: SyncMetrics | None,
+        *,
+        watch: bool = False,
+    ) -> Callable[[], SyncBlogReport]:
+        if metrics is not None:
+            sync_pass = metrics.instrument(sync_pass)
+        if settings.BLOG_SYNC_RUN_HISTORY:
+            sync_pass = record_runs(sync_pass, skip_idle=watch)
+        return sync_pass
+
+    def plan(self, sync_options: dict[str, Any], options: dict[str, Any]) -> None:
+        with create_client() as client:
+            estimate = plan_sync(
+                client,
+                options["posts_url"],
+                options["comments_url"],
+                sync_options["chunk_size"],
+                sync_options["batch_size"],
+                options["concurrency"] or options["workers"] or 1,
+            )
+        if self.json_output:
+            self.stdout.write(json_backend.dumps(estimate.to_dict()).decode())
+        else:
+            self.stdout.write(format_estimate(estimate))
+
+    def sync_once(
+        self, sync_options: dict[str, Any], options: dict[str, Any]
+    ) -> SyncBlogReport:
+        posts_url = options["posts_url"]
+        comments_url = options["comments_url"]
+        concurrency = options["concurrency"]
+        workers = options["workers"]
+        if concurrency:
+            return async_sync_remote_data(
+                posts_url, comments_url, concurrency, **sync_options
+            )
+        connection_stats = ConnectionStats()
+        if workers:
+            with create_client(workers, connection_stats) as client:
+                report = threaded_sync_remote_data(
+                    client, posts_url, comments_url, workers, **sync_options
+                )
+        else:
+            with create_client(stats=connection_stats) as client:
+                report = sync_remote_data(
+                    client, posts_url, comments_url, **sync_options
+                )
+        report.connections = connection_stats
+        return report
+
+    def watch(
+        self,
+        sync_options: dict[str, Any],
+        options: dict[str, Any],
+        metrics: SyncMetrics | None = None,
+    ) -> None:
+        """
+        Runs sync passes as changes are committed until SIGINT or SIGTERM,
+        reusing the same HTTP connection pool.
+        """
+        posts_url = options["posts_url"]
+        comments_url = options["comments_url"]
+        workers = options["workers"]
+        if options["debounce"] < 0:
+            error_msg = "--debounce can't be negative"
+            raise CommandError(error_msg)
+        # A zero interval would make the daemon loop busy-wait.
+        for option in ("poll_interval", "heartbeat"):
+            if options[option] <= 0:
+                error_msg = f"--{option.replace('_', '-')} must be positive"
+                raise CommandError(error_msg)
+        stop_event = threading.Event()
+        connection_stats = ConnectionStats()
+
+        def on_report(report: SyncBlogReport) -> None:
+            report.connections = connection_stats
+            self.output_report(report)
+
+        with create_client(workers, connection_stats) as client:
+            sync_pass: Callable[[], SyncBlogReport]
+            if workers:
+                sync_pass = functools.partial(
+                    threaded_sync_remote_data,
+                    client,
+                    posts_url,
+                    comments_url,
+                    workers,
+                    **sync_options,
+                )
+            else:
+                sync_pass = functools.partial(
+                    sync_remote_data, client, posts_url, comments_url, **sync_options
+                )
+            sync_pass = self.track_runs(sync_pass, metrics, watch=True)
+            daemon = SyncDaemon(
+                sync_pass,
+                get_change_listener(stop_event, options["poll_interval"]),
+                stop_event,
+                on_report=on_report,
+                on_heartbeat=self.write_heartbeat,
+                on_error=lambda exc: self.stderr.write(str(exc)),
+                debounce=options["debounce"],
+                heartbeat=options["heartbeat"],
+                catch_up=options["poll_interval"],
+            )
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, daemon.stop)
+            metrics_server = None
+            if metrics is not None and options["metrics_port"] is not None:
+                metrics_server = serve_metrics(metrics, options["metrics_port"])
+                self.write_info(f"Serving metrics on port {metrics_server.server_port}")
+            self.write_info("Watching for changes to sync...")
+            try:
+                daemon.run()
+            finally:
+                if metrics_server is not None:
+                    metrics_server.shutdown()
+                    metrics_server.server_close()
+        self.write_info("Sync daemon stopped.")
+
+    def write_heartbeat(self, passes: int, items_synced: int) -> None:
+        self.write_info(
+            f"Sync daemon alive: {passes} passes, {items_synced} items synced"
+        )
+
+    def write_info(self, msg: str) -> None:
+        # Keep stdout for the reports in --json mode.
+        (self.stderr if self.json_output else self.stdout).write(msg)
+
+    def output_report(self, blog_report: SyncBlogReport) -> None:
+        if self.json_output:
+            self.stdout.write(json_backend.dumps(blog_report.to_dict()).decode())
+        else:
+            self.process_report(blog_report)
+            if blog_report.budget_exhausted:
+                msg = (
+                    f"Sync budget used up, {blog_report.backlog_after} pending changes "
+                    "left for the next run."
+                )
+                self.stdout.write(self.style.WARNING(msg))
 
     def process_report(self, blog_report: SyncBlogReport) -> None:
         if blog_report.success:
@@ -174,3 +992,11 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.ERROR(msg))
                     for error in report.errors:
                         self.stdout.write(self.style.ERROR(error))
+        for worker_report in blog_report.workers:
+            self.stdout.write(format_worker_report(worker_report))
+        if blog_report.concurrency_limit is not None:
+            self.stdout.write(
+                f"Adaptive concurrency limit: {blog_report.concurrency_limit}"
+            )
+        if blog_report.connections is not None and blog_report.connections.requests:
+            self.stdout.write(format_connection_stats(blog_report.connections))
@@ -0,0 +1,142 @@
+import httpx
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from blog import json_backend
+from blog.http_clients import create_client
+from blog.remote_api import JSONAPIClient
+from blog.remote_api import RemoteAPIError
+from blog.remote_api import RemoteModelAPI
+from blog.serializers import RemoteCommentSerializer
+from blog.serializers import RemotePostSerializer
+from blog.sync_consistency import DEFAULT_BUCKET_SIZE
+from blog.sync_consistency import ModelConsistency
+from blog.sync_consistency import enqueue_resync
+from blog.sync_consistency import verify_model
+from blog.sync_planner import SYNC_MODELS
+
+# Ids listed by model in the report, the rest are only counted.
+MAX_LISTED_IDS = 20
+
+
+def verify_remote_consistency(
+    client: httpx.Client,
+    posts_url: str,
+    comments_url: str,
+    bucket_size: int = DEFAULT_BUCKET_SIZE,
+    *,
+    enqueue: bool = False,
+) -> list[ModelConsistency]:
+    apis = {
+        "posts": RemoteModelAPI(
+            JSONAPIClient(client, posts_url), "Posts", RemotePostSerializer
+        ),
+        "comments": RemoteModelAPI(
+            JSONAPIClient(client, comments_url), "Comments", RemoteCommentSerializer
+        ),
+    }
+    results = []
+    for name, api in apis.items():
+        try:
+            result = verify_model(name, api, SYNC_MODELS[name], bucket_size)
+        except httpx.HTTPError as exc:
+            error_msg = f"An error occurred while requesting {exc.request.url!r}: {exc}"
+            raise RemoteAPIError(error_msg) from exc
+        if enqueue:
+            enqueue_resync(SYNC_MODELS[name], result)
+        results.append(result)
+    return results
+
+
+def format_ids(ids: list[int]) -> str:
+    listed = ", ".join(map(str, ids[:MAX_LISTED_IDS]))
+    if len(ids) > MAX_LISTED_IDS:
+        listed += f" and {len(ids) - MAX_LISTED_IDS} more"
+    return listed
+
+
+def format_consistency(result: ModelConsistency) -> list[str]:
+    lines = [
+        f"{result.name}: {result.local_objects} local and "
+        f"{result.remote_objects} remote objects compared"
+    ]
+    for ids, label in (
+        (result.divergent, "divergent"),
+        (result.missing, "missing in the remote"),
+        (result.extra, "only in the remote"),
+    ):
+        if ids:
+            lines.append(f"  {len(ids)} {label}: {format_ids(ids)}")
+    if result.enqueued:
+        lines.append(f"  {result.enqueued} enqueued for re-sync")
+    return lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare posts and comments with the remote API. It's a full scan: "
+        "the remote collections are downloaded and every local object is "
+        "serialized"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--posts-url",
+            action="store",
+            default="https://jsonplaceholder.typicode.com/posts",
+            type=str,
+            help="Posts source",
+        )
+        parser.add_argument(
+            "--comments-url",
+            action="store",
+            default="https://jsonplaceholder.typicode.com/comments",
+            type=str,
+            help="Comments source",
+        )
+        parser.add_argument(
+            "--bucket-size",
+            action="store",
+            default=DEFAULT_BUCKET_SIZE,
+            type=int,
+            help="Local objects read and serialized per query",
+        )
+        parser.add_argument(
+            "--enqueue",
+            action="store_true",
+            help="Record the divergent and missing objects in the outbox",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the result as JSON",
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options["bucket_size"] < 1:
+            error_msg = "--bucket-size must be at least 1"
+            raise CommandError(error_msg)
+        try:
+            with create_client() as client:
+                results = verify_remote_consistency(
+                    client,
+                    options["posts_url"],
+                    options["comments_url"],
+                    options["bucket_size"],
+                    enqueue=options["enqueue"],
+                )
+        except RemoteAPIError as e:
+            raise CommandError(str(e)) from e
+        if options["json"]:
+            data = {result.name: result.to_dict() for result in results}
+            self.stdout.write(json_backend.dumps(data).decode())
+            return
+        for result in results:
+            for line in format_consistency(result):
+                self.stdout.write(line)
+        if all(result.consistent for result in results):
+            self.stdout.write(self.style.SUCCESS("Local data matches the remote."))
+        else:
+            self.stdout.write(
+                self.style.WARNING("Local data diverges from the remote.")
+            )
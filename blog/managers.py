@@ -1,4 +1,37 @@
+import operator
+from collections import defaultdict
+from collections.abc import Iterable
+from collections.abc import Iterator
+from datetime import timedelta
+from functools import partial
+from functools import reduce
+from typing import TYPE_CHECKING
+from typing import Generic
+from typing import TypeVar
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
 from django.db import models
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    from blog.models import SyncOutbox
+    from blog.models import SyncRun
+    from blog.sync_reports import SyncBlogReport
+
+_M = TypeVar("_M", bound=models.Model)
+
+# PostgreSQL channel notified when changes are recorded in the sync outbox.
+SYNC_CHANNEL = "blog_sync"
+
+# Error messages kept by model in the stored report of a sync run, the rest
+# are only counted.
+MAX_STORED_RUN_ERRORS = 100
 
 
 class SyncStatus(models.TextChoices):
@@ -8,7 +41,34 @@ class SyncStatus(models.TextChoices):
     DELETED = "D", "Deleted"
 
 
-class SyncStatusQuerySet(models.QuerySet):
+class SyncRunOutcome(models.TextChoices):
+    SUCCESS = "success", "Success"
+    PARTIAL = "partial", "Partial"
+    FAILED = "failed", "Failed"
+
+
+class ChunkedQuerySet(models.QuerySet[_M], Generic[_M]):
+    def iter_chunks(self, chunk_size: int) -> Iterator[list[_M]]:
+        """
+        Yields the queryset objects in pk ordered lists of at most `chunk_size`.
+
+        Every chunk is fetched with its own keyset query (pk > last pk seen)
+        only after the previous one has been consumed, so objects whose status
+        changed meanwhile are neither skipped nor yielded twice, and only one
+        chunk is kept in memory.
+        """
+        ordered = self.order_by("pk")
+        last_pk = None
+        while True:
+            queryset = ordered if last_pk is None else ordered.filter(pk__gt=last_pk)
+            chunk = list(queryset[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1].pk
+
+
+class SyncStatusQuerySet(ChunkedQuerySet):
     def created(self) -> "SyncStatusQuerySet":
         return self.filter(status=SyncStatus.CREATED)
 
@@ -25,6 +85,250 @@ class SyncStatusQuerySet(models.QuerySet):
         self.update(status=SyncStatus.DELETED)
         return 0, {}
 
+    def update(self, **kwargs) -> int:
+        """
+        Updates the rows recording the change in the sync outbox.
+
+        Updates setting an expression or SYNCED as status (like the ones done
+        by `bulk_update` when acknowledging synced objects) are not recorded.
+        """
+        status = kwargs.get("status", SyncStatus.UPDATED)
+        if not isinstance(status, str) or status == SyncStatus.SYNCED:
+            return super().update(**kwargs)
+        fields = [
+            self.model._meta.get_field(name).attname  # noqa: SLF001
+            for name in kwargs
+            if name != "status"
+        ]
+        with transaction.atomic(using=self.db, savepoint=False):
+            object_ids = list(self.values_list("pk", flat=True))
+            rows = super().update(**kwargs)
+            get_outbox_queryset().record(
+                self.model, [(object_id, status) for object_id in object_ids], fields
+            )
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs) -> list[models.Model]:
+        objs = list(objs)
+        if all(obj.status == SyncStatus.SYNCED for obj in objs):
+            return super().bulk_create(objs, *args, **kwargs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            created = super().bulk_create(objs, *args, **kwargs)
+            get_outbox_queryset().record(
+                self.model,
+                [
+                    (obj.pk, obj.status)
+                    for obj in created
+                    if obj.status != SyncStatus.SYNCED
+                ],
+            )
+        return created
+
+
+def notify_sync_channel(using: str) -> None:
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, '')", [SYNC_CHANNEL])
+
+
+def notify_sync_channel_on_commit(using: str) -> None:
+    """
+    Notifies the SYNC_CHANNEL when the transaction is committed, once per
+    transaction however many changes are recorded in it.
+    """
+    connection = connections[using]
+    # Callbacks of rolled back savepoints are dropped from run_on_commit, so
+    # changes recorded after a rollback are still notified.
+    if any(
+        getattr(func, "func", None) is notify_sync_channel
+        for _, func, *_ in connection.run_on_commit
+    ):
+        return
+    transaction.on_commit(partial(notify_sync_channel, using), using=using)
+
+
+class SyncOutboxQuerySet(ChunkedQuerySet["SyncOutbox"]):
+    def for_model(self, model: type[models.Model]) -> "SyncOutboxQuerySet":
+        return self.filter(model=model._meta.label_lower)  # noqa: SLF001
+
+    def record(
+        self,
+        model: type[models.Model],
+        changes: Iterable[tuple[int, str]],
+        fields: Iterable[str] = (),
+    ) -> None:
+        """
+        Records `changes` as (object id, operation) pairs. `fields` are the
+        attnames of the fields changed by all of them, if known.
+
+        The SYNC_CHANNEL is notified when the transaction is committed.
+        """
+        label = model._meta.label_lower  # noqa: SLF001
+        fields = sorted(fields)
+        self.bulk_create(
+            self.model(
+                model=label, object_id=object_id, operation=operation, fields=fields
+            )
+            for object_id, operation in changes
+        )
+        # Wakes up `sync_remote_data --watch` once the changes are visible.
+        notify_sync_channel_on_commit(self.db)
+
+    def available(self) -> "SyncOutboxQuerySet":
+        """Entries not leased by any worker, or whose lease expired."""
+        return self.filter(
+            Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=timezone.now())
+        )
+
+    def claim(
+        self,
+        owner: str,
+        ttl: float,
+        limit: int,
+        model: type[models.Model] | None = None,
+    ) -> list["SyncOutbox"]:
+        """
+        Leases to `owner` for `ttl` seconds the pending entries of the objects
+        referenced by the first `limit` available entries, only of `model` if
+        given, and returns them.
+
+        Objects are leased as a whole: the ones with entries leased by other
+        workers, or locked by a concurrent claim (SELECT ... FOR UPDATE SKIP
+        LOCKED), are left out, so no object is pushed by two workers at once.
+        """
+        now = timezone.now()
+        leased_by_others = self.filter(
+            model=OuterRef("model"),
+            object_id=OuterRef("object_id"),
+            lease_expires_at__gt=now,
+        ).exclude(leased_by=owner)
+        available = self.available()
+        if model is not None:
+            available = available.for_model(model)
+        with transaction.atomic(using=self.db):
+            candidates = list(
+                available.exclude(Exists(leased_by_others))
+                .order_by("pk")
+                .select_for_update(skip_locked=True)
+                .values_list("model", "object_id")[:limit]
+            )
+            if not candidates:
+                return []
+            object_ids: dict[str, set[int]] = defaultdict(set)
+            for label, object_id in candidates:
+                object_ids[label].add(object_id)
+            history = self.filter(
+                reduce(
+                    operator.or_,
+                    (
+                        Q(model=label, object_id__in=ids)
+                        for label, ids in object_ids.items()
+                    ),
+                )
+            )
+            locked = set(
+                history.select_for_update(skip_locked=True).values_list("pk", flat=True)
+            )
+            entry_ids: dict[tuple[str, int], list[int]] = defaultdict(list)
+            blocked = set()
+            for pk, label, object_id, leased_by, expires_at in history.values_list(
+                "pk", "model", "object_id", "leased_by", "lease_expires_at"
+            ):
+                key = (label, object_id)
+                entry_ids[key].append(pk)
+                if pk not in locked or (
+                    expires_at is not None and expires_at > now and leased_by != owner
+                ):
+                    blocked.add(key)
+            claimed = [
+                pk for key, pks in entry_ids.items() if key not in blocked for pk in pks
+            ]
+            self.filter(pk__in=claimed).update(
+                leased_by=owner, lease_expires_at=now + timedelta(seconds=ttl)
+            )
+        return list(self.filter(pk__in=claimed).order_by("pk"))
+
+    def renew(self, owner: str, ttl: float) -> None:
+        self.filter(leased_by=owner).update(
+            lease_expires_at=timezone.now() + timedelta(seconds=ttl)
+        )
+
+    def release(self, owner: str) -> None:
+        self.filter(leased_by=owner).update(leased_by="", lease_expires_at=None)
+
+    def acknowledge(
+        self,
+        model: type[models.Model],
+        object_ids: Iterable[int],
+        up_to: int | None = None,
+    ) -> None:
+        """
+        Removes the entries of the given objects, optionally only the ones
+        with sequence number lower or equal than `up_to`, so changes recorded
+        after the objects were read stay pending.
+        """
+        queryset = self.for_model(model).filter(object_id__in=list(object_ids))
+        if up_to is not None:
+            queryset = queryset.filter(pk__lte=up_to)
+        queryset.delete()
+
+
+class SyncRunQuerySet(models.QuerySet["SyncRun"]):
+    def for_command(self, command: str) -> "SyncRunQuerySet":
+        return self.filter(command=command)
+
+    def record(self, command: str, report: "SyncBlogReport") -> "SyncRun":
+        """Stores the report of a finished run of `command`."""
+        data = report.to_dict()
+        for name in ("posts", "comments"):
+            data[name]["errors"] = data[name]["errors"][:MAX_STORED_RUN_ERRORS]
+        self.prune(command)
+        finished_at = timezone.now()
+        return self.create(
+            command=command,
+            outcome=(
+                SyncRunOutcome.SUCCESS if report.success else SyncRunOutcome.PARTIAL
+            ),
+            started_at=finished_at - timedelta(seconds=report.duration),
+            finished_at=finished_at,
+            duration=report.duration,
+            items_synced=report.num_items_synced,
+            num_errors=report.num_errors,
+            items_per_second=report.items_per_second,
+            report=data,
+        )
+
+    def record_failure(
+        self, command: str, error: str, duration: float = 0.0
+    ) -> "SyncRun":
+        """Stores a run of `command` aborted by `error`."""
+        self.prune(command)
+        finished_at = timezone.now()
+        return self.create(
+            command=command,
+            outcome=SyncRunOutcome.FAILED,
+            started_at=finished_at - timedelta(seconds=duration),
+            finished_at=finished_at,
+            duration=duration,
+            error=error,
+        )
+
+    def prune(self, command: str) -> int:
+        """
+        Deletes the runs of `command` started more than
+        BLOG_SYNC_RUN_HISTORY_DAYS days ago, if set. Returns how many.
+        """
+        if not settings.BLOG_SYNC_RUN_HISTORY_DAYS:
+            return 0
+        cutoff = timezone.now() - timedelta(days=settings.BLOG_SYNC_RUN_HISTORY_DAYS)
+        deleted, _ = self.filter(command=command, started_at__lt=cutoff).delete()
+        return deleted
+
+
+def get_outbox_queryset() -> SyncOutboxQuerySet:
+    return apps.get_model("blog", "SyncOutbox").objects.all()
+
 
 class SyncStatusManager(models.Manager):
     def _get_queryset(self) -> "SyncStatusQuerySet":
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.11 on 2026-10-17 00:13
+
+from django.db import migrations, models
+
+
+def backfill_outbox(apps, schema_editor):
+    """Records the objects already pending to be synced, in dependency order."""
+    SyncOutbox = apps.get_model("blog", "SyncOutbox")
+    Post = apps.get_model("blog", "Post")
+    Comment = apps.get_model("blog", "Comment")
+    steps = (
+        (Post, ("C", "U")),
+        (Comment, ("C", "U")),
+        (Comment, ("D",)),
+        (Post, ("D",)),
+    )
+    for model, statuses in steps:
+        label = f"blog.{model._meta.model_name}"
+        pending = model.objects.filter(status__in=statuses).order_by("pk")
+        SyncOutbox.objects.bulk_create(
+            (
+                SyncOutbox(model=label, object_id=pk, operation=status)
+                for pk, status in pending.values_list("pk", "status")
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0003_alter_comment_managers_alter_post_managers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=100)),
+                ("object_id", models.PositiveBigIntegerField()),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[
+                            ("S", "Synced"),
+                            ("C", "Created"),
+                            ("U", "Updated"),
+                            ("D", "Deleted"),
+                        ],
+                        max_length=1,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ("id",),
+                "indexes": [
+                    models.Index(
+                        fields=["model", "object_id"], name="syncoutbox_object_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_outbox, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0004_syncoutbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="syncoutbox",
+            name="fields",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
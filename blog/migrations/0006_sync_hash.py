@@ -0,0 +1,22 @@
+# Generated by Django 4.2.11 on 2026-10-17 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0005_syncoutbox_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="sync_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="sync_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
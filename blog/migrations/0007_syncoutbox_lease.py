@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-17 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_sync_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncoutbox',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='syncoutbox',
+            name='leased_by',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_syncoutbox_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(max_length=50)),
+                ('outcome', models.CharField(choices=[('success', 'Success'), ('partial', 'Partial'), ('failed', 'Failed')], max_length=10)),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+                ('duration', models.FloatField()),
+                ('items_synced', models.PositiveIntegerField(default=0)),
+                ('num_errors', models.PositiveIntegerField(default=0)),
+                ('items_per_second', models.FloatField(default=0.0)),
+                ('report', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'ordering': ('-started_at', '-id'),
+                'indexes': [models.Index(fields=['command', 'started_at'], name='syncrun_command_idx')],
+            },
+        ),
+    ]
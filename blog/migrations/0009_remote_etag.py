@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-17 01:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_syncrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='remote_etag',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='remote_etag',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -1,21 +1,94 @@
 from collections.abc import Iterable
+from typing import Any
+from typing import cast
 
 from django.db import models
 from django.db import transaction
 
 from blog.managers import DeletedManager
+from blog.managers import SyncOutboxQuerySet
+from blog.managers import SyncRunOutcome
+from blog.managers import SyncRunQuerySet
 from blog.managers import SyncStatus
 from blog.managers import SyncStatusManager
 
 DEFAULT_USER_ID = 99999942
 
+# Fields tracking the sync state, which aren't changes to sync themselves.
+SYNC_STATE_FIELDS = ("status", "sync_hash", "remote_etag")
+
 
 def set_status_to_synced(
     model: type["SyncStatusMixin"], objects: Iterable["SyncStatusMixin"]
 ) -> None:
     for obj in objects:
         obj.status = model.SyncStatus.SYNCED
-    model.objects.bulk_update(objects, ["status"])
+    model.objects.bulk_update(objects, SYNC_STATE_FIELDS)
+
+
+class SyncOutbox(models.Model):
+    """
+    Change log of the objects pending to be synced with the remote API.
+
+    Entries are written in the same transaction as the change they record and
+    their monotonically increasing id is the sequence number used to consume
+    them in order. They are removed once the object has been synced.
+    """
+
+    model = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    operation = models.CharField(max_length=1, choices=SyncStatus.choices)
+    # Attnames of the changed fields, empty when unknown (all fields).
+    fields = models.JSONField(default=list, blank=True)
+    # Worker currently pushing the entry and until when, see `claim`.
+    leased_by = models.CharField(max_length=100, blank=True, default="")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SyncOutboxQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("id",)
+        indexes = (
+            models.Index(fields=["model", "object_id"], name="syncoutbox_object_idx"),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.model}[pk={self.object_id}] {self.get_operation_display()}"
+
+
+class SyncRun(models.Model):
+    """
+    History of the runs of the commands syncing data with the remote API,
+    with the structured report of each of them.
+    """
+
+    Outcome = SyncRunOutcome
+
+    command = models.CharField(max_length=50)
+    outcome = models.CharField(max_length=10, choices=SyncRunOutcome.choices)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    # Seconds the run took.
+    duration = models.FloatField()
+    items_synced = models.PositiveIntegerField(default=0)
+    num_errors = models.PositiveIntegerField(default=0)
+    items_per_second = models.FloatField(default=0.0)
+    # SyncBlogReport of the run as returned by `to_dict`, empty if it failed.
+    report = models.JSONField(default=dict, blank=True)
+    # Error that aborted the run.
+    error = models.TextField(blank=True, default="")
+
+    objects = SyncRunQuerySet.as_manager()
+
+    class Meta:
+        ordering = ("-started_at", "-id")
+        indexes = (
+            models.Index(fields=["command", "started_at"], name="syncrun_command_idx"),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.command} at {self.started_at:%Y-%m-%d %H:%M:%S} ({self.outcome})"
 
 
 class SyncStatusMixin(models.Model):
@@ -26,11 +99,22 @@ class SyncStatusMixin(models.Model):
         choices=SyncStatus.choices,
         default=SyncStatus.CREATED,
     )
+    # Hash of the payload last synced with the remote API.
+    sync_hash = models.CharField(max_length=64, blank=True, default="")
+    # ETag the remote API returned for the object when it was last synced,
+    # sent as If-Match so concurrent remote changes aren't overwritten.
+    remote_etag = models.CharField(max_length=255, blank=True, default="")
 
     objects: SyncStatusManager = SyncStatusManager()
     deleted: DeletedManager = DeletedManager()
     all_objects = models.Manager()
 
+    # Field values as last loaded from or saved to the database.
+    _loaded_values: dict[str, Any] | None = None
+    # Attnames of the fields changed since the last sync, set by the sync
+    # planner from the outbox. None means all the fields have to be sent.
+    unsynced_fields: frozenset[str] | None = None
+
     class Meta:
         abstract = True
         indexes = (models.Index(fields=["status"], name="%(class)s_sync_status_idx"),)
@@ -51,27 +135,98 @@ class SyncStatusMixin(models.Model):
         self.status is set to CREATED if pk is None
         sel.status is set to UPDATED if pk is not None and current self.status
         is not DELETED.
+
+        When `update_fields` is not provided for an object loaded from the
+        database only the fields changed since then are written. If none
+        changed only the status is, and no update is recorded.
+
+        Unless the resulting status is SYNCED the change is recorded in the
+        SyncOutbox within the same transaction.
         """
         status_in_update_fields = update_fields and "status" in update_fields
-        if update_fields and "status" not in update_fields:
+        unchanged = False
+        if (
+            update_fields is None
+            and not force_insert
+            and not self._state.adding
+            and self._loaded_values is not None
+            and not self.get_deferred_fields()
+        ):
+            dirty_fields = self.get_dirty_fields()
+            unchanged = not dirty_fields
+            update_fields = (*dirty_fields, "status")
+        elif update_fields and "status" not in update_fields:
             update_fields = (*update_fields, "status")
 
         if self.pk is None:
             self.status = SyncStatus.CREATED
         elif not status_in_update_fields and self.status != SyncStatus.DELETED:
             self.status = SyncStatus.UPDATED
-        super().save(
-            using=using,
-            force_insert=force_insert,
-            force_update=force_update,
-            update_fields=update_fields,
-        )
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(
+                using=using,
+                force_insert=force_insert,
+                force_update=force_update,
+                update_fields=update_fields,
+            )
+            # An empty list of fields would mean that all of them changed.
+            if self.status != SyncStatus.SYNCED and not (
+                unchanged and self.status == SyncStatus.UPDATED
+            ):
+                fields = [
+                    cast(models.Field, self._meta.get_field(name)).attname
+                    for name in update_fields or ()
+                    if name != "status"
+                ]
+                SyncOutbox.objects.using(using).record(
+                    type(self), [(cast(int, self.pk), self.status)], fields
+                )
+        self._snapshot_values()
 
     def delete(self, using=None, keep_parents=False):  # noqa: FBT002
         self.status = SyncStatus.DELETED
         self.save(update_fields=("status",))
         return 0, {}
 
+    @classmethod
+    def from_db(cls, db, field_names, values) -> "SyncStatusMixin":
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values, strict=True))  # noqa: SLF001
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None) -> None:
+        super().refresh_from_db(using=using, fields=fields)
+        # The reloaded values are the ones in the database now.
+        if fields is None:
+            self._snapshot_values()
+        elif self._loaded_values is not None:
+            for name in fields:
+                attname = cast(models.Field, self._meta.get_field(name)).attname
+                self._loaded_values[attname] = getattr(self, attname)
+
+    def get_dirty_fields(self) -> list[str]:
+        """
+        Returns the attnames of the fields changed since the object was loaded
+        from or saved to the database.
+        """
+        if self._loaded_values is None:
+            return []
+        return [
+            attname
+            for attname, value in self._loaded_values.items()
+            if attname not in SYNC_STATE_FIELDS
+            and attname != cast(models.Field, self._meta.pk).attname
+            and getattr(self, attname) != value
+        ]
+
+    def _snapshot_values(self) -> None:
+        if not self.get_deferred_fields():
+            self._loaded_values = {
+                field.attname: getattr(self, field.attname)
+                for field in self._meta.fields
+                if field.concrete
+            }
+
     @property
     def is_deleted(self) -> bool:
         return self.status == SyncStatus.DELETED
@@ -81,8 +236,10 @@ class SyncStatusMixin(models.Model):
         return self.status == SyncStatus.SYNCED
 
     def sync(self) -> None:
-        self.status = SyncStatus.SYNCED
-        self.save(update_fields=("status",))
+        with transaction.atomic():
+            self.status = SyncStatus.SYNCED
+            self.save(update_fields=("status",))
+            SyncOutbox.objects.acknowledge(type(self), [self.pk])
 
 
 class Post(SyncStatusMixin):
@@ -0,0 +1,23 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from blog import json_backend
+from blog.renderers import FastJSONRenderer
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser decoding UTF-8 request bodies with the fast JSON backend."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if encoding.lower().replace("_", "-") not in {"utf-8", "utf8"}:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return json_backend.loads(stream.read())
+        except ValueError as exc:
+            error_msg = f"JSON parse error - {exc}"
+            raise ParseError(error_msg) from exc
@@ -0,0 +1,101 @@
+import operator
+from collections.abc import Callable
+from collections.abc import Iterable
+from typing import Any
+from typing import cast
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.serializers import BaseSerializer
+
+# (field name, attribute getter, representation function, model attname)
+CompiledField = tuple[str, Callable[[Any], Any], Callable[[Any], Any], str]
+
+
+class PayloadMapping:
+    """
+    Maps objects to the payloads `serializer_class` renders for them, from a
+    field mapping compiled once, instead of instantiating a serializer (and
+    its fields) for every object.
+
+    Only serializers made of plain fields read from model attributes can be
+    compiled; the rest, and objects whose attributes can't be read, are
+    serialized by `serializer_class` itself, so payloads are always the same.
+    """
+
+    def __init__(self, serializer_class: type[BaseSerializer[models.Model]]) -> None:
+        self.serializer_class = serializer_class
+        self.fields = self.compile(serializer_class)
+
+    @staticmethod
+    def compile(
+        serializer_class: type[BaseSerializer[models.Model]],
+    ) -> list[CompiledField] | None:
+        if (
+            not issubclass(serializer_class, serializers.Serializer)
+            or serializer_class.to_representation
+            is not serializers.Serializer.to_representation
+        ):
+            return None
+        compiled: list[CompiledField] = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if (
+                type(field).get_attribute is not serializers.Field.get_attribute
+                or not isinstance(field.source, str)
+                or field.source == "*"
+            ):
+                return None
+            compiled.append(
+                (
+                    name,
+                    operator.attrgetter(field.source),
+                    field.to_representation,
+                    field.source,
+                )
+            )
+        return compiled
+
+    def serialize(self, obj: models.Model, fields: Iterable[str] | None = None) -> dict:
+        """
+        Returns the payload of `obj`, limited to the serializer fields sourced
+        from the `fields` attnames if given.
+        """
+        if fields is not None:
+            fields = set(fields)
+        if self.fields is None:
+            return self._serialize_with_serializer(obj, fields)
+        payload = {}
+        try:
+            for name, get_attribute, to_representation, source in self.fields:
+                if fields is not None and source not in fields:
+                    continue
+                value = get_attribute(obj)
+                payload[name] = None if value is None else to_representation(value)
+        except (AttributeError, ObjectDoesNotExist):
+            return self._serialize_with_serializer(obj, fields)
+        return payload
+
+    def _serialize_with_serializer(
+        self, obj: models.Model, fields: set[str] | None
+    ) -> dict:
+        serializer = cast(serializers.Serializer, self.serializer_class(obj))
+        return {
+            name: value
+            for name, value in serializer.data.items()
+            if fields is None or serializer.fields[name].source in fields
+        }
+
+
+# PayloadMapping of every serializer class, compiled on first use.
+_payload_mappings: dict[type[BaseSerializer[models.Model]], PayloadMapping] = {}
+
+
+def get_payload_mapping(
+    serializer_class: type[BaseSerializer[models.Model]],
+) -> PayloadMapping:
+    if serializer_class not in _payload_mappings:
+        _payload_mappings[serializer_class] = PayloadMapping(serializer_class)
+    return _payload_mappings[serializer_class]
@@ -1,69 +1,642 @@
+import asyncio
+import functools
+import hashlib
+import json
+import time
+from collections.abc import Callable
 from collections.abc import Iterable
+from concurrent.futures import Executor
+from typing import Any
+from typing import NamedTuple
+from typing import Protocol
+from typing import cast
 
 import httpx
 from django.db import models
 from rest_framework.serializers import BaseSerializer
 
+from blog import json_backend
+from blog.http_clients import RequestCompression
+from blog.payloads import get_payload_mapping
+from blog.remote_resilience import AdaptiveConcurrencyLimit
+from blog.remote_resilience import CircuitBreaker
+from blog.remote_resilience import RetryPolicy
+from blog.remote_resilience import TokenBucket
+from blog.remote_resilience import is_remote_failure
+from blog.sync_reports import RequestStats
+from blog.sync_reports import WorkerStats
+
+SyncOutcome = tuple[list[models.Model], list[tuple[models.Model, Exception]]]
+
+
+def payload_hash(data: dict) -> str:
+    """Returns a stable hash of a JSON payload."""
+    content = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
 
 class RemoteAPIError(Exception):
     pass
 
 
-class JSONAPIClient:
+class RemoteItemError(RemoteAPIError):
+    def __init__(self, status: int, error: str) -> None:
+        super().__init__(f"Remote error {status}: {error}")
+        self.status = status
+        self.error = error
+
+
+class RemoteBatchError(RemoteAPIError):
+    pass
+
+
+class CircuitOpenError(RemoteAPIError):
+    pass
+
+
+class RemoteConflictError(RemoteAPIError):
+    """The remote object changed since it was last synced (412)."""
+
+
+def strong_etag(etag: str) -> str:
+    """Returns `etag` if it's strong: weak ETags never match an If-Match."""
+    return "" if etag.startswith("W/") else etag
+
+
+class RemoteWriteResult(NamedTuple):
+    data: Any
+    # Strong ETag of the written object, empty if the remote didn't send one.
+    etag: str
+
+
+class BatchItemResult(NamedTuple):
+    status: int
+    data: dict | None
+    error: str | None
+    # Strong ETag of the written object, empty if the remote didn't send one.
+    etag: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300  # noqa: PLR2004
+
+    @property
+    def conflict(self) -> bool:
+        return self.status == httpx.codes.PRECONDITION_FAILED
+
+
+class BaseJSONAPIClient:
+    """
+    JSON client of a remote collection.
+
+    `batch_urls` maps "create", "update" and "delete" to optional bulk
+    endpoints. They receive a JSON array (payloads for create and update, pks
+    for delete) and must answer with an array holding one
+    `{"status": ..., "data": ..., "error": ..., "etag": ...}` result per item,
+    in order. Only "status" is required.
+
+    With `partial_updates` the remote accepts PATCH requests updating only
+    the fields they include.
+
+    Failed requests are retried according to `retry_policy`, and the
+    `circuit_breaker` of the endpoint rejects requests while it's open.
+    Retries and rejections are counted in `stats`.
+
+    Requests are paced by the `rate_limiter` token bucket and their number in
+    flight is bounded by the `concurrency_limit` AIMD controller. Both can be
+    shared by the clients of a same remote.
+
+    JSON bodies are compressed according to `compression`, and compressed
+    responses are negotiated by httpx. The bytes sent and received, before
+    and after compression, are counted in `stats`.
+    """
+
     CONTENT_TYPE_JSON = {"Content-type": "application/json; charset=UTF-8"}
 
-    def __init__(
-        self, client: httpx.Client, base_url: str, headers: dict[str, str] | None = None
+    def __init__(  # noqa: PLR0913
+        self,
+        base_url: str,
+        headers: dict[str, str] | None = None,
+        batch_urls: dict[str, str] | None = None,
+        *,
+        partial_updates: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        stats: RequestStats | None = None,
+        rate_limiter: TokenBucket | None = None,
+        concurrency_limit: AdaptiveConcurrencyLimit | None = None,
+        compression: RequestCompression | None = None,
     ) -> None:
         self.base_url = base_url
-        self.client = client
         self.headers = headers or {}
         self.headers.update(self.CONTENT_TYPE_JSON)
+        self.batch_urls = batch_urls or {}
+        self.partial_updates = partial_updates
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.stats = stats or RequestStats()
+        self.rate_limiter = rate_limiter
+        self.concurrency_limit = concurrency_limit
+        self.compression = compression
 
     def get_detail_url(self, pk: int) -> str:
         return f"{self.base_url.rstrip('/')}/{pk}"
 
-    def retrieve(self, pk: int) -> dict:
-        url = self.get_detail_url(pk)
-        response = self.client.get(url, headers=self.headers)
+    def supports_batch(self, method: str) -> bool:
+        return bool(self.batch_urls.get(method))
+
+    def check_circuit(self, url: str) -> None:
+        if (
+            self.circuit_breaker is not None
+            and not self.circuit_breaker.allow_request()
+        ):
+            error_msg = f"Circuit open, request to {url!r} not sent"
+            raise CircuitOpenError(error_msg)
+
+    def get_rate_limit_delay(self) -> float:
+        if self.rate_limiter is None:
+            return 0.0
+        delay = self.rate_limiter.reserve()
+        if delay:
+            self.stats.add("throttled")
+        return delay
+
+    def record_latency(
+        self,
+        method: str,
+        start: float,
+        response: httpx.Response | None,
+        exc: Exception | None,
+    ) -> None:
+        """
+        Observes the latency of a request attempt and releases its slot of
+        the concurrency limit.
+        """
+        latency = time.perf_counter() - start
+        self.stats.observe_latency(method, latency)
+        if self.concurrency_limit is not None:
+            self.concurrency_limit.release(latency, is_remote_failure(response, exc))
+
+    def get_retry_delay(
+        self,
+        method: str,
+        attempt: int,
+        response: httpx.Response | None,
+        exc: Exception | None,
+    ) -> float | None:
+        """
+        Records the outcome of a request in the circuit breaker and returns
+        the seconds to wait before retrying it, or None if it's final.
+        """
+        if self.circuit_breaker is not None:
+            if is_remote_failure(response, exc):
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+        if self.retry_policy is None or not self.retry_policy.should_retry(
+            method, attempt, response, exc
+        ):
+            return None
+        self.stats.add("retries")
+        return self.retry_policy.get_delay(attempt, response)
+
+    def encode_request(self, kwargs: dict[str, Any]) -> dict[str, Any]:
+        """
+        Returns the arguments of the request with its JSON payload encoded,
+        and compressed if it's large enough.
+        """
+        headers = dict(self.headers)
+        kwargs = dict(kwargs)
+        headers.update(kwargs.pop("headers", None) or {})
+        if "json" in kwargs:
+            content = json_backend.dumps(kwargs.pop("json"))
+            self.stats.add("bytes_sent_uncompressed", len(content))
+            if self.compression is not None:
+                content, encoding = self.compression.compress(content)
+                if encoding is not None:
+                    headers["Content-Encoding"] = encoding
+            self.stats.add("bytes_sent", len(content))
+            kwargs["content"] = content
+        return {"headers": headers, **kwargs}
+
+    def record_response_size(self, response: httpx.Response | None) -> None:
+        if response is not None:
+            self.stats.add("bytes_received", response.num_bytes_downloaded)
+            self.stats.add("bytes_received_uncompressed", len(response.content))
+
+    @staticmethod
+    def decode(response: httpx.Response) -> Any:
+        return json_backend.loads(response.content)
+
+    @staticmethod
+    def write_kwargs(data: Any, etag: str) -> dict[str, Any]:
+        """
+        Returns the arguments of a write request, conditional on the remote
+        object still having `etag` if given.
+        """
+        kwargs: dict[str, Any] = {}
+        if data is not None:
+            kwargs["json"] = data
+        if etag:
+            kwargs["headers"] = {"If-Match": etag}
+        return kwargs
+
+    def write_result(self, response: httpx.Response) -> RemoteWriteResult:
+        data = self.decode(response) if response.content else None
+        return RemoteWriteResult(data, strong_etag(response.headers.get("ETag", "")))
+
+    @staticmethod
+    def conflict_error(url: str) -> RemoteConflictError:
+        return RemoteConflictError(
+            f"Conflict writing {url}: the remote object changed since last sync"
+        )
+
+    @staticmethod
+    def get_response(
+        response: httpx.Response | None, exc: Exception | None
+    ) -> httpx.Response:
+        # Requests either got a response or raised `exc`.
+        if response is None:
+            raise cast(Exception, exc)
         response.raise_for_status()
-        return response.json()
+        return response
+
+    @staticmethod
+    def parse_batch_response(data: Any, num_items: int) -> list[BatchItemResult]:
+        if not isinstance(data, list) or len(data) != num_items:
+            error_msg = f"Expected a list of {num_items} results, got {data!r}"
+            raise RemoteBatchError(error_msg)
+        results = []
+        for item in data:
+            if not isinstance(item, dict) or not isinstance(item.get("status"), int):
+                error_msg = f"Invalid batch item result: {item!r}"
+                raise RemoteBatchError(error_msg)
+            results.append(
+                BatchItemResult(
+                    item["status"],
+                    item.get("data"),
+                    item.get("error"),
+                    strong_etag(item.get("etag") or ""),
+                )
+            )
+        return results
+
+
+class JSONAPIClient(BaseJSONAPIClient):
+    def __init__(  # noqa: PLR0913
+        self,
+        client: httpx.Client,
+        base_url: str,
+        headers: dict[str, str] | None = None,
+        batch_urls: dict[str, str] | None = None,
+        *,
+        partial_updates: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        stats: RequestStats | None = None,
+        rate_limiter: TokenBucket | None = None,
+        concurrency_limit: AdaptiveConcurrencyLimit | None = None,
+        compression: RequestCompression | None = None,
+    ) -> None:
+        super().__init__(
+            base_url,
+            headers,
+            batch_urls,
+            partial_updates=partial_updates,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            stats=stats,
+            rate_limiter=rate_limiter,
+            concurrency_limit=concurrency_limit,
+            compression=compression,
+        )
+        self.client = client
+
+    def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        kwargs = self.encode_request(kwargs)
+        attempt = 0
+        while True:
+            self.check_circuit(url)
+            if rate_limit_delay := self.get_rate_limit_delay():
+                time.sleep(rate_limit_delay)
+            if self.concurrency_limit is not None:
+                self.concurrency_limit.acquire()
+            response, exc = None, None
+            start = time.perf_counter()
+            try:
+                response = self.client.request(method, url, **kwargs)
+            except httpx.TransportError as error:
+                exc = error
+            finally:
+                self.record_latency(method, start, response, exc)
+            self.record_response_size(response)
+            delay = self.get_retry_delay(method, attempt, response, exc)
+            if delay is None:
+                return self.get_response(response, exc)
+            time.sleep(delay)
+            attempt += 1
+
+    def retrieve(self, pk: int) -> dict:
+        return self.decode(self.request("GET", self.get_detail_url(pk)))
 
     def retrieve_list(self) -> list[dict]:
-        response = self.client.get(self.base_url, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return self.decode(self.request("GET", self.base_url))
 
-    def update(self, pk: int, data: dict) -> dict:
-        url = self.get_detail_url(pk)
-        response = self.client.put(url, json=data, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+    def write(
+        self, method: str, url: str, data: Any = None, etag: str = ""
+    ) -> RemoteWriteResult:
+        """
+        Sends a write request, with an If-Match precondition if `etag` is
+        given. Raises RemoteConflictError if it doesn't hold.
+        """
+        try:
+            response = self.request(method, url, **self.write_kwargs(data, etag))
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == httpx.codes.PRECONDITION_FAILED:
+                raise self.conflict_error(url) from exc
+            raise
+        return self.write_result(response)
+
+    def update(self, pk: int, data: dict, etag: str = "") -> dict:
+        return self.write("PUT", self.get_detail_url(pk), data, etag).data
+
+    def partial_update(self, pk: int, data: dict, etag: str = "") -> dict:
+        return self.write("PATCH", self.get_detail_url(pk), data, etag).data
 
     def create(self, data: dict) -> dict:
-        response = self.client.post(self.base_url, json=data, headers=self.headers)
-        response.raise_for_status()
-        return response.json()
+        return self.write("POST", self.base_url, data).data
 
-    def delete(self, pk: int) -> None:
-        url = self.get_detail_url(pk)
-        response = self.client.delete(url, headers=self.headers)
-        response.raise_for_status()
+    def delete(self, pk: int, etag: str = "") -> None:
+        self.write("DELETE", self.get_detail_url(pk), etag=etag)
+
+    def batch(self, method: str, items: list) -> list[BatchItemResult]:
+        response = self.request("POST", self.batch_urls[method], json=items)
+        return self.parse_batch_response(self.decode(response), len(items))
+
+
+class AsyncJSONAPIClient(BaseJSONAPIClient):
+    def __init__(  # noqa: PLR0913
+        self,
+        client: httpx.AsyncClient,
+        base_url: str,
+        headers: dict[str, str] | None = None,
+        batch_urls: dict[str, str] | None = None,
+        *,
+        partial_updates: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        stats: RequestStats | None = None,
+        rate_limiter: TokenBucket | None = None,
+        concurrency_limit: AdaptiveConcurrencyLimit | None = None,
+        compression: RequestCompression | None = None,
+    ) -> None:
+        super().__init__(
+            base_url,
+            headers,
+            batch_urls,
+            partial_updates=partial_updates,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            stats=stats,
+            rate_limiter=rate_limiter,
+            concurrency_limit=concurrency_limit,
+            compression=compression,
+        )
+        self.client = client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        kwargs = self.encode_request(kwargs)
+        attempt = 0
+        while True:
+            self.check_circuit(url)
+            if rate_limit_delay := self.get_rate_limit_delay():
+                await asyncio.sleep(rate_limit_delay)
+            if self.concurrency_limit is not None:
+                await self.concurrency_limit.acquire_async()
+            response, exc = None, None
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as error:
+                exc = error
+            finally:
+                self.record_latency(method, start, response, exc)
+            self.record_response_size(response)
+            delay = self.get_retry_delay(method, attempt, response, exc)
+            if delay is None:
+                return self.get_response(response, exc)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def retrieve(self, pk: int) -> dict:
+        return self.decode(await self.request("GET", self.get_detail_url(pk)))
+
+    async def retrieve_list(self) -> list[dict]:
+        return self.decode(await self.request("GET", self.base_url))
+
+    async def write(
+        self, method: str, url: str, data: Any = None, etag: str = ""
+    ) -> RemoteWriteResult:
+        try:
+            response = await self.request(method, url, **self.write_kwargs(data, etag))
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == httpx.codes.PRECONDITION_FAILED:
+                raise self.conflict_error(url) from exc
+            raise
+        return self.write_result(response)
+
+    async def update(self, pk: int, data: dict, etag: str = "") -> dict:
+        return (await self.write("PUT", self.get_detail_url(pk), data, etag)).data
+
+    async def partial_update(self, pk: int, data: dict, etag: str = "") -> dict:
+        return (await self.write("PATCH", self.get_detail_url(pk), data, etag)).data
+
+    async def create(self, data: dict) -> dict:
+        return (await self.write("POST", self.base_url, data)).data
+
+    async def delete(self, pk: int, etag: str = "") -> None:
+        await self.write("DELETE", self.get_detail_url(pk), etag=etag)
+
+    async def batch(self, method: str, items: list) -> list[BatchItemResult]:
+        response = await self.request("POST", self.batch_urls[method], json=items)
+        return self.parse_batch_response(self.decode(response), len(items))
+
+
+class ModelSyncAPI(Protocol):
+    def is_unchanged(self, obj: models.Model) -> bool: ...
+
+    def sync_created(self, objects: Iterable[models.Model]) -> SyncOutcome: ...
+
+    def sync_updated(self, objects: Iterable[models.Model]) -> SyncOutcome: ...
+
+    def sync_deleted(self, objects: Iterable[models.Model]) -> SyncOutcome: ...
 
 
-class RemoteModelAPI:
+class BaseRemoteModelAPI:
+    SYNC_METHODS = ("create", "update", "delete")
+
+    client: BaseJSONAPIClient
+
     def __init__(
         self,
-        client: JSONAPIClient,
         model_name: str,
         serializer: type[BaseSerializer[models.Model]],
+        batch_size: int = 1,
     ) -> None:
-        self.client = client
         self.model_name = model_name
         self.serializer = serializer
+        self.payloads = get_payload_mapping(serializer)
+        self.batch_size = batch_size
 
     def serialize_object(self, obj: models.Model) -> dict:
-        return self.serializer(obj).data
+        return self.payloads.serialize(obj)
+
+    def serialize_changes(self, obj: models.Model, fields: Iterable[str]) -> dict:
+        """Serializes only the serializer fields sourced from `fields`."""
+        return self.payloads.serialize(obj, fields)
+
+    def is_unchanged(self, obj: models.Model) -> bool:
+        """
+        Tells if the payload of `obj` is the one last synced, so updating it
+        in the remote can be skipped.
+        """
+        sync_hash = getattr(obj, "sync_hash", "")
+        return bool(sync_hash) and sync_hash == payload_hash(self.serialize_object(obj))
+
+    def set_sync_hashes(self, method: str, outcome: SyncOutcome) -> SyncOutcome:
+        """Stores the hash of the payloads just created or updated."""
+        if method != "delete":
+            for obj in outcome[0]:
+                if hasattr(obj, "sync_hash"):
+                    obj.sync_hash = payload_hash(self.serialize_object(obj))
+        return outcome
+
+    def uses_partial_update(self, obj: models.Model) -> bool:
+        return (
+            self.client.partial_updates
+            and getattr(obj, "unsynced_fields", None) is not None
+        )
+
+    def invalid_method_error(self, method: str) -> RemoteAPIError:
+        error_msg = (
+            f"Error syncronazing {self.model_name}: "
+            f"{method} is not a valid method name"
+        )
+        return RemoteAPIError(error_msg)
+
+    def uses_batches(self, method: str) -> bool:
+        return self.batch_size > 1 and self.client.supports_batch(method)
+
+    def make_units(
+        self, method: str, objects: Iterable[models.Model]
+    ) -> list[list[models.Model]]:
+        """
+        Splits objects into the units sent in a single request: batches of
+        `batch_size` objects when the remote has a bulk endpoint for `method`,
+        single objects otherwise.
+        """
+        objects = list(objects)
+        size = self.batch_size if self.uses_batches(method) else 1
+        return [objects[i : i + size] for i in range(0, len(objects), size)]
+
+    def batch_payload(self, method: str, batch: list[models.Model]) -> list:
+        if method == "delete":
+            return [obj.pk for obj in batch]
+        return [self.serialize_object(obj) for obj in batch]
+
+    def plan_requests(
+        self, method: str, objects: Iterable[models.Model]
+    ) -> list[tuple[str, Any]]:
+        """
+        Returns the HTTP method and the payload (None if there's no body) of
+        every request syncing `objects` would send, without sending them.
+        """
+        requests: list[tuple[str, Any]] = []
+        for unit in self.make_units(method, objects):
+            if self.uses_batches(method):
+                requests.append(("POST", self.batch_payload(method, unit)))
+                continue
+            (obj,) = unit
+            http_method, _, data = self.object_request(method, obj)
+            requests.append((http_method, data))
+        return requests
+
+    def object_request(self, method: str, obj: models.Model) -> tuple[str, str, Any]:
+        """
+        Returns the HTTP method, URL and payload (None if there's no body) of
+        the request syncing a single object.
+        """
+        match method:
+            case "delete":
+                return "DELETE", self.client.get_detail_url(obj.pk), None
+            case "create":
+                return "POST", self.client.base_url, self.serialize_object(obj)
+            case "update" if self.uses_partial_update(obj):
+                data = self.serialize_changes(obj, getattr(obj, "unsynced_fields", ()))
+                return "PATCH", self.client.get_detail_url(obj.pk), data
+            case "update":
+                data = self.serialize_object(obj)
+                return "PUT", self.client.get_detail_url(obj.pk), data
+            case _:
+                raise self.invalid_method_error(method)
+
+    @staticmethod
+    def get_etag(method: str, obj: models.Model) -> str:
+        """
+        Returns the ETag the remote object must still have for the request to
+        be applied: the one stored when it was last synced, if any.
+        """
+        if method == "create":
+            return ""
+        return getattr(obj, "remote_etag", "")
+
+    @staticmethod
+    def set_etag(obj: models.Model, etag: str) -> None:
+        """
+        Stores the ETag sent by the remote after a write, or clears the
+        stored one if it sent none, as it no longer matches.
+        """
+        if hasattr(obj, "remote_etag"):
+            obj.remote_etag = etag
+
+    @classmethod
+    def batch_outcome(
+        cls, batch: list[models.Model], results: list[BatchItemResult]
+    ) -> SyncOutcome:
+        errors: list[tuple[models.Model, Exception]] = []
+        synced_models: list[models.Model] = []
+        for obj, result in zip(batch, results, strict=True):
+            if result.ok:
+                cls.set_etag(obj, result.etag)
+                synced_models.append(obj)
+            elif result.conflict:
+                errors.append((obj, RemoteConflictError(result.error)))
+            else:
+                errors.append((obj, RemoteItemError(result.status, result.error or "")))
+        return synced_models, errors
+
+    @staticmethod
+    def merge_outcomes(outcomes: Iterable[SyncOutcome]) -> SyncOutcome:
+        errors: list[tuple[models.Model, Exception]] = []
+        synced_models: list[models.Model] = []
+        for unit_synced, unit_errors in outcomes:
+            synced_models.extend(unit_synced)
+            errors.extend(unit_errors)
+        return synced_models, errors
+
+
+class RemoteModelAPI(BaseRemoteModelAPI):
+    client: JSONAPIClient
+
+    def __init__(
+        self,
+        client: JSONAPIClient,
+        model_name: str,
+        serializer: type[BaseSerializer[models.Model]],
+        batch_size: int = 1,
+    ) -> None:
+        super().__init__(model_name, serializer, batch_size)
+        self.client = client
 
     def get_initial_data(self) -> list[models.Model]:
         instances: list[models.Model] = []
@@ -80,44 +653,172 @@ class RemoteModelAPI:
             raise RemoteAPIError(error_msg) from exc
         return instances
 
-    def sync_created(
-        self, objects: Iterable[models.Model]
-    ) -> tuple[list[models.Model], list[tuple[models.Model, Exception]]]:
+    def sync_created(self, objects: Iterable[models.Model]) -> SyncOutcome:
         return self._sync("create", objects)
 
-    def sync_updated(
-        self, objects: Iterable[models.Model]
-    ) -> tuple[list[models.Model], list[tuple[models.Model, Exception]]]:
+    def sync_updated(self, objects: Iterable[models.Model]) -> SyncOutcome:
         return self._sync("update", objects)
 
-    def sync_deleted(
-        self, objects: Iterable[models.Model]
-    ) -> tuple[list[models.Model], list[tuple[models.Model, Exception]]]:
+    def sync_deleted(self, objects: Iterable[models.Model]) -> SyncOutcome:
         return self._sync("delete", objects)
 
-    def _sync(
-        self, method: str, objects: Iterable[models.Model]
-    ) -> tuple[list[models.Model], list[tuple[models.Model, Exception]]]:
-        errors: list[tuple[models.Model, Exception]] = []
-        synced_models: list[models.Model] = []
-        for obj in objects:
+    def _sync(self, method: str, objects: Iterable[models.Model]) -> SyncOutcome:
+        if method not in self.SYNC_METHODS:
+            raise self.invalid_method_error(method)
+        units = self.make_units(method, objects)
+        outcome = self.merge_outcomes(
+            self._map_units(functools.partial(self._sync_unit, method), units)
+        )
+        return self.set_sync_hashes(method, outcome)
+
+    def _map_units(
+        self,
+        sync_unit: Callable[[list[models.Model]], SyncOutcome],
+        units: list[list[models.Model]],
+    ) -> Iterable[SyncOutcome]:
+        return map(sync_unit, units)
+
+    def _sync_unit(self, method: str, unit: list[models.Model]) -> SyncOutcome:
+        if self.uses_batches(method):
             try:
-                match method:
-                    case "delete":
-                        self.client.delete(obj.pk)
-                    case "create":
-                        data = self.serialize_object(obj)
-                        self.client.create(data)
-                    case "update":
-                        data = self.serialize_object(obj)
-                        self.client.update(obj.pk, data)
-                    case _:
-                        error_msg = (
-                            f"Error syncronazing {self.model_name}: "
-                            f"{method} is not a valid method name"
-                        )
-                        raise RemoteAPIError(error_msg)
-                synced_models.append(obj)
-            except httpx.HTTPError as exc:
-                errors.append((obj, exc))
-        return synced_models, errors
+                results = self.client.batch(method, self.batch_payload(method, unit))
+            except (httpx.HTTPError, RemoteAPIError) as exc:
+                return [], [(obj, exc) for obj in unit]
+            return self.batch_outcome(unit, results)
+        (obj,) = unit
+        try:
+            self._sync_object(method, obj)
+        except (httpx.HTTPError, CircuitOpenError, RemoteConflictError) as exc:
+            return [], [(obj, exc)]
+        return [obj], []
+
+    def _sync_object(self, method: str, obj: models.Model) -> None:
+        http_method, url, data = self.object_request(method, obj)
+        result = self.client.write(http_method, url, data, self.get_etag(method, obj))
+        self.set_etag(obj, result.etag)
+
+
+class ThreadedRemoteModelAPI(RemoteModelAPI):
+    """
+    Spreads the remote calls of each sync operation across a thread pool.
+
+    The JSONAPIClient (and its httpx.Client connection pool) is shared by all
+    the workers. When `stats` is provided every worker records the objects it
+    processed and the time it spent on them.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: JSONAPIClient,
+        model_name: str,
+        serializer: type[BaseSerializer[models.Model]],
+        executor: Executor,
+        stats: WorkerStats | None = None,
+        batch_size: int = 1,
+    ) -> None:
+        super().__init__(client, model_name, serializer, batch_size)
+        self.executor = executor
+        self.stats = stats
+
+    def _map_units(
+        self,
+        sync_unit: Callable[[list[models.Model]], SyncOutcome],
+        units: list[list[models.Model]],
+    ) -> Iterable[SyncOutcome]:
+        def timed_sync_unit(unit: list[models.Model]) -> SyncOutcome:
+            start = time.perf_counter()
+            try:
+                return sync_unit(unit)
+            finally:
+                if self.stats is not None:
+                    self.stats.record(time.perf_counter() - start, len(unit))
+
+        return list(self.executor.map(timed_sync_unit, units))
+
+
+class AsyncRemoteModelAPI(BaseRemoteModelAPI):
+    DEFAULT_CONCURRENCY = 10
+
+    client: AsyncJSONAPIClient
+
+    def __init__(  # noqa: PLR0913
+        self,
+        client: AsyncJSONAPIClient,
+        model_name: str,
+        serializer: type[BaseSerializer[models.Model]],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        batch_size: int = 1,
+    ) -> None:
+        super().__init__(model_name, serializer, batch_size)
+        self.client = client
+        self.concurrency = concurrency
+
+    async def sync_created(self, objects: Iterable[models.Model]) -> SyncOutcome:
+        return await self._sync("create", objects)
+
+    async def sync_updated(self, objects: Iterable[models.Model]) -> SyncOutcome:
+        return await self._sync("update", objects)
+
+    async def sync_deleted(self, objects: Iterable[models.Model]) -> SyncOutcome:
+        return await self._sync("delete", objects)
+
+    async def _sync(self, method: str, objects: Iterable[models.Model]) -> SyncOutcome:
+        if method not in self.SYNC_METHODS:
+            raise self.invalid_method_error(method)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        units = self.make_units(method, objects)
+        outcomes = await asyncio.gather(
+            *(self._sync_unit(method, unit, semaphore) for unit in units)
+        )
+        return self.set_sync_hashes(method, self.merge_outcomes(outcomes))
+
+    async def _sync_unit(
+        self, method: str, unit: list[models.Model], semaphore: asyncio.Semaphore
+    ) -> SyncOutcome:
+        async with semaphore:
+            if self.uses_batches(method):
+                payload = self.batch_payload(method, unit)
+                try:
+                    results = await self.client.batch(method, payload)
+                except (httpx.HTTPError, RemoteAPIError) as exc:
+                    return [], [(obj, exc) for obj in unit]
+                return self.batch_outcome(unit, results)
+            (obj,) = unit
+            try:
+                await self._sync_object(method, obj)
+            except (httpx.HTTPError, CircuitOpenError, RemoteConflictError) as exc:
+                return [], [(obj, exc)]
+            return [obj], []
+
+    async def _sync_object(self, method: str, obj: models.Model) -> None:
+        http_method, url, data = self.object_request(method, obj)
+        result = await self.client.write(
+            http_method, url, data, self.get_etag(method, obj)
+        )
+        self.set_etag(obj, result.etag)
+
+
+class BlockingRemoteModelAPI:
+    """
+    Runs an AsyncRemoteModelAPI from synchronous code.
+
+    Every call is executed on the same event loop so the underlying
+    httpx.AsyncClient keeps its connection pool between calls. Querysets are
+    evaluated before entering the loop, as the ORM can't be used from it.
+    """
+
+    def __init__(self, api: AsyncRemoteModelAPI, runner: asyncio.Runner) -> None:
+        self.api = api
+        self.runner = runner
+
+    def is_unchanged(self, obj: models.Model) -> bool:
+        return self.api.is_unchanged(obj)
+
+    def sync_created(self, objects: Iterable[models.Model]) -> SyncOutcome:
+        return self.runner.run(self.api.sync_created(list(objects)))
+
+    def sync_updated(self, objects: Iterable[models.Model]) -> SyncOutcome:
+        return self.runner.run(self.api.sync_updated(list(objects)))
+
+    def sync_deleted(self, objects: Iterable[models.Model]) -> SyncOutcome:
+        return self.runner.run(self.api.sync_deleted(list(objects)))
@@ -0,0 +1,310 @@
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import httpx
+from django.conf import settings
+
+from blog.sync_reports import RequestStats
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Errors raised before the request reached the remote, safe to retry for any
+# method.
+CONNECTION_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# Statuses meaning the remote refused to process the request.
+REJECTED_STATUSES = frozenset({429, 503})
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Idempotent requests are retried on connection errors, timeouts and
+    `retry_statuses`; the rest only when the remote didn't get to process
+    them (connection errors, 429 and 503). `Retry-After` headers are honored
+    up to `max_backoff` seconds.
+    """
+
+    DEFAULT_RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        retry_statuses: frozenset[int] = DEFAULT_RETRY_STATUSES,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            max_retries=settings.BLOG_SYNC_MAX_RETRIES,
+            backoff_factor=settings.BLOG_SYNC_RETRY_BACKOFF_FACTOR,
+            max_backoff=settings.BLOG_SYNC_RETRY_MAX_BACKOFF,
+        )
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        response: httpx.Response | None = None,
+        exc: Exception | None = None,
+    ) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(exc, CONNECTION_ERRORS):
+            return True
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        if exc is not None:
+            return idempotent and isinstance(exc, httpx.TransportError)
+        if response is None:
+            return False
+        if idempotent:
+            return response.status_code in self.retry_statuses
+        return response.status_code in REJECTED_STATUSES
+
+    def get_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        retry_after = get_retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(  # noqa: S311
+            0, min(self.max_backoff, self.backoff_factor * 2**attempt)
+        )
+
+
+def get_retry_after(response: httpx.Response) -> float | None:
+    """Returns the seconds to wait requested by a Retry-After header."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class CircuitBreaker:
+    """
+    Stops calling an endpoint after `failure_threshold` consecutive failures.
+
+    Once open, requests are rejected until `reset_timeout` seconds have
+    passed. Then a single trial request is let through: the circuit closes
+    if it succeeds and opens again otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        stats: RequestStats | None = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.stats = stats
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, stats: RequestStats | None = None) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=settings.BLOG_SYNC_CIRCUIT_BREAKER_THRESHOLD,
+            reset_timeout=settings.BLOG_SYNC_CIRCUIT_BREAKER_RESET_TIMEOUT,
+            stats=stats,
+        )
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if (
+                self.state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self.state = self.HALF_OPEN
+                return True
+        if self.stats is not None:
+            self.stats.add("rejected")
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.OPEN or (
+                self.state == self.CLOSED and self._failures < self.failure_threshold
+            ):
+                return
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+        if self.stats is not None:
+            self.stats.add("circuit_trips")
+
+
+def is_remote_failure(
+    response: httpx.Response | None = None, exc: Exception | None = None
+) -> bool:
+    """
+    Tells if the outcome of a request counts as a failure of the remote,
+    unlike client errors which say nothing about its health.
+    """
+    if exc is not None:
+        return isinstance(exc, httpx.TransportError)
+    return response is not None and (
+        response.status_code >= 500  # noqa: PLR2004
+        or response.status_code in REJECTED_STATUSES
+    )
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the requests to `rate` per second with bursts of up
+    to `capacity`.
+
+    `reserve` takes a token and returns the seconds the caller has to wait
+    before using it, so waiting happens outside the lock and works the same
+    from threads and coroutines.
+    """
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "TokenBucket | None":
+        if not settings.BLOG_SYNC_RATE_LIMIT:
+            return None
+        return cls(settings.BLOG_SYNC_RATE_LIMIT, settings.BLOG_SYNC_RATE_LIMIT_BURST)
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    AIMD controller of the number of concurrent requests.
+
+    Every healthy response raises the limit by 1/limit (about one more
+    request per round trip) up to `max_limit`. Overload signals (429, 5xx or
+    transport errors) and a p95 latency over `latency_tolerance` times the
+    best p95 seen multiply it by `decrease_factor`, at most once per round
+    trip, down to `min_limit`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        max_limit: int,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        decrease_factor: float = 0.5,
+        latency_window: int = 20,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.in_flight = 0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._best_p95: float | None = None
+        self._since_decrease = self.limit
+        self._condition = threading.Condition()
+        self._released: asyncio.Event | None = None
+
+    @classmethod
+    def from_settings(cls, max_limit: int) -> "AdaptiveConcurrencyLimit | None":
+        if not settings.BLOG_SYNC_ADAPTIVE_CONCURRENCY:
+            return None
+        return cls(max_limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        while not self._try_acquire():
+            if self._released is None:
+                self._released = asyncio.Event()
+            self._released.clear()
+            await self._released.wait()
+
+    def release(self, latency: float, overloaded: bool) -> None:  # noqa: FBT001
+        with self._condition:
+            self.in_flight -= 1
+            self._since_decrease += 1
+            if overloaded:
+                self._decrease()
+            else:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+                self._record_latency(latency)
+            self._condition.notify_all()
+        if self._released is not None:
+            self._released.set()
+
+    def _try_acquire(self) -> bool:
+        with self._condition:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _record_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+        if len(self._latencies) < (self._latencies.maxlen or 0):
+            return
+        latencies = sorted(self._latencies)
+        p95 = latencies[math.ceil(len(latencies) * 0.95) - 1]
+        self._latencies.clear()
+        if self._best_p95 is None or p95 < self._best_p95:
+            self._best_p95 = p95
+        elif p95 > self._best_p95 * self.latency_tolerance:
+            self._decrease()
+
+    def _decrease(self) -> None:
+        # Responses to requests sent before the last decrease don't reflect
+        # the current limit yet.
+        if self._since_decrease < self.limit:
+            return
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+        self._since_decrease = 0
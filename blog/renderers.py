@@ -0,0 +1,24 @@
+from rest_framework.renderers import JSONRenderer
+
+from blog import json_backend
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with the fast JSON backend. Indented output (like
+    the one embedded in the browsable API) and non default DRF JSON settings
+    fall back to DRF's rendering.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped so the output is a strict javascript subset, as DRF does.
+        return (
+            json_backend.dumps(data)
+            .replace(b"\xe2\x80\xa8", b"\\u2028")
+            .replace(b"\xe2\x80\xa9", b"\\u2029")
+        )
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 
+from blog.managers import SyncStatus
 from blog.models import DEFAULT_USER_ID
 from blog.models import Comment
 from blog.models import Post
+from blog.models import SyncRun
 
 
 class PostSerializer(serializers.ModelSerializer[Post]):
@@ -23,9 +25,28 @@ class CommentSerializer(serializers.ModelSerializer[Comment]):
         read_only_fields = ["id"]
 
 
+class SyncRunSerializer(serializers.ModelSerializer[SyncRun]):
+    class Meta:
+        model = SyncRun
+        fields = [
+            "id",
+            "command",
+            "outcome",
+            "started_at",
+            "finished_at",
+            "duration",
+            "items_synced",
+            "num_errors",
+            "items_per_second",
+            "error",
+            "report",
+        ]
+        read_only_fields = fields
+
+
 class RemotePostListSerializer(serializers.ListSerializer):
     def create(self, validated_data):
-        books = [Post(**item) for item in validated_data]
+        books = [Post(**item, status=SyncStatus.SYNCED) for item in validated_data]
         return Post.objects.bulk_create(books)
 
 
@@ -43,7 +64,9 @@ class RemotePostSerializer(serializers.ModelSerializer[Post]):
 
 class RemoteCommentListSerializer(serializers.ListSerializer):
     def create(self, validated_data):
-        comments = [Comment(**item) for item in validated_data]
+        comments = [
+            Comment(**item, status=SyncStatus.SYNCED) for item in validated_data
+        ]
         return Comment.objects.bulk_create(comments)
 
 
@@ -0,0 +1,43 @@
+import time
+
+
+class SyncBudget:
+    """
+    Time and item limits of a sync run, None meaning no limit. Items are the
+    objects pushed to the remote, whether they synced or failed.
+
+    The budget is checked between checkpoints, so the checkpoint in flight
+    is always committed. `start` is called at the beginning of every run, so
+    the same budget applies to each pass of --watch mode.
+    """
+
+    def __init__(
+        self, max_duration: float | None = None, max_items: int | None = None
+    ) -> None:
+        self.max_duration = max_duration
+        self.max_items = max_items
+        self.items = 0
+        self._started_at = time.monotonic()
+
+    def start(self) -> None:
+        self.items = 0
+        self._started_at = time.monotonic()
+
+    def consume(self, items: int) -> None:
+        self.items += items
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started_at
+
+    @property
+    def remaining_items(self) -> int | None:
+        if self.max_items is None:
+            return None
+        return max(self.max_items - self.items, 0)
+
+    @property
+    def exhausted(self) -> bool:
+        if self.remaining_items == 0:
+            return True
+        return self.max_duration is not None and self.elapsed >= self.max_duration
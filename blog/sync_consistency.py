@@ -0,0 +1,131 @@
+"""
+Anti-entropy check between the local objects and the remote API.
+
+The remote API has no digest or id range endpoints, so the check is a full
+scan: the remote collection is downloaded, the local objects are serialized
+in pk ordered buckets, and the payload hashes of both sides are compared by
+id. Its cost grows with the size of the collections, not with the drift.
+"""
+
+from typing import Any
+from typing import cast
+
+from django.db import transaction
+from rest_framework.serializers import Serializer
+
+from blog.models import SyncOutbox
+from blog.models import SyncStatus
+from blog.models import SyncStatusMixin
+from blog.remote_api import RemoteModelAPI
+from blog.remote_api import payload_hash
+
+# Local objects read and serialized per query.
+DEFAULT_BUCKET_SIZE = 500
+
+
+class ModelConsistency:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.local_objects = 0
+        self.remote_objects = 0
+        # Objects not pending to sync whose remote copy has another payload,
+        # that are missing in the remote, or that only exist in the remote.
+        self.divergent: list[int] = []
+        self.missing: list[int] = []
+        self.extra: list[int] = []
+        self.enqueued = 0
+
+    @property
+    def consistent(self) -> bool:
+        return not (self.divergent or self.missing or self.extra)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "local_objects": self.local_objects,
+            "remote_objects": self.remote_objects,
+            "divergent": self.divergent,
+            "missing": self.missing,
+            "extra": self.extra,
+            "enqueued": self.enqueued,
+        }
+
+
+def get_pending_ids(model: type[SyncStatusMixin]) -> set[int]:
+    return set(SyncOutbox.objects.for_model(model).values_list("object_id", flat=True))
+
+
+def get_local_hashes(
+    api: RemoteModelAPI,
+    model: type[SyncStatusMixin],
+    exclude: set[int],
+    bucket_size: int = DEFAULT_BUCKET_SIZE,
+) -> dict[int, str]:
+    """
+    Returns the payload hash of the current local objects by id. Objects
+    are serialized rather than trusting the hash stored when they were last
+    synced, as rows changed without recording it in the outbox would go
+    unnoticed.
+    """
+    return {
+        obj.pk: payload_hash(api.serialize_object(obj))
+        for bucket in model.objects.get_queryset().iter_chunks(bucket_size)
+        for obj in bucket
+        if obj.pk not in exclude
+    }
+
+
+def get_remote_hashes(api: RemoteModelAPI, exclude: set[int]) -> dict[int, str]:
+    """Returns the payload hash of the remote objects by id."""
+    field_names = list(cast(Serializer, api.serializer()).fields)
+    return {
+        item["id"]: payload_hash({name: item.get(name) for name in field_names})
+        for item in api.client.retrieve_list()
+        if item["id"] not in exclude
+    }
+
+
+def verify_model(
+    name: str,
+    api: RemoteModelAPI,
+    model: type[SyncStatusMixin],
+    bucket_size: int = DEFAULT_BUCKET_SIZE,
+) -> ModelConsistency:
+    """
+    Compares the objects of `model` with the remote ones. Objects with
+    pending outbox entries are left out, as they are expected to differ
+    until the next sync.
+    """
+    result = ModelConsistency(name)
+    pending = get_pending_ids(model)
+    remote_hashes = get_remote_hashes(api, pending)
+    local_hashes = get_local_hashes(api, model, pending, bucket_size)
+    result.local_objects = len(local_hashes)
+    result.remote_objects = len(remote_hashes)
+    result.missing = sorted(local_hashes.keys() - remote_hashes.keys())
+    result.extra = sorted(remote_hashes.keys() - local_hashes.keys())
+    result.divergent = sorted(
+        pk
+        for pk in local_hashes.keys() & remote_hashes.keys()
+        if local_hashes[pk] != remote_hashes[pk]
+    )
+    return result
+
+
+def enqueue_resync(model: type[SyncStatusMixin], result: ModelConsistency) -> int:
+    """
+    Records outbox entries pushing the divergent objects, with all their
+    fields, and creating the missing ones. Their stored sync hash and ETag
+    are cleared so the update is neither skipped nor rejected. Objects only
+    in the remote can't be pushed and are only reported.
+    """
+    changes = [(pk, SyncStatus.UPDATED) for pk in result.divergent]
+    changes += [(pk, SyncStatus.CREATED) for pk in result.missing]
+    if not changes:
+        return 0
+    with transaction.atomic():
+        model.all_objects.filter(pk__in=[pk for pk, _ in changes]).update(
+            sync_hash="", remote_etag=""
+        )
+        SyncOutbox.objects.record(model, changes)
+    result.enqueued = len(changes)
+    return result.enqueued
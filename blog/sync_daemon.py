@@ -0,0 +1,201 @@
+import select
+import threading
+import time
+from collections.abc import Callable
+from typing import Protocol
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+
+from blog.managers import SYNC_CHANNEL
+from blog.remote_api import RemoteAPIError
+from blog.sync_reports import SyncBlogReport
+
+
+class ChangeListener(Protocol):
+    def wait(self, timeout: float) -> bool:
+        """
+        Waits up to `timeout` seconds for changes to sync. Returns True if
+        there may be any.
+        """
+
+    def close(self) -> None: ...
+
+
+class PollingChangeListener:
+    """Assumes there are changes every `interval` seconds."""
+
+    def __init__(self, stop_event: threading.Event, interval: float) -> None:
+        self.stop_event = stop_event
+        self.interval = interval
+        self._next_poll = time.monotonic() + interval
+
+    def wait(self, timeout: float) -> bool:
+        remaining = self._next_poll - time.monotonic()
+        if self.stop_event.wait(max(min(timeout, remaining), 0)):
+            return False
+        if time.monotonic() < self._next_poll:
+            return False
+        self._next_poll = time.monotonic() + self.interval
+        return True
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresChangeListener:
+    """
+    LISTENs to the SYNC_CHANNEL notified when changes are recorded in the
+    sync outbox.
+
+    Notifications are read from the Django connection (psycopg 3), which is
+    polled in slices of at most `poll_slice` seconds so a stop request is
+    noticed quickly.
+    """
+
+    def __init__(
+        self,
+        stop_event: threading.Event,
+        using: str = DEFAULT_DB_ALIAS,
+        poll_slice: float = 1.0,
+    ) -> None:
+        self.stop_event = stop_event
+        self.poll_slice = poll_slice
+        self.connection = connections[using]
+        self._notified = threading.Event()
+        self.connection.ensure_connection()
+        self.connection.connection.add_notify_handler(self._on_notify)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {SYNC_CHANNEL}")
+
+    def _on_notify(self, notify) -> None:
+        self._notified.set()
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        pg_connection = self.connection.connection
+        while not self._notified.is_set() and not self.stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select(
+                [pg_connection.fileno()], [], [], min(remaining, self.poll_slice)
+            )
+            if readable:
+                # Notifications are dispatched when the connection reads.
+                pg_connection.execute("SELECT 1")
+        notified = self._notified.is_set()
+        self._notified.clear()
+        return notified
+
+    def close(self) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"UNLISTEN {SYNC_CHANNEL}")
+        self.connection.connection.remove_notify_handler(self._on_notify)
+
+
+def get_change_listener(
+    stop_event: threading.Event,
+    poll_interval: float,
+    using: str = DEFAULT_DB_ALIAS,
+) -> ChangeListener:
+    if connections[using].vendor == "postgresql":
+        return PostgresChangeListener(stop_event, using)
+    return PollingChangeListener(stop_event, poll_interval)
+
+
+class SyncDaemon:
+    """
+    Runs sync passes whenever the listener reports changes.
+
+    Changes notified within `debounce` seconds of the first one are pushed in
+    the same pass. A pass that synced items but left some behind (its budget
+    was used up, or objects failed or were deferred) is followed by another
+    one right away, and with `catch_up` a pass is run after that many seconds
+    without any, so what is left is pushed without a new notification.
+
+    Every `heartbeat` seconds `on_heartbeat` is called with the number of
+    passes run and items synced so far. `stop` (safe to call from signal
+    handlers) ends the loop once the current pass is over.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        sync_pass: Callable[[], SyncBlogReport],
+        listener: ChangeListener,
+        stop_event: threading.Event,
+        on_report: Callable[[SyncBlogReport], None],
+        on_heartbeat: Callable[[int, int], None],
+        on_error: Callable[[Exception], None],
+        debounce: float = 0.5,
+        heartbeat: float = 60.0,
+        catch_up: float | None = None,
+    ) -> None:
+        self.sync_pass = sync_pass
+        self.listener = listener
+        self.stop_event = stop_event
+        self.on_report = on_report
+        self.on_heartbeat = on_heartbeat
+        self.on_error = on_error
+        self.debounce = debounce
+        self.heartbeat = heartbeat
+        self.catch_up = catch_up
+        self.passes = 0
+        self.items_synced = 0
+
+    def stop(self, *args) -> None:
+        self.stop_event.set()
+
+    def run(self) -> None:
+        # Catch up with the changes recorded while the daemon wasn't running.
+        report = self.run_pass()
+        last_heartbeat = last_pass = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                deadline = last_heartbeat + self.heartbeat
+                if self.catch_up is not None:
+                    deadline = min(deadline, last_pass + self.catch_up)
+                drain = report is not None and left_backlog(report)
+                timeout = 0 if drain else max(deadline - time.monotonic(), 0)
+                notified = self.listener.wait(timeout)
+                if self.stop_event.is_set():
+                    break
+                if notified:
+                    if self.stop_event.wait(self.debounce):
+                        break
+                    # Notifications received while debouncing are covered.
+                    self.listener.wait(0)
+                    drain = True
+                if drain or (
+                    self.catch_up is not None
+                    and time.monotonic() - last_pass >= self.catch_up
+                ):
+                    report = self.run_pass()
+                    last_pass = time.monotonic()
+                if time.monotonic() - last_heartbeat >= self.heartbeat:
+                    self.on_heartbeat(self.passes, self.items_synced)
+                    last_heartbeat = time.monotonic()
+        finally:
+            self.listener.close()
+
+    def run_pass(self) -> SyncBlogReport | None:
+        try:
+            report = self.sync_pass()
+        except RemoteAPIError as exc:
+            self.on_error(exc)
+            return None
+        self.passes += 1
+        self.items_synced += report.num_items_synced
+        if report.num_items_synced or report.num_errors:
+            self.on_report(report)
+        return report
+
+
+def left_backlog(report: SyncBlogReport) -> bool:
+    """
+    Returns whether the pass of `report` made progress but left changes to
+    push. Passes that made none aren't repeated until the next catch-up.
+    """
+    return report.num_items_synced > 0 and bool(
+        report.budget_exhausted or report.num_errors or report.num_deferred
+    )
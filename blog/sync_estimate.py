@@ -0,0 +1,214 @@
+from collections import defaultdict
+from collections.abc import Collection
+from collections.abc import Mapping
+from typing import Any
+
+from django.conf import settings
+
+from blog import json_backend
+from blog.managers import SyncRunOutcome
+from blog.models import SyncOutbox
+from blog.models import SyncRun
+from blog.remote_api import BaseRemoteModelAPI
+from blog.sync_planner import SYNC_PHASES
+from blog.sync_planner import plan_entries
+from blog.sync_scheduler import get_cascaded_ids
+
+# Request latency assumed when no sync run has measured one yet.
+DEFAULT_REQUEST_LATENCY = 0.2
+
+# Recent sync runs whose request latencies are used for the estimate.
+DEFAULT_LATENCY_RUNS = 10
+
+
+class OperationEstimate:
+    def __init__(self) -> None:
+        self.objects = 0
+        self.skipped = 0
+        # Requests and bytes to send by HTTP method.
+        self.requests: dict[str, int] = defaultdict(int)
+        self.bytes: dict[str, int] = defaultdict(int)
+
+    @property
+    def num_requests(self) -> int:
+        return sum(self.requests.values())
+
+    @property
+    def num_bytes(self) -> int:
+        return sum(self.bytes.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "objects": self.objects,
+            "skipped": self.skipped,
+            "requests": self.num_requests,
+            "bytes": self.num_bytes,
+            "requests_by_method": dict(self.requests),
+        }
+
+
+class SyncEstimate:
+    """
+    Work a sync run would do with the current outbox: objects, requests and
+    bytes by (model name, operation), the changes coalesced away, the objects
+    only purged locally, the deletes cascaded by the remote and the time the
+    requests would take.
+    """
+
+    def __init__(self) -> None:
+        self.operations: dict[tuple[str, str], OperationEstimate] = defaultdict(
+            OperationEstimate
+        )
+        self.avoided: dict[str, int] = defaultdict(int)
+        self.purged: dict[str, int] = defaultdict(int)
+        self.cascaded: dict[str, int] = defaultdict(int)
+        # Mean seconds per request by (model name, HTTP method), and whether
+        # they were measured by previous runs or assumed.
+        self.latencies: dict[tuple[str, str], float] = {}
+        self.latency_measured = False
+        self.parallelism = 1
+        self.rate_limit = 0.0
+
+    @property
+    def num_requests(self) -> int:
+        return sum(op.num_requests for op in self.operations.values())
+
+    @property
+    def num_bytes(self) -> int:
+        return sum(op.num_bytes for op in self.operations.values())
+
+    @property
+    def duration(self) -> float:
+        """Seconds the requests would take with the given parallelism."""
+        request_seconds = sum(
+            count * self.get_latency(name, method)
+            for (name, _), operation in self.operations.items()
+            for method, count in operation.requests.items()
+        )
+        duration = request_seconds / self.parallelism
+        if self.rate_limit:
+            duration = max(duration, self.num_requests / self.rate_limit)
+        return duration
+
+    def get_latency(self, name: str, method: str) -> float:
+        if (name, method) in self.latencies:
+            return self.latencies[(name, method)]
+        if self.latencies:
+            return sum(self.latencies.values()) / len(self.latencies)
+        return DEFAULT_REQUEST_LATENCY
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.num_requests,
+            "bytes": self.num_bytes,
+            "duration": self.duration,
+            "parallelism": self.parallelism,
+            "latency_measured": self.latency_measured,
+            "operations": {
+                f"{name} {operation}": self.operations[(name, operation)].to_dict()
+                for name, operation in SYNC_PHASES
+                if (name, operation) in self.operations
+            },
+            "avoided": dict(self.avoided),
+            "purged": dict(self.purged),
+            "cascaded": dict(self.cascaded),
+        }
+
+
+def get_measured_latencies(
+    runs: int = DEFAULT_LATENCY_RUNS,
+) -> dict[tuple[str, str], float]:
+    """
+    Returns the mean request latency by (model name, HTTP method) of the last
+    `runs` stored sync runs that reached the remote.
+    """
+    counts: dict[tuple[str, str], int] = defaultdict(int)
+    sums: dict[tuple[str, str], float] = defaultdict(float)
+    reports = (
+        SyncRun.objects.for_command("sync_remote_data")
+        .exclude(outcome=SyncRunOutcome.FAILED)
+        .values_list("report", flat=True)[:runs]
+    )
+    for report in reports:
+        for name in ("posts", "comments"):
+            for method, latency in report.get(name, {}).get("latencies", {}).items():
+                counts[(name, method)] += latency["count"]
+                sums[(name, method)] += latency["sum"]
+    return {key: sums[key] / count for key, count in counts.items() if count}
+
+
+def get_payload_size(api: BaseRemoteModelAPI, payload: Any) -> int:
+    """Returns the size of the body of a request as sent on the wire."""
+    if payload is None:
+        return 0
+    content = json_backend.dumps(payload)
+    if api.client.compression is not None:
+        content, _ = api.client.compression.compress(content)
+    return len(content)
+
+
+def estimate_sync(
+    apis: Mapping[str, BaseRemoteModelAPI],
+    chunk_size: int,
+    parallelism: int = 1,
+    cascades: Collection[str] = (),
+) -> SyncEstimate:
+    """
+    Plans the pending outbox entries the way a sync run would, coalescing
+    the changes of every object and skipping unchanged updates, and
+    estimates the requests that would be sent. Nothing is sent nor written.
+
+    Chunks are planned with the entries of all their objects, so the
+    objects already planned are left out of the following chunks.
+    """
+    estimate = SyncEstimate()
+    estimate.parallelism = parallelism
+    estimate.rate_limit = settings.BLOG_SYNC_RATE_LIMIT
+    estimate.latencies = get_measured_latencies()
+    estimate.latency_measured = bool(estimate.latencies)
+    planned: dict[str, set[int]] = defaultdict(set)
+    for entries in SyncOutbox.objects.iter_chunks(chunk_size):
+        new_entries = [
+            entry for entry in entries if entry.object_id not in planned[entry.model]
+        ]
+        if not new_entries:
+            continue
+        for entry in new_entries:
+            planned[entry.model].add(entry.object_id)
+        plan = plan_entries(new_entries)
+        for name, avoided in plan.avoided.items():
+            estimate.avoided[name] += avoided
+        for name, purged in plan.purged.items():
+            estimate.purged[name] += len(purged)
+        for name, operation in SYNC_PHASES:
+            objects = plan.objects(name, operation)
+            if operation == "delete" and (
+                cascaded := get_cascaded_ids(plan, name, cascades)
+            ):
+                estimate.cascaded[name] += len(cascaded)
+                objects = [obj for obj in objects if obj.pk not in cascaded]
+            if objects:
+                estimate_operation(
+                    apis[name],
+                    operation,
+                    objects,
+                    estimate.operations[(name, operation)],
+                )
+    return estimate
+
+
+def estimate_operation(
+    api: BaseRemoteModelAPI,
+    operation: str,
+    objects: list,
+    operation_estimate: OperationEstimate,
+) -> None:
+    if operation == "update":
+        unchanged = [obj for obj in objects if api.is_unchanged(obj)]
+        operation_estimate.skipped += len(unchanged)
+        unchanged_ids = {obj.pk for obj in unchanged}
+        objects = [obj for obj in objects if obj.pk not in unchanged_ids]
+    operation_estimate.objects += len(objects)
+    for method, payload in api.plan_requests(operation, objects):
+        operation_estimate.requests[method] += 1
+        operation_estimate.bytes[method] += get_payload_size(api, payload)
@@ -0,0 +1,271 @@
+"""
+Metrics of the sync runs in the Prometheus text exposition format, written to
+a file for the node exporter textfile collector or served over HTTP.
+"""
+
+import functools
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from blog.sync_reports import Histogram
+from blog.sync_reports import SyncBlogReport
+
+PREFIX = "blog_sync_"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+COUNTERS = (
+    ("runs_total", "Sync runs by outcome."),
+    ("run_duration_seconds_total", "Seconds spent in sync runs."),
+    ("items_total", "Objects synced with the remote by operation."),
+    ("errors_total", "Objects that failed to sync."),
+    ("items_skipped_total", "Updated objects synced without a remote call."),
+    ("items_deferred_total", "Objects left for a later run by their dependencies."),
+    ("items_cascaded_total", "Deletes resolved by the remote cascade of a parent."),
+    ("conflicts_total", "Writes rejected because the remote object changed."),
+    ("changes_avoided_total", "Recorded changes coalesced into other remote calls."),
+    ("phase_duration_seconds_total", "Seconds spent pushing objects by operation."),
+    ("retries_total", "Requests retried."),
+    ("requests_throttled_total", "Requests delayed by the rate limiter."),
+    ("requests_rejected_total", "Requests rejected by an open circuit breaker."),
+    ("circuit_trips_total", "Times the circuit breaker opened."),
+    ("bytes_sent_total", "Request body bytes sent on the wire."),
+    ("bytes_sent_uncompressed_total", "Request body bytes before compression."),
+    ("bytes_received_total", "Response body bytes received on the wire."),
+    ("bytes_received_uncompressed_total", "Response body bytes after decoding."),
+)
+
+GAUGES = (
+    ("last_run_timestamp_seconds", "Unix time the last sync run finished."),
+    ("last_run_duration_seconds", "Seconds the last sync run took."),
+    ("last_run_throughput_items_per_second", "Objects synced per second last run."),
+    ("backlog_entries", "Outbox entries pending before and after the last run."),
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels)
+    return "{" + pairs + "}"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+class SyncMetrics:
+    """
+    Thread-safe accumulator of the reports of the sync runs of a process.
+
+    With a `textfile`, the metrics are written to it (atomically, so the
+    collector never reads a partial file) every time a run is recorded.
+    """
+
+    def __init__(self, textfile: str | None = None) -> None:
+        self.textfile = textfile
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._gauges: dict[str, dict[Labels, float]] = defaultdict(dict)
+        self._latencies: dict[Labels, Histogram] = {}
+
+    def record(self, report: SyncBlogReport) -> None:
+        with self._lock:
+            outcome = "success" if report.success else "partial"
+            self._inc("runs_total", 1, outcome=outcome)
+            self._inc("run_duration_seconds_total", report.duration)
+            self._set_last_run(report.duration)
+            self._set(
+                "last_run_throughput_items_per_second",
+                report.items_per_second,
+            )
+            for when in ("before", "after"):
+                backlog = getattr(report, f"backlog_{when}")
+                if backlog is not None:
+                    self._set("backlog_entries", backlog, when=when)
+            for model in ("posts", "comments"):
+                self._record_model(model, report)
+        self.write_textfile()
+
+    def record_failure(self, duration: float = 0.0) -> None:
+        """Records a run aborted by an error."""
+        with self._lock:
+            self._inc("runs_total", 1, outcome="failed")
+            self._inc("run_duration_seconds_total", duration)
+            self._set_last_run(duration)
+        self.write_textfile()
+
+    def instrument(
+        self, sync_pass: Callable[[], SyncBlogReport]
+    ) -> Callable[[], SyncBlogReport]:
+        """Wraps `sync_pass` to record the metrics of every run."""
+
+        @functools.wraps(sync_pass)
+        def wrapper() -> SyncBlogReport:
+            start = time.perf_counter()
+            try:
+                report = sync_pass()
+            except Exception:
+                self.record_failure(time.perf_counter() - start)
+                raise
+            self.record(report)
+            return report
+
+        return wrapper
+
+    def render(self) -> str:
+        with self._lock:
+            lines: list[str] = []
+            for name, help_text in COUNTERS:
+                self._render_samples(lines, name, "counter", help_text, self._counters)
+            for name, help_text in GAUGES:
+                self._render_samples(lines, name, "gauge", help_text, self._gauges)
+            self._render_latencies(lines)
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self) -> None:
+        if not self.textfile:
+            return
+        path = Path(self.textfile)
+        fd, tmp_name = tempfile.mkstemp(dir=path.resolve().parent, suffix=".tmp")
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            tmp_path.chmod(0o644)
+            tmp_path.replace(path)
+        except BaseException:
+            tmp_path.unlink()
+            raise
+
+    def _record_model(self, model: str, report: SyncBlogReport) -> None:
+        model_report = getattr(report, model)
+        for operation, value in (
+            ("create", model_report.created),
+            ("update", model_report.updated),
+            ("delete", model_report.deleted),
+        ):
+            self._inc("items_total", value, model=model, operation=operation)
+        for operation, seconds in model_report.durations.items():
+            self._inc(
+                "phase_duration_seconds_total",
+                seconds,
+                model=model,
+                operation=operation,
+            )
+        for name, value in (
+            ("errors_total", model_report.num_errors),
+            ("items_skipped_total", model_report.skipped),
+            ("items_deferred_total", model_report.deferred),
+            ("items_cascaded_total", model_report.cascaded),
+            ("conflicts_total", model_report.conflicts),
+            ("changes_avoided_total", model_report.avoided),
+            ("retries_total", model_report.retries),
+            ("requests_throttled_total", model_report.throttled),
+            ("requests_rejected_total", model_report.rejected),
+            ("circuit_trips_total", model_report.circuit_trips),
+            ("bytes_sent_total", model_report.bytes_sent),
+            ("bytes_sent_uncompressed_total", model_report.bytes_sent_uncompressed),
+            ("bytes_received_total", model_report.bytes_received),
+            (
+                "bytes_received_uncompressed_total",
+                model_report.bytes_received_uncompressed,
+            ),
+        ):
+            self._inc(name, value, model=model)
+        for method, histogram in model_report.latencies.items():
+            labels = (("method", method), ("model", model))
+            self._latencies.setdefault(labels, Histogram(histogram.buckets)).merge(
+                histogram
+            )
+
+    def _set_last_run(self, duration: float) -> None:
+        self._set("last_run_timestamp_seconds", time.time())
+        self._set("last_run_duration_seconds", duration)
+
+    def _inc(self, name: str, value: float, **labels: str) -> None:
+        self._counters[name][tuple(sorted(labels.items()))] += value
+
+    def _set(self, name: str, value: float, **labels: str) -> None:
+        self._gauges[name][tuple(sorted(labels.items()))] = value
+
+    @staticmethod
+    def _render_samples(
+        lines: list[str],
+        name: str,
+        kind: str,
+        help_text: str,
+        metrics: dict[str, dict[Labels, float]],
+    ) -> None:
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in sorted(metrics.get(name, {}).items()):
+            lines.append(f"{PREFIX}{name}{format_labels(labels)} {format_value(value)}")
+
+    def _render_latencies(self, lines: list[str]) -> None:
+        name = f"{PREFIX}request_duration_seconds"
+        lines.append(f"# HELP {name} Latency of the requests to the remote.")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in sorted(self._latencies.items()):
+            bounds = (*map(format_value, histogram.buckets), "+Inf")
+            for bound, count in zip(bounds, histogram.cumulative_counts(), strict=True):
+                bucket_labels = format_labels((*labels, ("le", bound)))
+                lines.append(f"{name}_bucket{bucket_labels} {count}")
+            lines.append(
+                f"{name}_sum{format_labels(labels)} {format_value(histogram.sum)}"
+            )
+            lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    metrics: SyncMetrics
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        pass
+
+
+def serve_metrics(
+    metrics: SyncMetrics, port: int, host: str = ""
+) -> ThreadingHTTPServer:
+    """
+    Serves `metrics` at /metrics from a daemon thread. Call `shutdown` on
+    the returned server to stop it.
+    """
+    handler = type("Handler", (MetricsRequestHandler,), {"metrics": metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name="sync-metrics", daemon=True
+    ).start()
+    return server
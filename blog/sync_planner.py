@@ -0,0 +1,205 @@
+import os
+import socket
+import uuid
+from collections import defaultdict
+from collections.abc import Collection
+from collections.abc import Iterator
+
+from blog.models import Comment
+from blog.models import Post
+from blog.models import SyncOutbox
+from blog.models import SyncStatus
+from blog.models import SyncStatusMixin
+
+SYNC_MODELS: dict[str, type[SyncStatusMixin]] = {"posts": Post, "comments": Comment}
+
+DEFAULT_LEASE_TTL = 300.0
+
+SYNC_PHASES = (
+    ("posts", "create"),
+    ("comments", "create"),
+    ("posts", "update"),
+    ("comments", "update"),
+    ("comments", "delete"),
+    ("posts", "delete"),
+)
+
+
+class SyncPlan:
+    """
+    Work derived from a chunk of outbox entries.
+
+    `pending` holds the objects to push by (model name, operation), `purged`
+    the objects whose changes cancel out and only have to be removed locally,
+    and `resolved` the ids of objects whose entries only need to be
+    acknowledged, like the ones of objects that don't exist anymore.
+    `avoided` counts, by model name, the recorded changes that won't be sent
+    to the remote because they were coalesced. `dirty_since` holds, by
+    model name and object id, the sequence number of the oldest pending
+    entry of every object. Entries up to `last_entry_id` are covered by the
+    plan.
+    """
+
+    def __init__(self, last_entry_id: int) -> None:
+        self.last_entry_id = last_entry_id
+        self.pending: dict[tuple[str, str], list[SyncStatusMixin]] = defaultdict(list)
+        self.purged: dict[str, list[SyncStatusMixin]] = defaultdict(list)
+        self.resolved: dict[str, list[int]] = defaultdict(list)
+        self.avoided: dict[str, int] = defaultdict(int)
+        self.dirty_since: dict[str, dict[int, int]] = defaultdict(dict)
+
+    def objects(self, name: str, operation: str) -> list[SyncStatusMixin]:
+        return self.pending.get((name, operation), [])
+
+
+def get_operation(obj: SyncStatusMixin, operations: Collection[str] = ()) -> str | None:
+    """
+    Returns the remote operation with the net effect of the pending
+    `operations` recorded for `obj`, or None if they cancel out.
+
+    A pending CREATED entry means the remote never saw the object, so it's
+    created with its current data or not sent at all if it was deleted.
+    """
+    created = SyncStatus.CREATED in operations
+    match obj.status:
+        case SyncStatus.CREATED:
+            return "create"
+        case SyncStatus.DELETED:
+            return None if created else "delete"
+        case _:
+            # Objects with outbox entries changed since they were last synced
+            # even if their status was already flipped to SYNCED.
+            return "create" if created else "update"
+
+
+def get_unsynced_fields(changed_fields: list[list[str]]) -> frozenset[str] | None:
+    """
+    Merges the fields changed by the pending updates of an object. Returns
+    None if any of them could have changed all the fields.
+    """
+    if not changed_fields or not all(changed_fields):
+        return None
+    return frozenset().union(*changed_fields)
+
+
+def plan_entries(entries: list[SyncOutbox]) -> SyncPlan:
+    """
+    Plans the sync of the objects referenced by `entries`, coalescing all
+    their pending outbox entries (including the ones beyond this chunk) into
+    a single net operation per object.
+    """
+    plan = SyncPlan(entries[-1].pk)
+    object_ids: dict[str, set[int]] = defaultdict(set)
+    for entry in entries:
+        object_ids[entry.model].add(entry.object_id)
+    for name, model in SYNC_MODELS.items():
+        ids = sorted(object_ids.get(model._meta.label_lower, ()))  # noqa: SLF001
+        if not ids:
+            continue
+        history: dict[int, list[str]] = defaultdict(list)
+        changed_fields: dict[int, list[list[str]]] = defaultdict(list)
+        model_entries = SyncOutbox.objects.for_model(model).filter(object_id__in=ids)
+        for entry_id, object_id, entry_operation, fields in model_entries.values_list(
+            "id", "object_id", "operation", "fields"
+        ):
+            history[object_id].append(entry_operation)
+            plan.dirty_since[name].setdefault(object_id, entry_id)
+            if entry_operation == SyncStatus.UPDATED:
+                changed_fields[object_id].append(fields)
+            plan.last_entry_id = max(plan.last_entry_id, entry_id)
+        objects = model.all_objects.in_bulk(ids)
+        for pk in ids:
+            obj = objects.get(pk)
+            if obj is None:
+                plan.resolved[name].append(pk)
+                continue
+            operations = history[pk]
+            operation = get_operation(obj, operations)
+            if operation is None:
+                plan.purged[name].append(obj)
+                plan.avoided[name] += len(operations)
+            else:
+                if operation == "update":
+                    obj.unsynced_fields = get_unsynced_fields(changed_fields[pk])
+                plan.pending[(name, operation)].append(obj)
+                plan.avoided[name] += max(len(operations) - 1, 0)
+    return plan
+
+
+class OutboxLease:
+    """
+    Lease of outbox entries held by a sync worker, so several workers (on any
+    host) can consume the outbox at the same time without pushing the same
+    object twice.
+
+    Entries are leased for `ttl` seconds: the ones of a worker that crashed
+    are claimed again by the others once its lease expires.
+    """
+
+    def __init__(
+        self, owner: str | None = None, ttl: float = DEFAULT_LEASE_TTL
+    ) -> None:
+        self.owner = (
+            owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.ttl = ttl
+
+    def claim(
+        self, chunk_size: int, model: type[SyncStatusMixin] | None = None
+    ) -> list[SyncOutbox]:
+        return SyncOutbox.objects.claim(self.owner, self.ttl, chunk_size, model)
+
+    def renew(self) -> None:
+        SyncOutbox.objects.renew(self.owner, self.ttl)
+
+    def release(self) -> None:
+        SyncOutbox.objects.release(self.owner)
+
+
+def iter_plans(chunk_size: int, lease: OutboxLease | None = None) -> Iterator[SyncPlan]:
+    """
+    Yields a SyncPlan for every chunk of pending outbox entries, in order.
+
+    With a `lease`, chunks are claimed instead, skipping the objects leased
+    by other workers, until there's nothing left to claim.
+    """
+    if lease is None:
+        for entries in SyncOutbox.objects.iter_chunks(chunk_size):
+            yield plan_entries(entries)
+        return
+    while entries := lease.claim(chunk_size):
+        yield plan_entries(entries)
+
+
+def iter_fair_plans(
+    chunk_size: int, lease: OutboxLease | None = None
+) -> Iterator[SyncPlan]:
+    """
+    Like iter_plans, but every chunk takes an equal share of its entries
+    from each model with pending entries, oldest first, instead of taking
+    them in sequence order. A large backlog of changes of one model then
+    doesn't fill the chunks while the older changes of the others wait.
+    """
+    # Sequence number of the last entry taken by model, without a lease.
+    cursors: dict[str, int] = dict.fromkeys(SYNC_MODELS, 0)
+    while cursors:
+        quota = max(chunk_size // len(cursors), 1)
+        entries: list[SyncOutbox] = []
+        for name in list(cursors):
+            model = SYNC_MODELS[name]
+            if lease is None:
+                model_entries = list(
+                    SyncOutbox.objects.for_model(model)
+                    .filter(pk__gt=cursors[name])
+                    .order_by("pk")[:quota]
+                )
+            else:
+                model_entries = lease.claim(quota, model)
+            if not model_entries:
+                del cursors[name]
+                continue
+            cursors[name] = model_entries[-1].pk
+            entries.extend(model_entries)
+        if entries:
+            entries.sort(key=lambda entry: entry.pk)
+            yield plan_entries(entries)
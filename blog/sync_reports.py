@@ -1,9 +1,112 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Any
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Counts of observed values by the smallest bucket bound they fit in."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        # The last count is the one of the values over every bound.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+
+    def cumulative_counts(self) -> list[int]:
+        counts, total = [], 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": list(self.buckets),
+            "cumulative_counts": self.cumulative_counts(),
+        }
+
+
 class SyncModelReport:
-    def __init__(self, created: int, updated: int, deleted: int, errors: list[str]):
+    def __init__(  # noqa: PLR0913
+        self,
+        created: int,
+        updated: int,
+        deleted: int,
+        errors: list[str],
+        avoided: int = 0,
+        skipped: int = 0,
+    ):
         self.created = created
         self.updated = updated
         self.deleted = deleted
         self.errors = errors
+        # Remote calls saved by coalescing the recorded changes of each object.
+        self.avoided = avoided
+        # Updated objects marked as synced without a remote call because their
+        # payload didn't change since they were last synced.
+        self.skipped = skipped
+        # Objects left for a later run because the object they depend on
+        # isn't synced.
+        self.deferred = 0
+        # Deletes not sent because the remote cascades them from the parent.
+        self.cascaded = 0
+        # Writes rejected because the remote object changed since last sync.
+        self.conflicts = 0
+        self.retries = 0
+        self.circuit_trips = 0
+        self.rejected = 0
+        self.throttled = 0
+        # Bodies size on the wire and before compression.
+        self.bytes_sent = 0
+        self.bytes_sent_uncompressed = 0
+        self.bytes_received = 0
+        self.bytes_received_uncompressed = 0
+        # Request latencies by HTTP method and seconds spent by operation.
+        self.latencies: dict[str, Histogram] = {}
+        self.durations: dict[str, float] = defaultdict(float)
+        self.errors_by_operation: dict[str, int] = defaultdict(int)
+
+    def add(self, operation: str, num_synced: int, errors: list[str]) -> None:
+        match operation:
+            case "create":
+                self.created += num_synced
+            case "update":
+                self.updated += num_synced
+            case "delete":
+                self.deleted += num_synced
+        self.errors.extend(errors)
+        if errors:
+            self.errors_by_operation[operation] += len(errors)
+
+    def add_request_stats(self, stats: "RequestStats") -> None:
+        self.retries += stats.retries
+        self.circuit_trips += stats.circuit_trips
+        self.rejected += stats.rejected
+        self.throttled += stats.throttled
+        self.bytes_sent += stats.bytes_sent
+        self.bytes_sent_uncompressed += stats.bytes_sent_uncompressed
+        self.bytes_received += stats.bytes_received
+        self.bytes_received_uncompressed += stats.bytes_received_uncompressed
+        for method, histogram in stats.latencies.items():
+            self.latencies.setdefault(method, Histogram()).merge(histogram)
 
     @property
     def success(self) -> bool:
@@ -21,11 +124,162 @@ class SyncModelReport:
     def num_errors(self) -> int:
         return len(self.errors)
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "skipped": self.skipped,
+            "avoided": self.avoided,
+            "deferred": self.deferred,
+            "cascaded": self.cascaded,
+            "conflicts": self.conflicts,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "circuit_trips": self.circuit_trips,
+            "rejected": self.rejected,
+            "bytes_sent": self.bytes_sent,
+            "bytes_sent_uncompressed": self.bytes_sent_uncompressed,
+            "bytes_received": self.bytes_received,
+            "bytes_received_uncompressed": self.bytes_received_uncompressed,
+            "num_errors": self.num_errors,
+            "errors_by_operation": dict(self.errors_by_operation),
+            "errors": self.errors,
+            "durations": dict(self.durations),
+            "latencies": {
+                method: histogram.to_dict()
+                for method, histogram in self.latencies.items()
+            },
+        }
+
+
+class WorkerReport:
+    def __init__(self, name: str, items: int, elapsed: float):
+        self.name = name
+        self.items = items
+        self.elapsed = elapsed
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "items": self.items,
+            "elapsed": self.elapsed,
+            "items_per_second": self.items_per_second,
+        }
+
+
+class WorkerStats:
+    """Thread-safe per worker counter of processed items and busy time."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._items: dict[str, int] = defaultdict(int)
+        self._elapsed: dict[str, float] = defaultdict(float)
+
+    def record(self, elapsed: float, items: int = 1) -> None:
+        name = threading.current_thread().name
+        with self._lock:
+            self._items[name] += items
+            self._elapsed[name] += elapsed
+
+    def reports(self) -> list[WorkerReport]:
+        with self._lock:
+            return [
+                WorkerReport(name, self._items[name], self._elapsed[name])
+                for name in sorted(self._items)
+            ]
+
+
+class RequestStats:
+    """
+    Thread-safe counters of the retries, throttling and circuit breaker
+    activity, of the bytes sent and received and of the requests latency.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.circuit_trips = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.bytes_sent_uncompressed = 0
+        self.bytes_received = 0
+        self.bytes_received_uncompressed = 0
+        self.latencies: dict[str, Histogram] = {}
+
+    def add(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def observe_latency(self, method: str, seconds: float) -> None:
+        with self._lock:
+            self.latencies.setdefault(method, Histogram()).observe(seconds)
+
+
+class ConnectionStats:
+    """
+    Thread-safe counters of the requests sent by an HTTP client and the
+    connections it opened to send them, fed by the httpcore trace extension.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.http_versions: set[str] = set()
+
+    @property
+    def reused(self) -> int:
+        return max(self.requests - self.connections, 0)
+
+    def trace(self, event_name: str, info: dict) -> None:
+        with self._lock:
+            match event_name:
+                case "connection.connect_tcp.complete":
+                    self.connections += 1
+                case "http11.send_request_headers.started":
+                    self.requests += 1
+                    self.http_versions.add("HTTP/1.1")
+                case "http2.send_request_headers.started":
+                    self.requests += 1
+                    self.http_versions.add("HTTP/2")
+
+    async def atrace(self, event_name: str, info: dict) -> None:
+        self.trace(event_name, info)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "connections": self.connections,
+            "reused": self.reused,
+            "http_versions": sorted(self.http_versions),
+        }
+
 
 class SyncBlogReport:
-    def __init__(self, posts_report: SyncModelReport, comments_report: SyncModelReport):
+    def __init__(
+        self,
+        posts_report: SyncModelReport,
+        comments_report: SyncModelReport,
+        workers: list[WorkerReport] | None = None,
+    ):
         self.posts = posts_report
         self.comments = comments_report
+        self.workers = workers or []
+        # Concurrent requests limit reached by the adaptive controller.
+        self.concurrency_limit: int | None = None
+        self.connections: ConnectionStats | None = None
+        # Seconds the run took and outbox entries pending before and after it.
+        self.duration = 0.0
+        self.backlog_before: int | None = None
+        self.backlog_after: int | None = None
+        # Whether the run stopped because its SyncBudget was used up.
+        self.budget_exhausted = False
 
     @property
     def success(self) -> bool:
@@ -42,3 +296,30 @@ class SyncBlogReport:
     @property
     def num_errors(self) -> int:
         return self.posts.num_errors + self.comments.num_errors
+
+    @property
+    def num_deferred(self) -> int:
+        return self.posts.deferred + self.comments.deferred
+
+    @property
+    def items_per_second(self) -> float:
+        return self.num_items_synced / self.duration if self.duration > 0 else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "success": self.success,
+            "duration": self.duration,
+            "items_synced": self.num_items_synced,
+            "items_per_second": self.items_per_second,
+            "num_errors": self.num_errors,
+            "backlog_before": self.backlog_before,
+            "backlog_after": self.backlog_after,
+            "budget_exhausted": self.budget_exhausted,
+            "concurrency_limit": self.concurrency_limit,
+            "posts": self.posts.to_dict(),
+            "comments": self.comments.to_dict(),
+            "workers": [worker.to_dict() for worker in self.workers],
+            "connections": (
+                self.connections.to_dict() if self.connections is not None else None
+            ),
+        }
@@ -0,0 +1,297 @@
+from collections import defaultdict
+from collections import deque
+from collections.abc import Collection
+from collections.abc import Iterator
+from typing import NamedTuple
+
+from blog.models import SyncStatus
+from blog.models import SyncStatusMixin
+from blog.sync_budget import SyncBudget
+from blog.sync_planner import SYNC_MODELS
+from blog.sync_planner import SYNC_PHASES
+from blog.sync_planner import SyncPlan
+
+# Objects referencing an object of another model, which has to exist in the
+# remote before them: model name -> (parent model name, reference attname).
+SYNC_DEPENDENCIES = {"comments": ("posts", "post_id")}
+
+SYNC_MODELS_NAMES = {model: name for name, model in SYNC_MODELS.items()}
+
+
+class SyncStep(NamedTuple):
+    name: str
+    operation: str
+    objects: list[SyncStatusMixin]
+    # Deletes of the parents of `objects` (and of the earlier steps deleting
+    # their siblings), pushed once they are deleted.
+    followup: "SyncStep | None" = None
+    # Deletes of the children of `objects` the remote cascades, resolved
+    # once their parent is deleted.
+    cascaded: "SyncStep | None" = None
+
+
+class SyncScheduler:
+    """
+    Orders the pushes of a SyncPlan in steps of up to `checkpoint_size`
+    objects, following SYNC_PHASES but honoring SYNC_DEPENDENCIES:
+
+    - Creates and updates of objects whose parent is being created are
+      pushed right after the step creating the parent. The ones whose parent
+      fails, or isn't synced and isn't part of the plan, are deferred until
+      a later run instead of being sent to fail.
+    - Deletes of objects whose parent is being deleted are pushed right
+      before the parent, in as many steps as needed, and the parent is
+      deferred if any of them fails. If the
+      remote cascades the deletes of the parent model (it's in `cascades`)
+      they aren't pushed: `resolve_cascaded` returns the ones whose parent
+      was deleted, and the rest are deferred.
+
+    With a `budget`, the budget is shared fairly instead: the steps of every
+    (model name, operation) are taken in turns and, with an item limit,
+    split so every one gets its share of the items left. Objects are pushed
+    oldest change first, so the ones left for a later run are the newest.
+
+    Iterating yields the next step; `complete` must be called with the
+    objects synced by every step before asking for the next one.
+    """
+
+    def __init__(
+        self,
+        plan: SyncPlan,
+        checkpoint_size: int,
+        cascades: Collection[str] = (),
+        budget: SyncBudget | None = None,
+    ) -> None:
+        self.checkpoint_size = checkpoint_size
+        self.cascades = cascades
+        self.budget = budget
+        self.deferred: dict[str, int] = defaultdict(int)
+        self._steps: deque[SyncStep] = deque()
+        # Steps by (model name, operation) and their turns, with a budget.
+        self._queues: dict[tuple[str, str], deque[SyncStep]] = defaultdict(deque)
+        self._turns = deque(SYNC_PHASES)
+        # Creates and updates waiting for their parent, by (parent name, pk).
+        self._waiting: dict[tuple[str, int], list[tuple[str, str, SyncStatusMixin]]]
+        self._waiting = defaultdict(list)
+        # Deletes to push before their parent, by (parent name, pk).
+        self._child_deletes: dict[tuple[str, int], list[SyncStatusMixin]]
+        self._child_deletes = defaultdict(list)
+        # Parents with a child whose delete failed, by parent name.
+        self._blocked: dict[str, set[int]] = defaultdict(set)
+        for name, operation in SYNC_PHASES:
+            objects = plan.objects(name, operation)
+            if budget is not None:
+                dirty_since = plan.dirty_since[name]
+                objects = sorted(objects, key=lambda obj: dirty_since.get(obj.pk, 0))
+            if name in SYNC_DEPENDENCIES:
+                objects = self._hold_dependents(plan, name, operation, objects)
+            if operation == "delete":
+                self._add_deletes(name, objects)
+            else:
+                for step in self._make_steps(name, operation, objects):
+                    self._queue(step).append(step)
+
+    def __iter__(self) -> Iterator[SyncStep]:
+        while (step := self._next_step()) is not None:
+            yield step
+
+    def complete(self, step: SyncStep, synced: Collection[SyncStatusMixin]) -> None:
+        synced_ids = {obj.pk for obj in synced}
+        next_steps = []
+        if step.operation == "create":
+            next_steps.extend(self._release_dependents(step, synced_ids))
+        elif step.name in SYNC_DEPENDENCIES:
+            parent, attname = SYNC_DEPENDENCIES[step.name]
+            self._blocked[parent].update(
+                getattr(obj, attname)
+                for obj in step.objects
+                if obj.pk not in synced_ids
+            )
+        if step.followup is not None:
+            blocked = self._blocked[step.followup.name]
+            parents = [obj for obj in step.followup.objects if obj.pk not in blocked]
+            self.deferred[step.followup.name] += len(step.followup.objects) - len(
+                parents
+            )
+            if parents:
+                next_steps.append(step.followup._replace(objects=parents))
+        for next_step in reversed(next_steps):
+            self._queue(next_step).appendleft(next_step)
+
+    def resolve_cascaded(
+        self, step: SyncStep, synced: Collection[SyncStatusMixin]
+    ) -> SyncStep | None:
+        """
+        Returns the deletes cascaded by the remote from the objects of `step`
+        that were deleted, if any.
+        """
+        if step.cascaded is None:
+            return None
+        synced_ids = {obj.pk for obj in synced}
+        _, attname = SYNC_DEPENDENCIES[step.cascaded.name]
+        children = [
+            obj for obj in step.cascaded.objects if getattr(obj, attname) in synced_ids
+        ]
+        self.deferred[step.cascaded.name] += len(step.cascaded.objects) - len(children)
+        return step.cascaded._replace(objects=children) if children else None
+
+    def _release_dependents(
+        self, step: SyncStep, synced_ids: set[int]
+    ) -> list[SyncStep]:
+        """
+        Returns the steps of the objects waiting for the ones created by
+        `step`, deferring the ones whose parent failed.
+        """
+        released = defaultdict(list)
+        for obj in step.objects:
+            for name, operation, dependent in self._waiting.pop(
+                (step.name, obj.pk), ()
+            ):
+                if obj.pk in synced_ids:
+                    released[(name, operation)].append(dependent)
+                else:
+                    self.deferred[name] += 1
+        return [
+            next_step
+            for name, operation in SYNC_PHASES
+            if (dependents := released.get((name, operation)))
+            for next_step in self._make_steps(name, operation, dependents)
+        ]
+
+    def _queue(self, step: SyncStep) -> deque[SyncStep]:
+        if self.budget is None:
+            return self._steps
+        return self._queues[(step.name, step.operation)]
+
+    def _next_step(self) -> SyncStep | None:
+        if self.budget is None:
+            return self._steps.popleft() if self._steps else None
+        for _ in range(len(self._turns)):
+            key = self._turns[0]
+            self._turns.rotate(-1)
+            if queue := self._queues.get(key):
+                return self._take_share(queue)
+        return None
+
+    def _take_share(self, queue: deque[SyncStep]) -> SyncStep:
+        """
+        Takes the next step of `queue`, split to the share of the items left
+        in the budget of every queue with steps left. The parents deleted
+        after a split step follow its last part, and the children whose
+        delete the remote cascades are split with their parents.
+        """
+        share = None
+        if self.budget is not None and self.budget.remaining_items is not None:
+            active = sum(1 for steps in self._queues.values() if steps)
+            share = max(self.budget.remaining_items // active, 1)
+        step = queue.popleft()
+        if share is None or len(step.objects) <= share:
+            return step
+        head = step._replace(objects=step.objects[:share], followup=None)
+        rest = step._replace(objects=step.objects[share:])
+        queue.appendleft(self._keep_own_cascaded(rest))
+        return self._keep_own_cascaded(head)
+
+    def _keep_own_cascaded(self, step: SyncStep) -> SyncStep:
+        """Returns `step` cascading only the deletes of its objects children."""
+        if step.cascaded is None:
+            return step
+        ids = {obj.pk for obj in step.objects}
+        _, attname = SYNC_DEPENDENCIES[step.cascaded.name]
+        children = [
+            obj for obj in step.cascaded.objects if getattr(obj, attname) in ids
+        ]
+        return step._replace(
+            cascaded=step.cascaded._replace(objects=children) if children else None
+        )
+
+    def _make_steps(
+        self, name: str, operation: str, objects: list[SyncStatusMixin]
+    ) -> list[SyncStep]:
+        return [
+            SyncStep(name, operation, objects[start : start + self.checkpoint_size])
+            for start in range(0, len(objects), self.checkpoint_size)
+        ]
+
+    def _hold_dependents(
+        self,
+        plan: SyncPlan,
+        name: str,
+        operation: str,
+        objects: list[SyncStatusMixin],
+    ) -> list[SyncStatusMixin]:
+        """Holds back the objects that have to wait for their parent."""
+        parent, attname = SYNC_DEPENDENCIES[name]
+        if operation == "delete":
+            deleting = {obj.pk for obj in plan.objects(parent, "delete")}
+            ready = []
+            for obj in objects:
+                if getattr(obj, attname) in deleting:
+                    self._child_deletes[(parent, getattr(obj, attname))].append(obj)
+                else:
+                    ready.append(obj)
+            return ready
+        creating = {obj.pk for obj in plan.objects(parent, "create")}
+        unsynced = get_unsynced_ids(
+            parent, {getattr(obj, attname) for obj in objects} - creating
+        )
+        ready = []
+        for obj in objects:
+            parent_id = getattr(obj, attname)
+            if parent_id in creating:
+                self._waiting[(parent, parent_id)].append((name, operation, obj))
+            elif parent_id in unsynced:
+                self.deferred[name] += 1
+            else:
+                ready.append(obj)
+        return ready
+
+    def _add_deletes(self, name: str, objects: list[SyncStatusMixin]) -> None:
+        for parent_step in self._make_steps(name, "delete", objects):
+            steps = [parent_step]
+            children = [
+                child
+                for obj in parent_step.objects
+                for child in self._child_deletes.pop((name, obj.pk), ())
+            ]
+            if children and name in self.cascades:
+                child_step = SyncStep(
+                    SYNC_MODELS_NAMES[type(children[0])], "delete", children
+                )
+                steps = [parent_step._replace(cascaded=child_step)]
+            elif children:
+                steps = self._make_steps(
+                    SYNC_MODELS_NAMES[type(children[0])], "delete", children
+                )
+                steps[-1] = steps[-1]._replace(followup=parent_step)
+            for step in steps:
+                self._queue(step).append(step)
+
+
+def get_unsynced_ids(name: str, ids: set[int]) -> set[int]:
+    """Returns the ids of the objects that were never synced to the remote."""
+    if not ids:
+        return set()
+    return set(
+        SYNC_MODELS[name]
+        .all_objects.filter(pk__in=ids, status=SyncStatus.CREATED)
+        .values_list("pk", flat=True)
+    )
+
+
+def get_cascaded_ids(plan: SyncPlan, name: str, cascades: Collection[str]) -> set[int]:
+    """
+    Returns the ids of the `name` objects to delete whose delete the remote
+    cascades from the one of their parent in `plan`.
+    """
+    if name not in SYNC_DEPENDENCIES:
+        return set()
+    parent, attname = SYNC_DEPENDENCIES[name]
+    if parent not in cascades:
+        return set()
+    deleting = {obj.pk for obj in plan.objects(parent, "delete")}
+    return {
+        obj.pk
+        for obj in plan.objects(name, "delete")
+        if getattr(obj, attname) in deleting
+    }
@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from blog.remote_api import AsyncJSONAPIClient
 from blog.remote_api import JSONAPIClient
 
 User = get_user_model()
@@ -36,6 +37,11 @@ def json_api_client(httpx_client: httpx.Client) -> JSONAPIClient:
     return JSONAPIClient(httpx_client, "http://test/blog")
 
 
+@pytest.fixture()
+def async_json_api_client() -> AsyncJSONAPIClient:
+    return AsyncJSONAPIClient(httpx.AsyncClient(), "http://test/blog")
+
+
 @pytest.fixture()
 def api_urls() -> dict[str, str]:
     return {"posts": "https://posts_url", "comments": "https://comments_url"}
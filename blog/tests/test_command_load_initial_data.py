@@ -1,3 +1,4 @@
+import json
 from io import StringIO
 from unittest.mock import patch
 
@@ -6,6 +7,7 @@ import pytest
 from django.core.management import CommandError
 from django.core.management import call_command
 from django.db.utils import IntegrityError
+from pytest_django.fixtures import SettingsWrapper
 from pytest_httpx import HTTPXMock
 
 from blog.management.commands.load_initial_data import load_initial_data
@@ -13,6 +15,7 @@ from blog.management.commands.load_initial_data import load_model
 from blog.management.commands.load_initial_data import update_sequences
 from blog.models import Comment
 from blog.models import Post
+from blog.models import SyncRun
 from blog.remote_api import RemoteAPIError
 from blog.serializers import RemotePostSerializer
 from blog.tests.factories import PostFactory
@@ -103,6 +106,7 @@ def test_command_load_initial_data(
     assert Comment.objects.count() == num_expected_comments
     assert Post.objects.synced().count() == num_expected_posts
     assert Comment.objects.synced().count() == num_expected_comments
+    assert not Post.objects.filter(sync_hash="").exists()
 
 
 @pytest.mark.django_db(transaction=True, reset_sequences=True)
@@ -209,3 +213,47 @@ def test_load_initia_data(
     # Loaded data status == SYNCED
     assert Post.objects.synced().count() == num_expected_posts
     assert Comment.objects.synced().count() == num_expected_comments
+
+
+@pytest.mark.django_db(transaction=True, reset_sequences=True)
+def test_command_load_initial_data_records_run_and_json_output(
+    httpx_mock: HTTPXMock,
+    api_urls: dict[str, str],
+    posts_response: dict,
+    comments_response: dict,
+    settings: SettingsWrapper,
+) -> None:
+    settings.BLOG_SYNC_RUN_HISTORY = True
+    httpx_mock.add_response(method="GET", url=api_urls["posts"], json=posts_response)
+    httpx_mock.add_response(
+        method="GET", url=api_urls["comments"], json=comments_response
+    )
+    output = StringIO()
+    call_command(
+        "load_initial_data",
+        f"--posts-url={api_urls['posts']}",
+        f"--comments-url={api_urls['comments']}",
+        "--json",
+        stdout=output,
+    )
+    data = json.loads(output.getvalue())
+    assert (data["posts"]["created"], data["comments"]["created"]) == (2, 2)
+    run = SyncRun.objects.get()
+    assert (run.command, run.outcome, run.items_synced) == (
+        "load_initial_data",
+        SyncRun.Outcome.SUCCESS,
+        4,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_load_initial_data_records_failed_run(
+    httpx_mock: HTTPXMock, settings: SettingsWrapper
+) -> None:
+    settings.BLOG_SYNC_RUN_HISTORY = True
+    httpx_mock.add_exception(httpx.ReadTimeout("Unable to read within timeout"))
+    with pytest.raises(CommandError):
+        call_command("load_initial_data", posts_url="http://posts.test")
+    run = SyncRun.objects.get()
+    assert run.outcome == SyncRun.Outcome.FAILED
+    assert "Unable to read within timeout" in run.error
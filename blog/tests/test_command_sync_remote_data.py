@@ -1,21 +1,40 @@
+import json
+from datetime import timedelta
 from io import StringIO
+from pathlib import Path
 from unittest.mock import patch
 
 import httpx
 import pytest
 from django.core.management import CommandError
 from django.core.management import call_command
+from django.utils import timezone
+from pytest_django.fixtures import SettingsWrapper
 from pytest_httpx import HTTPXMock
 
+from blog.management.commands.sync_remote_data import DEFAULT_BATCH_SIZE
+from blog.management.commands.sync_remote_data import DEFAULT_CHECKPOINT_SIZE
+from blog.management.commands.sync_remote_data import DEFAULT_CHUNK_SIZE
+from blog.management.commands.sync_remote_data import async_sync_remote_data
+from blog.management.commands.sync_remote_data import commit_synced
+from blog.management.commands.sync_remote_data import format_report
+from blog.management.commands.sync_remote_data import record_runs
 from blog.management.commands.sync_remote_data import sync_remote_data
+from blog.management.commands.sync_remote_data import threaded_sync_remote_data
 from blog.management.commands.sync_remote_data import update_synced_models
 from blog.managers import SyncStatus
 from blog.models import Comment
 from blog.models import Post
+from blog.models import SyncOutbox
+from blog.models import SyncRun
 from blog.remote_api import RemoteAPIError
 from blog.serializers import RemotePostSerializer
+from blog.sync_budget import SyncBudget
+from blog.sync_planner import OutboxLease
+from blog.sync_reports import ConnectionStats
 from blog.sync_reports import SyncBlogReport
 from blog.sync_reports import SyncModelReport
+from blog.sync_reports import WorkerReport
 from blog.tests.factories import CommentFactory
 from blog.tests.factories import PostFactory
 
@@ -99,6 +118,65 @@ def test_command_sync_remote_data_syncs_new_instances(
     assert post.status == SyncStatus.SYNCED
 
 
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_with_lease(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    posts = PostFactory.create_batch(3)
+    SyncOutbox.objects.for_model(Post).filter(object_id=posts[0].pk).update(
+        leased_by="other-worker", lease_expires_at=timezone.now() + timedelta(hours=1)
+    )
+    for post in posts[1:]:
+        httpx_mock.add_response(
+            method="POST",
+            url=api_urls["posts"],
+            json=RemotePostSerializer(post).data,
+            status_code=201,
+        )
+    report = sync_remote_data(
+        httpx_client,
+        api_urls["posts"],
+        api_urls["comments"],
+        lease=OutboxLease("worker"),
+    )
+    assert report.posts.created == 2  # noqa: PLR2004
+    assert list(Post.objects.synced().order_by("pk")) == posts[1:]
+    entry = SyncOutbox.objects.get()
+    assert (entry.object_id, entry.leased_by) == (posts[0].pk, "other-worker")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_releases_lease_of_failed_objects(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    PostFactory.create()
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], status_code=400)
+    report = sync_remote_data(
+        httpx_client,
+        api_urls["posts"],
+        api_urls["comments"],
+        lease=OutboxLease("worker"),
+    )
+    assert report.posts.num_errors == 1
+    entry = SyncOutbox.objects.get()
+    assert (entry.leased_by, entry.lease_expires_at) == ("", None)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_defers_comments_of_failed_posts(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    comment = CommentFactory()
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], status_code=400)
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.posts.num_errors == 1
+    assert report.comments.deferred == 1
+    assert len(httpx_mock.get_requests()) == 1
+    comment.refresh_from_db()
+    assert comment.status == SyncStatus.CREATED
+    assert SyncOutbox.objects.for_model(Comment).filter(object_id=comment.pk).exists()
+
+
 @pytest.mark.django_db(transaction=True)
 def test_command_sync_remote_data_does_not_syncs_new_instances_status_if_error(
     httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
@@ -196,6 +274,40 @@ def test_command_sync_remote_data_does_not_delete_deleted_instances_if_error(
     assert post.status == SyncStatus.DELETED
 
 
+@pytest.mark.parametrize("status_code", [204, 400])
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_resolves_comments_cascaded_by_post_delete(
+    httpx_mock: HTTPXMock,
+    httpx_client: httpx.Client,
+    api_urls: dict[str, str],
+    settings,
+    status_code: int,
+) -> None:
+    settings.BLOG_SYNC_CASCADE_DELETES = ["posts"]
+    post = Post.objects.bulk_create(
+        PostFactory.build_batch(1, status=SyncStatus.SYNCED)
+    )[0]
+    Comment.objects.bulk_create(
+        CommentFactory.build_batch(3, post=post, status=SyncStatus.SYNCED)
+    )
+    post.delete()
+    httpx_mock.add_response(
+        method="DELETE", url=f"{api_urls['posts']}/{post.pk}", status_code=status_code
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert len(httpx_mock.get_requests()) == 1
+    assert report.comments.deleted == 0
+    if status_code == 204:  # noqa: PLR2004
+        assert (report.posts.deleted, report.comments.cascaded) == (1, 3)
+        assert "3 deletes cascaded" in format_report("comments", report.comments)
+        assert not Comment.all_objects.exists()
+        assert not SyncOutbox.objects.exists()
+    else:
+        assert (report.comments.cascaded, report.comments.deferred) == (0, 3)
+        assert Comment.deleted.count() == 3  # noqa: PLR2004
+        assert SyncOutbox.objects.for_model(Comment).count() == 3  # noqa: PLR2004
+
+
 @pytest.mark.parametrize(
     ("created", "updated", "deleted", "errors", "expected_output"),
     [
@@ -331,3 +443,850 @@ def test_update_synced_models() -> None:
     assert post_updated.status == SyncStatus.SYNCED
     comment_updated.refresh_from_db()
     assert comment_updated.status == SyncStatus.SYNCED
+
+
+def test_command_sync_remote_data_concurrency_arg() -> None:
+    with (
+        patch(
+            "blog.management.commands.sync_remote_data.async_sync_remote_data",
+            return_value=SyncBlogReport(
+                SyncModelReport(0, 0, 0, []), SyncModelReport(0, 0, 0, [])
+            ),
+        ) as async_mock,
+        patch("blog.management.commands.sync_remote_data.sync_remote_data") as mock,
+    ):
+        call_command("sync_remote_data", "--concurrency=5", stdout=StringIO())
+    mock.assert_not_called()
+    async_mock.assert_called_once_with(
+        "https://jsonplaceholder.typicode.com/posts",
+        "https://jsonplaceholder.typicode.com/comments",
+        5,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+        checkpoint_size=DEFAULT_CHECKPOINT_SIZE,
+    )
+
+
+def test_command_sync_remote_data_invalid_concurrency_arg() -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--concurrency=0")
+    assert str(exc_info.value) == "--concurrency must be a positive integer"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_sync_remote_data(
+    httpx_mock: HTTPXMock, api_urls: dict[str, str]
+) -> None:
+    posts = PostFactory.create_batch(3)
+    comment = CommentFactory.create(post=posts[0])
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    httpx_mock.add_response(method="POST", url=api_urls["comments"], json={})
+    report = async_sync_remote_data(api_urls["posts"], api_urls["comments"], 2)
+    assert report.posts.created == len(posts)
+    assert report.comments.created == 1
+    assert report.success
+    comment.refresh_from_db()
+    assert comment.status == SyncStatus.SYNCED
+    assert Post.objects.synced().count() == len(posts)
+
+
+def test_command_sync_remote_data_workers_arg() -> None:
+    with (
+        patch(
+            "blog.management.commands.sync_remote_data.threaded_sync_remote_data",
+            return_value=SyncBlogReport(
+                SyncModelReport(0, 0, 0, []), SyncModelReport(0, 0, 0, [])
+            ),
+        ) as threaded_mock,
+        patch("blog.management.commands.sync_remote_data.sync_remote_data") as mock,
+    ):
+        call_command("sync_remote_data", "--workers=4", stdout=StringIO())
+    mock.assert_not_called()
+    threaded_mock.assert_called_once()
+    expected_workers = 4
+    assert threaded_mock.call_args.args[1:] == (
+        "https://jsonplaceholder.typicode.com/posts",
+        "https://jsonplaceholder.typicode.com/comments",
+        expected_workers,
+    )
+
+
+def test_command_sync_remote_data_workers_and_concurrency_args() -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--workers=2", "--concurrency=2")
+    expected_error_message = "--concurrency and --workers can't be used together"
+    assert str(exc_info.value) == expected_error_message
+
+
+@pytest.mark.django_db(transaction=True)
+def test_threaded_sync_remote_data(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    posts = PostFactory.create_batch(3)
+    comment = CommentFactory.create(post=posts[0])
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    httpx_mock.add_response(method="POST", url=api_urls["comments"], json={})
+    report = threaded_sync_remote_data(
+        httpx_client, api_urls["posts"], api_urls["comments"], 2
+    )
+    assert report.posts.created == len(posts)
+    assert report.comments.created == 1
+    assert sum(worker.items for worker in report.workers) == len(posts) + 1
+    comment.refresh_from_db()
+    assert comment.status == SyncStatus.SYNCED
+
+
+def test_process_report_with_workers() -> None:
+    output = StringIO()
+    blog_report = SyncBlogReport(
+        SyncModelReport(0, 0, 0, []),
+        SyncModelReport(0, 0, 0, []),
+        [WorkerReport("sync-worker_0", 10, 2.0)],
+    )
+    with patch(
+        "blog.management.commands.sync_remote_data.sync_remote_data",
+        return_value=blog_report,
+    ):
+        call_command("sync_remote_data", stdout=output)
+    assert "sync-worker_0: 10 items in 2.00s (5.00 items/s)" in output.getvalue()
+
+
+def test_process_report_with_connection_stats() -> None:
+    output = StringIO()
+    stats = ConnectionStats()
+    stats.trace("connection.connect_tcp.complete", {})
+    for _ in range(3):
+        stats.trace("http11.send_request_headers.started", {})
+    blog_report = SyncBlogReport(
+        SyncModelReport(0, 0, 0, []), SyncModelReport(0, 0, 0, [])
+    )
+    with (
+        patch(
+            "blog.management.commands.sync_remote_data.sync_remote_data",
+            return_value=blog_report,
+        ),
+        patch(
+            "blog.management.commands.sync_remote_data.ConnectionStats",
+            return_value=stats,
+        ),
+    ):
+        call_command("sync_remote_data", stdout=output)
+    assert (
+        "HTTP connections: 1 opened for 3 requests, 2 reused (HTTP/1.1)"
+        in output.getvalue()
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_pushes_in_chunks(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    posts = PostFactory.create_batch(5)
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    with patch(
+        "blog.management.commands.sync_remote_data.commit_synced",
+        wraps=commit_synced,
+    ) as commit_mock:
+        report = sync_remote_data(
+            httpx_client, api_urls["posts"], api_urls["comments"], chunk_size=2
+        )
+    assert report.posts.created == len(posts)
+    committed = [
+        [obj.pk for obj in call.args[2]]
+        for call in commit_mock.call_args_list
+        if call.args[0] is Post and call.args[2]
+    ]
+    assert committed == [
+        [posts[0].pk, posts[1].pk],
+        [posts[2].pk, posts[3].pk],
+        [posts[4].pk],
+    ]
+    assert Post.objects.synced().count() == len(posts)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_commits_previous_chunks_on_failure(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    posts = PostFactory.create_batch(3)
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    httpx_mock.add_exception(RuntimeError("killed"), method="POST")
+    with pytest.raises(RuntimeError):
+        sync_remote_data(
+            httpx_client, api_urls["posts"], api_urls["comments"], chunk_size=1
+        )
+    assert list(Post.objects.synced().values_list("pk", flat=True)) == [posts[0].pk]
+    assert Post.objects.created().count() == len(posts) - 1
+
+
+def test_command_sync_remote_data_invalid_chunk_size_arg() -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--chunk-size=0")
+    assert str(exc_info.value) == "--chunk-size must be a positive integer"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_stops_when_budget_is_used_up(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    posts = PostFactory.create_batch(3)
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    report = sync_remote_data(
+        httpx_client,
+        api_urls["posts"],
+        api_urls["comments"],
+        checkpoint_size=1,
+        budget=SyncBudget(max_items=2),
+    )
+    assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+    assert report.budget_exhausted
+    assert report.backlog_after == 1
+    assert list(SyncOutbox.objects.values_list("object_id", flat=True)) == [posts[2].pk]
+    output = StringIO()
+    with patch(
+        "blog.management.commands.sync_remote_data.sync_remote_data",
+        return_value=report,
+    ):
+        call_command("sync_remote_data", "--max-items=2", stdout=output)
+    assert "Sync budget used up, 1 pending changes" in output.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_budget_is_shared_with_models_behind_a_backlog(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    posts = Post.objects.bulk_create(
+        PostFactory.build_batch(2, status=SyncStatus.SYNCED)
+    )
+    Comment.objects.bulk_create(
+        CommentFactory.build_batch(20, post=posts[0], status=SyncStatus.SYNCED)
+    )
+    # The older comment updates span several chunks.
+    Comment.objects.update(body="new body")
+    Post.objects.update(title="new title")
+    httpx_mock.add_response(method="PUT", json={})
+    report = sync_remote_data(
+        httpx_client,
+        api_urls["posts"],
+        api_urls["comments"],
+        chunk_size=10,
+        budget=SyncBudget(max_items=6),
+    )
+    assert (report.posts.updated, report.comments.updated) == (2, 4)
+    assert report.budget_exhausted
+
+
+def test_command_sync_remote_data_budget_args() -> None:
+    with patch("blog.management.commands.sync_remote_data.sync_remote_data") as mock:
+        call_command(
+            "sync_remote_data",
+            "--max-duration=1.5",
+            "--max-items=10",
+            stdout=StringIO(),
+        )
+    budget = mock.call_args.kwargs["budget"]
+    assert (budget.max_duration, budget.max_items) == (1.5, 10)
+
+
+@pytest.mark.parametrize(
+    ("arg", "error_msg"),
+    [
+        ("--max-items=0", "--max-items must be a positive integer"),
+        ("--max-duration=0", "--max-duration must be positive"),
+    ],
+)
+def test_command_sync_remote_data_invalid_budget_args(arg: str, error_msg: str) -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", arg)
+    assert str(exc_info.value) == error_msg
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_uses_batch_urls(
+    httpx_mock: HTTPXMock,
+    httpx_client: httpx.Client,
+    api_urls: dict[str, str],
+    settings,
+) -> None:
+    batch_url = "https://posts_url/bulk"
+    settings.BLOG_SYNC_BATCH_URLS = {"posts": {"create": batch_url}}
+    posts = PostFactory.create_batch(3)
+    httpx_mock.add_response(
+        method="POST",
+        url=batch_url,
+        json=[{"status": 201}, {"status": 201}],
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=batch_url,
+        json=[{"status": 400, "error": "invalid"}],
+    )
+    report = sync_remote_data(
+        httpx_client, api_urls["posts"], api_urls["comments"], batch_size=2
+    )
+    expected_synced = 2
+    assert report.posts.created == expected_synced
+    assert report.posts.errors == [
+        f"Error creating post[pk={posts[2].pk}]: Remote error 400: invalid"
+    ]
+    assert Post.objects.synced().count() == expected_synced
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_acknowledges_outbox_entries(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    synced_post, failed_post = PostFactory.create_batch(2)
+    httpx_mock.add_response(
+        method="POST",
+        url=api_urls["posts"],
+        match_json=RemotePostSerializer(synced_post).data,
+        json={},
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=api_urls["posts"],
+        match_json=RemotePostSerializer(failed_post).data,
+        status_code=500,
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.posts.created == 1
+    assert report.posts.num_errors == 1
+    assert list(SyncOutbox.objects.values_list("object_id", flat=True)) == [
+        failed_post.pk
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_only_pushes_objects_in_outbox(
+    httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    post = PostFactory()
+    SyncOutbox.objects.all().delete()
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.num_items_synced == 0
+    post.refresh_from_db()
+    assert post.status == SyncStatus.CREATED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_acknowledges_entries_of_missing_objects(
+    httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    post = PostFactory()
+    Post.all_objects.filter(pk=post.pk).delete()
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.num_items_synced == 0
+    assert not SyncOutbox.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_coalesces_changes(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    post = PostFactory()
+    post.title = "edited"
+    post.save()
+    discarded_post = PostFactory()
+    CommentFactory(post=discarded_post)
+    discarded_post.delete()
+    httpx_mock.add_response(
+        method="POST",
+        url=api_urls["posts"],
+        match_json=RemotePostSerializer(post).data,
+        json={},
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert len(httpx_mock.get_requests()) == 1
+    assert report.posts.created == 1
+    assert report.posts.deleted == 0
+    assert report.posts.avoided == 3  # noqa: PLR2004
+    assert report.comments.avoided == 2  # noqa: PLR2004
+    assert not Post.all_objects.filter(pk=discarded_post.pk).exists()
+    assert not Comment.all_objects.exists()
+    assert not SyncOutbox.objects.exists()
+
+
+def test_format_report_with_avoided_calls() -> None:
+    report = SyncModelReport(1, 0, 0, [], avoided=3)
+    assert format_report("posts", report) == (
+        "posts (created=1, updated=0, deleted=0) 3 remote calls avoided"
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_puts_whole_objects_by_default(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    post = PostFactory()
+    post.sync()
+    post.title = "new title"
+    post.save()
+    httpx_mock.add_response(
+        method="PUT", url=api_urls["posts"] + f"/{post.pk}", json={}
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.posts.updated == 1
+    request = httpx_mock.get_request()
+    assert request is not None
+    assert json.loads(request.content)["body"] == post.body
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_patches_changed_fields(
+    settings,
+    httpx_mock: HTTPXMock,
+    httpx_client: httpx.Client,
+    api_urls: dict[str, str],
+) -> None:
+    settings.BLOG_SYNC_PARTIAL_UPDATES = True
+    post = PostFactory()
+    post.sync()
+    post.title = "new title"
+    post.save()
+    httpx_mock.add_response(
+        method="PATCH",
+        url=api_urls["posts"] + f"/{post.pk}",
+        match_json={"title": "new title"},
+        json={},
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.posts.updated == 1
+    post.refresh_from_db()
+    assert post.status == SyncStatus.SYNCED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_skips_unchanged_updates(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    post = PostFactory()
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    post.refresh_from_db()
+    assert post.sync_hash
+    Post.objects.filter(pk=post.pk).update(title=post.title, status=SyncStatus.UPDATED)
+    post.refresh_from_db()
+    assert post.status == SyncStatus.UPDATED
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert len(httpx_mock.get_requests()) == 1
+    assert report.posts.updated == 0
+    assert report.posts.skipped == 1
+    post.refresh_from_db()
+    assert post.status == SyncStatus.SYNCED
+    assert not SyncOutbox.objects.exists()
+
+
+def test_format_report_with_skipped_objects() -> None:
+    report = SyncModelReport(0, 1, 0, [], avoided=1, skipped=2)
+    assert format_report("posts", report) == (
+        "posts (created=0, updated=1, deleted=0) "
+        "1 remote calls avoided, 2 unchanged skipped"
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_reports_retries_and_open_circuit(
+    httpx_mock: HTTPXMock,
+    httpx_client: httpx.Client,
+    api_urls: dict[str, str],
+    settings,
+) -> None:
+    settings.BLOG_SYNC_MAX_RETRIES = 1
+    settings.BLOG_SYNC_RETRY_BACKOFF_FACTOR = 0
+    settings.BLOG_SYNC_CIRCUIT_BREAKER_THRESHOLD = 2
+    posts = Post.objects.bulk_create(
+        PostFactory.build_batch(3, status=SyncStatus.SYNCED)
+    )
+    Post.objects.update(title="new title")
+    httpx_mock.add_response(method="PUT", status_code=503)
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+    assert report.posts.num_errors == len(posts)
+    assert report.posts.retries == 1
+    assert report.posts.circuit_trips == 1
+    assert report.posts.rejected == 2  # noqa: PLR2004
+    assert "Circuit open" in report.posts.errors[-1]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_sends_conditional_updates(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    synced, conflicted = Post.objects.bulk_create(
+        PostFactory.build_batch(2, status=SyncStatus.SYNCED, remote_etag='"v1"')
+    )
+    Post.objects.update(title="new title")
+    httpx_mock.add_response(
+        url=f"{api_urls['posts']}/{synced.pk}",
+        match_headers={"If-Match": '"v1"'},
+        json={},
+        headers={"ETag": '"v2"'},
+    )
+    httpx_mock.add_response(
+        url=f"{api_urls['posts']}/{conflicted.pk}",
+        match_headers={"If-Match": '"v1"'},
+        status_code=412,
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert (report.posts.updated, report.posts.conflicts) == (1, 1)
+    assert "1 conflicts" in format_report("posts", report.posts)
+    synced.refresh_from_db()
+    assert synced.remote_etag == '"v2"'
+    conflicted.refresh_from_db()
+    assert conflicted.remote_etag == '"v1"'
+    assert SyncOutbox.objects.get().object_id == conflicted.pk
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_stores_etags_of_batch_writes(
+    httpx_mock: HTTPXMock,
+    httpx_client: httpx.Client,
+    api_urls: dict[str, str],
+    settings,
+) -> None:
+    batch_url = "https://posts_url/bulk"
+    settings.BLOG_SYNC_BATCH_URLS = {"posts": {"update": batch_url}}
+    tagged, untagged = Post.objects.bulk_create(
+        PostFactory.build_batch(2, status=SyncStatus.SYNCED, remote_etag='"v1"')
+    )
+    Post.objects.update(title="new title")
+    httpx_mock.add_response(
+        method="POST",
+        url=batch_url,
+        json=[{"status": 200, "etag": '"v2"'}, {"status": 200}],
+    )
+    sync_remote_data(
+        httpx_client, api_urls["posts"], api_urls["comments"], batch_size=2
+    )
+    tagged.refresh_from_db()
+    assert tagged.remote_etag == '"v2"'
+    untagged.refresh_from_db()
+    assert not untagged.remote_etag
+    # Deletes have no bulk endpoint, so they are conditional on the new ETags.
+    httpx_mock.add_response(
+        method="DELETE",
+        url=f"{api_urls['posts']}/{tagged.pk}",
+        match_headers={"If-Match": '"v2"'},
+    )
+    httpx_mock.add_response(method="DELETE", url=f"{api_urls['posts']}/{untagged.pk}")
+    Post.objects.all().delete()
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert (report.posts.deleted, report.posts.conflicts) == (2, 0)
+    delete_requests = httpx_mock.get_requests(method="DELETE")
+    assert "If-Match" not in delete_requests[1].headers
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_overwrites_conflicts(
+    httpx_mock: HTTPXMock,
+    httpx_client: httpx.Client,
+    api_urls: dict[str, str],
+    settings,
+) -> None:
+    settings.BLOG_SYNC_OVERWRITE_CONFLICTS = True
+    post = Post.objects.bulk_create(
+        PostFactory.build_batch(1, status=SyncStatus.SYNCED, remote_etag='"v1"')
+    )[0]
+    Post.objects.update(title="new title")
+    url = f"{api_urls['posts']}/{post.pk}"
+    httpx_mock.add_response(
+        url=url, match_headers={"If-Match": '"v1"'}, status_code=412
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.posts.conflicts == 1
+    post.refresh_from_db()
+    assert not post.remote_etag
+    assert SyncOutbox.objects.get().object_id == post.pk
+    httpx_mock.add_response(url=url, json={}, headers={"ETag": '"v3"'})
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert (report.posts.updated, report.posts.conflicts) == (1, 0)
+    assert "If-Match" not in httpx_mock.get_requests()[-1].headers
+    post.refresh_from_db()
+    assert post.remote_etag == '"v3"'
+
+
+def test_format_report_with_request_stats() -> None:
+    report = SyncModelReport(0, 1, 0, [])
+    report.retries = 3
+    report.circuit_trips = 1
+    report.rejected = 4
+    assert format_report("posts", report) == (
+        "posts (created=0, updated=1, deleted=0) "
+        "3 retries, circuit opened 1 times, 4 requests rejected"
+    )
+
+
+def test_format_report_with_compressed_bytes() -> None:
+    report = SyncModelReport(1, 0, 0, [])
+    report.bytes_sent, report.bytes_sent_uncompressed = 300, 1200
+    report.bytes_received, report.bytes_received_uncompressed = 500, 500
+    assert format_report("posts", report) == (
+        "posts (created=1, updated=0, deleted=0) " "300 bytes sent (1200 uncompressed)"
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_threaded_sync_remote_data_reports_concurrency_limit(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    PostFactory.create_batch(3)
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    report = threaded_sync_remote_data(
+        httpx_client, api_urls["posts"], api_urls["comments"], workers=2
+    )
+    assert report.posts.created == 3  # noqa: PLR2004
+    assert report.concurrency_limit == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_commits_checkpoints(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    posts = PostFactory.create_batch(5)
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    httpx_mock.add_exception(RuntimeError("killed"), method="POST")
+    with pytest.raises(RuntimeError):
+        sync_remote_data(
+            httpx_client, api_urls["posts"], api_urls["comments"], checkpoint_size=2
+        )
+    synced_pks = [posts[0].pk, posts[1].pk]
+    assert list(Post.objects.synced().values_list("pk", flat=True)) == synced_pks
+    assert not SyncOutbox.objects.filter(object_id__in=synced_pks).exists()
+
+    # The next run resumes with the objects not acknowledged yet.
+    httpx_mock.reset(assert_all_responses_were_requested=False)
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], json={})
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert report.posts.created == len(posts) - 2
+    assert [json.loads(request.read()) for request in httpx_mock.get_requests()] == [
+        RemotePostSerializer(post).data for post in posts[2:]
+    ]
+    assert Post.objects.synced().count() == len(posts)
+
+
+def test_command_sync_remote_data_invalid_checkpoint_size_arg() -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--checkpoint-size=0")
+    assert str(exc_info.value) == "--checkpoint-size must be a positive integer"
+
+
+@pytest.mark.django_db()
+def test_command_sync_remote_data_lease_arg() -> None:
+    with patch(
+        "blog.management.commands.sync_remote_data.sync_remote_data"
+    ) as sync_mock:
+        call_command("sync_remote_data", "--lease", "--lease-ttl=120")
+    lease = sync_mock.call_args.kwargs["lease"]
+    assert isinstance(lease, OutboxLease)
+    assert lease.ttl == 120  # noqa: PLR2004
+
+
+def test_command_sync_remote_data_invalid_lease_ttl_arg() -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--lease", "--lease-ttl=0")
+    assert str(exc_info.value) == "--lease-ttl must be positive"
+
+
+def test_command_sync_remote_data_watch_and_concurrency_args() -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--watch", "--concurrency=2")
+    assert str(exc_info.value) == "--watch can't be used with --concurrency"
+
+
+@pytest.mark.django_db()
+def test_command_sync_remote_data_watch() -> None:
+    output = StringIO()
+    with (
+        patch("blog.management.commands.sync_remote_data.SyncDaemon") as daemon_mock,
+        patch("blog.management.commands.sync_remote_data.signal.signal") as signal_mock,
+    ):
+        call_command(
+            "sync_remote_data",
+            "--watch",
+            "--workers=2",
+            "--debounce=1",
+            "--poll-interval=30",
+            stdout=output,
+        )
+    daemon_mock.return_value.run.assert_called_once()
+    sync_pass = daemon_mock.call_args.args[0]
+    assert sync_pass.func is threaded_sync_remote_data
+    assert sync_pass.args[3] == 2  # noqa: PLR2004
+    assert daemon_mock.call_args.kwargs["debounce"] == 1
+    assert daemon_mock.call_args.kwargs["catch_up"] == 30  # noqa: PLR2004
+    assert signal_mock.call_count == 2  # noqa: PLR2004
+    assert "Sync daemon stopped." in output.getvalue()
+
+
+def test_command_sync_remote_data_invalid_debounce_arg() -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--watch", "--debounce=-1")
+    assert str(exc_info.value) == "--debounce can't be negative"
+
+
+@pytest.mark.parametrize("arg", ["--poll-interval", "--heartbeat"])
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_command_sync_remote_data_invalid_interval_args(arg: str, value: str) -> None:
+    with pytest.raises(CommandError) as exc_info:
+        call_command("sync_remote_data", "--watch", f"{arg}={value}")
+    assert str(exc_info.value) == f"{arg} must be positive"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_remote_data_reports_instrumentation(
+    httpx_mock: HTTPXMock, httpx_client: httpx.Client, api_urls: dict[str, str]
+) -> None:
+    post = PostFactory.create()
+    httpx_mock.add_response(
+        method="POST",
+        url=api_urls["posts"],
+        json=RemotePostSerializer(post).data,
+        status_code=201,
+    )
+    report = sync_remote_data(httpx_client, api_urls["posts"], api_urls["comments"])
+    assert (report.backlog_before, report.backlog_after) == (1, 0)
+    assert report.duration > 0
+    assert report.posts.latencies["POST"].count == 1
+    assert set(report.posts.durations) == {"create"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_metrics_file(
+    api_urls: dict[str, str], tmp_path: Path
+) -> None:
+    textfile = tmp_path / "sync.prom"
+    call_command("sync_remote_data", f"--metrics-file={textfile}", stdout=StringIO())
+    output = textfile.read_text()
+    assert 'blog_sync_runs_total{outcome="success"} 1' in output
+    assert 'blog_sync_backlog_entries{when="after"} 0' in output
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_metrics_file_records_failures(
+    tmp_path: Path,
+) -> None:
+    textfile = tmp_path / "sync.prom"
+    with (
+        patch(
+            "blog.management.commands.sync_remote_data.sync_remote_data",
+            side_effect=RemoteAPIError("error"),
+        ),
+        pytest.raises(CommandError),
+    ):
+        call_command("sync_remote_data", f"--metrics-file={textfile}")
+    assert 'blog_sync_runs_total{outcome="failed"} 1' in textfile.read_text()
+
+
+def test_command_sync_remote_data_metrics_port_requires_watch() -> None:
+    with pytest.raises(CommandError, match="--metrics-port requires --watch"):
+        call_command("sync_remote_data", "--metrics-port=9100")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_records_run(
+    httpx_mock: HTTPXMock, api_urls: dict[str, str], settings: SettingsWrapper
+) -> None:
+    settings.BLOG_SYNC_RUN_HISTORY = True
+    PostFactory.create()
+    httpx_mock.add_response(method="POST", url=api_urls["posts"], status_code=400)
+    call_command(
+        "sync_remote_data",
+        f"--posts-url={api_urls['posts']}",
+        f"--comments-url={api_urls['comments']}",
+        stdout=StringIO(),
+    )
+    run = SyncRun.objects.get()
+    assert (run.command, run.outcome, run.num_errors) == (
+        "sync_remote_data",
+        SyncRun.Outcome.PARTIAL,
+        1,
+    )
+    assert run.report["posts"]["errors_by_operation"] == {"create": 1}
+    assert run.report["backlog_after"] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_records_failed_run(
+    settings: SettingsWrapper,
+) -> None:
+    settings.BLOG_SYNC_RUN_HISTORY = True
+    with (
+        patch(
+            "blog.management.commands.sync_remote_data.sync_remote_data",
+            side_effect=RemoteAPIError("remote down"),
+        ),
+        pytest.raises(CommandError),
+    ):
+        call_command("sync_remote_data")
+    run = SyncRun.objects.get()
+    assert (run.outcome, run.error) == (SyncRun.Outcome.FAILED, "remote down")
+
+
+@pytest.mark.django_db()
+def test_record_runs_skips_idle_runs() -> None:
+    idle_report = SyncBlogReport(
+        SyncModelReport(0, 0, 0, []), SyncModelReport(0, 0, 0, [])
+    )
+    busy_report = SyncBlogReport(
+        SyncModelReport(1, 0, 0, []), SyncModelReport(0, 0, 0, [])
+    )
+    record_runs(lambda: idle_report, skip_idle=True)()
+    assert not SyncRun.objects.exists()
+    record_runs(lambda: idle_report)()
+    record_runs(lambda: busy_report, skip_idle=True)()
+    assert SyncRun.objects.count() == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_json_output(api_urls: dict[str, str]) -> None:
+    output = StringIO()
+    call_command("sync_remote_data", "--json", stdout=output)
+    data = json.loads(output.getvalue())
+    assert data["success"]
+    assert data["posts"]["created"] == 0
+    assert data["connections"]["requests"] == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_plan(
+    httpx_mock: HTTPXMock, api_urls: dict[str, str]
+) -> None:
+    post = PostFactory.create()
+    output = StringIO()
+    call_command(
+        "sync_remote_data",
+        "--plan",
+        "--workers=2",
+        f"--posts-url={api_urls['posts']}",
+        stdout=output,
+    )
+    assert not httpx_mock.get_requests()
+    expected_output_lines = (
+        "Sync plan (dry run, nothing was sent):",
+        "posts create: 1 objects in 1 requests",
+        "Estimated 1 requests sending",
+        "with 2 concurrent requests",
+    )
+    for line in expected_output_lines:
+        assert line in output.getvalue()
+    post.refresh_from_db()
+    assert post.status == SyncStatus.CREATED
+    assert SyncOutbox.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_command_sync_remote_data_plan_json_output() -> None:
+    CommentFactory.create()
+    output = StringIO()
+    call_command("sync_remote_data", "--plan", "--json", stdout=output)
+    data = json.loads(output.getvalue())
+    assert data["requests"] == 2  # noqa: PLR2004
+    assert data["operations"]["comments create"]["objects"] == 1
+
+
+def test_command_sync_remote_data_plan_and_watch_args() -> None:
+    with pytest.raises(CommandError, match="--plan can't be used with --watch"):
+        call_command("sync_remote_data", "--plan", "--watch")
@@ -0,0 +1,111 @@
+import json
+from io import StringIO
+from typing import Any
+
+import httpx
+import pytest
+from django.core.management import CommandError
+from django.core.management import call_command
+from pytest_httpx import HTTPXMock
+
+from blog.models import Comment
+from blog.models import Post
+from blog.models import SyncOutbox
+from blog.models import SyncStatus
+from blog.serializers import RemoteCommentSerializer
+from blog.serializers import RemotePostSerializer
+from blog.tests.factories import CommentFactory
+from blog.tests.factories import PostFactory
+
+
+@pytest.fixture()
+def synced_data() -> tuple[list[Post], list[Comment]]:
+    posts = Post.objects.bulk_create(
+        PostFactory.build_batch(3, status=SyncStatus.SYNCED)
+    )
+    comments = Comment.objects.bulk_create(
+        CommentFactory.build_batch(2, post=posts[0], status=SyncStatus.SYNCED)
+    )
+    return posts, comments
+
+
+def add_remote_responses(
+    httpx_mock: HTTPXMock,
+    api_urls: dict[str, str],
+    posts: Any,
+    comments: Any,
+) -> None:
+    httpx_mock.add_response(method="GET", url=api_urls["posts"], json=posts)
+    httpx_mock.add_response(method="GET", url=api_urls["comments"], json=comments)
+
+
+@pytest.mark.django_db()
+def test_command_verify_remote_consistency(
+    httpx_mock: HTTPXMock,
+    api_urls: dict[str, str],
+    synced_data: tuple[list[Post], list[Comment]],
+) -> None:
+    posts, comments = synced_data
+    remote_posts = RemotePostSerializer(posts, many=True).data
+    add_remote_responses(
+        httpx_mock,
+        api_urls,
+        remote_posts,
+        RemoteCommentSerializer(comments, many=True).data,
+    )
+    output = StringIO()
+    call_command(
+        "verify_remote_consistency",
+        posts_url=api_urls["posts"],
+        comments_url=api_urls["comments"],
+        stdout=output,
+    )
+    assert "Local data matches the remote." in output.getvalue()
+    assert "posts: 3 local and 3 remote objects compared" in output.getvalue()
+
+
+@pytest.mark.django_db()
+def test_command_verify_remote_consistency_enqueues_divergent_objects(
+    httpx_mock: HTTPXMock,
+    api_urls: dict[str, str],
+    synced_data: tuple[list[Post], list[Comment]],
+) -> None:
+    posts, comments = synced_data
+    remote_posts = RemotePostSerializer(posts, many=True).data
+    remote_posts[0]["title"] = "remote title"
+    add_remote_responses(
+        httpx_mock,
+        api_urls,
+        remote_posts,
+        RemoteCommentSerializer(comments[:1], many=True).data,
+    )
+    output = StringIO()
+    call_command(
+        "verify_remote_consistency",
+        "--enqueue",
+        "--json",
+        posts_url=api_urls["posts"],
+        comments_url=api_urls["comments"],
+        stdout=output,
+    )
+    data = json.loads(output.getvalue())
+    assert data["posts"]["divergent"] == [posts[0].pk]
+    assert data["comments"]["missing"] == [comments[1].pk]
+    assert set(SyncOutbox.objects.values_list("object_id", "operation")) == {
+        (posts[0].pk, SyncStatus.UPDATED),
+        (comments[1].pk, SyncStatus.CREATED),
+    }
+
+
+@pytest.mark.django_db()
+def test_command_verify_remote_consistency_error(
+    httpx_mock: HTTPXMock, api_urls: dict[str, str]
+) -> None:
+    httpx_mock.add_exception(httpx.ReadTimeout("Unable to read within timeout"))
+    with pytest.raises(CommandError, match="Unable to read within timeout"):
+        call_command("verify_remote_consistency", posts_url=api_urls["posts"])
+
+
+def test_command_verify_remote_consistency_invalid_bucket_size() -> None:
+    with pytest.raises(CommandError, match="--bucket-size"):
+        call_command("verify_remote_consistency", bucket_size=0)
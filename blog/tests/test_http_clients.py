@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from pytest_django.fixtures import SettingsWrapper
+from pytest_httpx import HTTPXMock
+
+from blog.http_clients import RequestCompression
+from blog.http_clients import create_async_client
+from blog.http_clients import create_client
+from blog.http_clients import format_connection_stats
+from blog.http_clients import get_http_options
+from blog.sync_reports import ConnectionStats
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def server_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_http_options(settings: SettingsWrapper) -> None:
+    settings.BLOG_HTTP_MAX_CONNECTIONS = 4
+    settings.BLOG_HTTP_KEEPALIVE_EXPIRY = 90
+    settings.BLOG_HTTP_CONNECT_TIMEOUT = 2
+    settings.BLOG_HTTP_READ_TIMEOUT = 20
+    options = get_http_options()
+    assert options["limits"] == httpx.Limits(
+        max_connections=4, max_keepalive_connections=4, keepalive_expiry=90
+    )
+    assert options["timeout"] == httpx.Timeout(20, connect=2)
+    assert get_http_options(8)["limits"].max_connections == 8  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("setting", "available", "expected"),
+    [(True, True, True), (True, False, False), (False, True, False)],
+)
+def test_get_http_options_http2(
+    settings: SettingsWrapper,
+    setting: bool,  # noqa: FBT001
+    available: bool,  # noqa: FBT001
+    expected: bool,  # noqa: FBT001
+) -> None:
+    settings.BLOG_HTTP2 = setting
+    with patch("blog.http_clients.http2_available", return_value=available):
+        assert get_http_options()["http2"] is expected
+
+
+def test_create_client_traces_requests(httpx_mock: HTTPXMock) -> None:
+    stats = ConnectionStats()
+    httpx_mock.add_response()
+    with create_client(stats=stats) as client:
+        client.get("http://test/")
+    request = httpx_mock.get_request()
+    assert request is not None
+    assert request.extensions["trace"] == stats.trace
+
+
+def test_create_client_reuses_connections(server_url: str) -> None:
+    stats = ConnectionStats()
+    with create_client(stats=stats) as client:
+        for _ in range(3):
+            client.get(server_url).raise_for_status()
+    assert (stats.requests, stats.connections, stats.reused) == (3, 1, 2)
+    assert stats.http_versions == {"HTTP/1.1"}
+
+
+def test_create_async_client_reuses_connections(server_url: str) -> None:
+    stats = ConnectionStats()
+
+    async def get_all() -> None:
+        async with create_async_client(stats=stats) as client:
+            for _ in range(3):
+                (await client.get(server_url)).raise_for_status()
+
+    asyncio.run(get_all())
+    assert (stats.requests, stats.connections, stats.reused) == (3, 1, 2)
+
+
+def test_format_connection_stats() -> None:
+    stats = ConnectionStats()
+    stats.trace("connection.connect_tcp.complete", {})
+    stats.trace("http2.send_request_headers.started", {})
+    stats.trace("http2.send_request_headers.started", {})
+    assert format_connection_stats(stats) == (
+        "HTTP connections: 1 opened for 2 requests, 1 reused (HTTP/2)"
+    )
+
+
+def test_request_compression() -> None:
+    compression = RequestCompression("gzip", min_size=100)
+    content = b"lorem ipsum " * 50
+    compressed, encoding = compression.compress(content)
+    assert encoding == "gzip"
+    assert gzip.decompress(compressed) == content
+    assert compression.compress(b"short") == (b"short", None)
+
+
+def test_request_compression_unsupported_encoding() -> None:
+    with pytest.raises(ImproperlyConfigured):
+        RequestCompression("br")
+
+
+def test_request_compression_zstd_requires_zstandard() -> None:
+    with (
+        patch("blog.http_clients.zstandard", None),
+        pytest.raises(ImproperlyConfigured),
+    ):
+        RequestCompression("zstd")
+
+
+def test_request_compression_from_settings(settings: SettingsWrapper) -> None:
+    settings.BLOG_HTTP_REQUEST_COMPRESSION = ""
+    assert RequestCompression.from_settings() is None
+    settings.BLOG_HTTP_REQUEST_COMPRESSION = "gzip"
+    settings.BLOG_HTTP_COMPRESSION_MIN_SIZE = 2048
+    compression = RequestCompression.from_settings()
+    assert compression is not None
+    assert (compression.encoding, compression.min_size) == ("gzip", 2048)
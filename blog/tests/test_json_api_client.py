@@ -1,7 +1,25 @@
+import asyncio
+import gzip
+import json
+from unittest.mock import patch
+
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
+from blog import json_backend
+from blog.http_clients import RequestCompression
+from blog.remote_api import AsyncJSONAPIClient
+from blog.remote_api import BatchItemResult
+from blog.remote_api import CircuitOpenError
 from blog.remote_api import JSONAPIClient
+from blog.remote_api import RemoteBatchError
+from blog.remote_api import RemoteConflictError
+from blog.remote_api import RemoteWriteResult
+from blog.remote_resilience import AdaptiveConcurrencyLimit
+from blog.remote_resilience import CircuitBreaker
+from blog.remote_resilience import RetryPolicy
+from blog.remote_resilience import TokenBucket
 
 
 @pytest.mark.parametrize("base_url", ["http://test/blog", "http://test/blog/"])
@@ -39,6 +57,17 @@ def test_update(json_api_client: JSONAPIClient, httpx_mock: HTTPXMock) -> None:
     assert result == expected_data
 
 
+def test_partial_update(json_api_client: JSONAPIClient, httpx_mock: HTTPXMock) -> None:
+    pk = 33
+    url = json_api_client.get_detail_url(pk)
+    expected_data = {"title": "ok"}
+    httpx_mock.add_response(
+        method="PATCH", url=url, match_json=expected_data, json=expected_data
+    )
+    result = json_api_client.partial_update(pk, data=expected_data)
+    assert result == expected_data
+
+
 def test_create(json_api_client: JSONAPIClient, httpx_mock: HTTPXMock) -> None:
     expected_data = {"test": "ok"}
     httpx_mock.add_response(
@@ -53,3 +82,357 @@ def test_delete(json_api_client: JSONAPIClient, httpx_mock: HTTPXMock) -> None:
     url = json_api_client.get_detail_url(pk)
     httpx_mock.add_response(method="DELETE", url=url, status_code=204)
     json_api_client.delete(pk)
+
+
+def test_write_sends_if_match_and_returns_strong_etag(
+    json_api_client: JSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    url = json_api_client.get_detail_url(33)
+    httpx_mock.add_response(
+        method="PUT",
+        url=url,
+        match_headers={"If-Match": '"v1"'},
+        json={"test": "ok"},
+        headers={"ETag": '"v2"'},
+    )
+    httpx_mock.add_response(method="DELETE", url=url, headers={"ETag": 'W/"v3"'})
+    result = json_api_client.write("PUT", url, {"test": "ok"}, etag='"v1"')
+    assert result == RemoteWriteResult({"test": "ok"}, '"v2"')
+    assert json_api_client.write("DELETE", url) == RemoteWriteResult(None, "")
+    assert "If-Match" not in httpx_mock.get_requests()[-1].headers
+
+
+def test_write_raises_conflict_on_failed_precondition(
+    json_api_client: JSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    pk = 33
+    httpx_mock.add_response(
+        method="DELETE", url=json_api_client.get_detail_url(pk), status_code=412
+    )
+    with pytest.raises(RemoteConflictError):
+        json_api_client.delete(pk, etag='"v1"')
+
+
+def test_async_write_raises_conflict_on_failed_precondition(
+    async_json_api_client: AsyncJSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    pk = 33
+    httpx_mock.add_response(
+        method="PUT",
+        url=async_json_api_client.get_detail_url(pk),
+        match_headers={"If-Match": '"v1"'},
+        status_code=412,
+    )
+    with pytest.raises(RemoteConflictError):
+        asyncio.run(async_json_api_client.update(pk, {"test": "ok"}, etag='"v1"'))
+
+
+def test_async_retrieve(
+    async_json_api_client: AsyncJSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    pk = 33
+    url = async_json_api_client.get_detail_url(pk)
+    expected_data = {"test": "ok"}
+    httpx_mock.add_response(method="GET", url=url, json=expected_data, status_code=200)
+    result = asyncio.run(async_json_api_client.retrieve(pk))
+    assert result == expected_data
+
+
+def test_async_retrieve_list(
+    async_json_api_client: AsyncJSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    expected_data = {"test": "ok"}
+    httpx_mock.add_response(
+        method="GET",
+        url=async_json_api_client.base_url,
+        json=expected_data,
+        status_code=200,
+    )
+    result = asyncio.run(async_json_api_client.retrieve_list())
+    assert result == expected_data
+
+
+def test_async_update(
+    async_json_api_client: AsyncJSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    pk = 33
+    url = async_json_api_client.get_detail_url(pk)
+    expected_data = {"test": "ok"}
+    httpx_mock.add_response(method="PUT", url=url, json=expected_data, status_code=200)
+    result = asyncio.run(async_json_api_client.update(pk, data=expected_data))
+    assert result == expected_data
+
+
+def test_async_partial_update(
+    async_json_api_client: AsyncJSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    pk = 33
+    url = async_json_api_client.get_detail_url(pk)
+    expected_data = {"title": "ok"}
+    httpx_mock.add_response(
+        method="PATCH", url=url, match_json=expected_data, json=expected_data
+    )
+    result = asyncio.run(async_json_api_client.partial_update(pk, data=expected_data))
+    assert result == expected_data
+
+
+def test_async_create(
+    async_json_api_client: AsyncJSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    expected_data = {"test": "ok"}
+    httpx_mock.add_response(
+        method="POST",
+        url=async_json_api_client.base_url,
+        json=expected_data,
+        status_code=201,
+    )
+    result = asyncio.run(async_json_api_client.create(data=expected_data))
+    assert result == expected_data
+
+
+def test_async_delete(
+    async_json_api_client: AsyncJSONAPIClient, httpx_mock: HTTPXMock
+) -> None:
+    pk = 33
+    url = async_json_api_client.get_detail_url(pk)
+    httpx_mock.add_response(method="DELETE", url=url, status_code=204)
+    asyncio.run(async_json_api_client.delete(pk))
+
+
+@pytest.mark.parametrize(
+    ("batch_urls", "method", "expected"),
+    [
+        ({}, "create", False),
+        ({"create": ""}, "create", False),
+        ({"create": "http://test/blog/bulk"}, "create", True),
+        ({"create": "http://test/blog/bulk"}, "delete", False),
+    ],
+)
+def test_supports_batch(
+    batch_urls: dict[str, str],
+    method: str,
+    expected: bool,  # noqa: FBT001
+) -> None:
+    client = JSONAPIClient(httpx.Client(), "http://test/blog", batch_urls=batch_urls)
+    assert client.supports_batch(method) == expected
+
+
+def test_parse_batch_response() -> None:
+    data = [
+        {"status": 201, "data": {"id": 1}},
+        {"status": 400, "error": "invalid"},
+    ]
+    results = JSONAPIClient.parse_batch_response(data, 2)
+    assert results == [
+        BatchItemResult(201, {"id": 1}, None),
+        BatchItemResult(400, None, "invalid"),
+    ]
+    assert [result.ok for result in results] == [True, False]
+
+
+def test_parse_batch_response_keeps_strong_etags() -> None:
+    data = [{"status": 200, "etag": '"v2"'}, {"status": 200, "etag": 'W/"v2"'}]
+    results = JSONAPIClient.parse_batch_response(data, 2)
+    assert [result.etag for result in results] == ['"v2"', ""]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"status": 200},
+        [{"status": 200}],
+        [{"status": 200}, {"data": {}}],
+        [{"status": 200}, "ok"],
+    ],
+)
+def test_parse_batch_response_invalid_data(data) -> None:
+    with pytest.raises(RemoteBatchError):
+        JSONAPIClient.parse_batch_response(data, 2)
+
+
+def test_batch(httpx_mock: HTTPXMock) -> None:
+    url = "http://test/blog/bulk-delete"
+    client = JSONAPIClient(
+        httpx.Client(), "http://test/blog", batch_urls={"delete": url}
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=url,
+        match_json=[1, 2],
+        json=[{"status": 204}, {"status": 404, "error": "not found"}],
+    )
+    results = client.batch("delete", [1, 2])
+    assert results == [
+        BatchItemResult(204, None, None),
+        BatchItemResult(404, None, "not found"),
+    ]
+
+
+def test_async_batch(httpx_mock: HTTPXMock) -> None:
+    url = "http://test/blog/bulk-create"
+    client = AsyncJSONAPIClient(
+        httpx.AsyncClient(), "http://test/blog", batch_urls={"create": url}
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=url,
+        match_json=[{"title": "t"}],
+        json=[{"status": 201, "data": {"id": 1}}],
+    )
+    results = asyncio.run(client.batch("create", [{"title": "t"}]))
+    assert results == [BatchItemResult(201, {"id": 1}, None)]
+
+
+def test_request_retries_transient_failures(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", retry_policy=RetryPolicy(backoff_factor=0)
+    )
+    url = client.get_detail_url(1)
+    httpx_mock.add_response(method="PUT", url=url, status_code=502)
+    httpx_mock.add_response(method="PUT", url=url, status_code=503)
+    httpx_mock.add_response(method="PUT", url=url, json={"id": 1})
+    assert client.update(1, {"id": 1}) == {"id": 1}
+    assert client.stats.retries == 2  # noqa: PLR2004
+
+
+def test_request_gives_up_after_max_retries(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    client = JSONAPIClient(
+        httpx_client,
+        "http://test/blog",
+        retry_policy=RetryPolicy(max_retries=1, backoff_factor=0),
+    )
+    httpx_mock.add_response(method="DELETE", status_code=504)
+    with pytest.raises(httpx.HTTPStatusError):
+        client.delete(1)
+    assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+
+def test_request_does_not_retry_non_idempotent_failures(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", retry_policy=RetryPolicy(backoff_factor=0)
+    )
+    httpx_mock.add_response(method="POST", status_code=502)
+    with pytest.raises(httpx.HTTPStatusError):
+        client.create({})
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_request_sleeps_retry_after(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    client = JSONAPIClient(httpx_client, "http://test/blog", retry_policy=RetryPolicy())
+    httpx_mock.add_response(
+        method="POST", status_code=429, headers={"Retry-After": "2"}
+    )
+    httpx_mock.add_response(method="POST", json={})
+    with patch("blog.remote_api.time.sleep") as sleep:
+        client.create({})
+    sleep.assert_called_once_with(2.0)
+
+
+def test_request_fails_fast_when_circuit_is_open(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    client = JSONAPIClient(
+        httpx_client,
+        "http://test/blog",
+        circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60),
+    )
+    httpx_mock.add_response(method="PUT", status_code=502)
+    with pytest.raises(httpx.HTTPStatusError):
+        client.update(1, {})
+    with pytest.raises(CircuitOpenError):
+        client.update(2, {})
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_async_request_retries_transient_failures(httpx_mock: HTTPXMock) -> None:
+    client = AsyncJSONAPIClient(
+        httpx.AsyncClient(),
+        "http://test/blog",
+        retry_policy=RetryPolicy(backoff_factor=0),
+    )
+    httpx_mock.add_response(method="GET", status_code=503)
+    httpx_mock.add_response(method="GET", json=[])
+    assert asyncio.run(client.retrieve_list()) == []
+    assert client.stats.retries == 1
+
+
+def test_request_waits_for_rate_limiter(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    rate_limiter = TokenBucket(rate=10, capacity=1)
+    client = JSONAPIClient(httpx_client, "http://test/blog", rate_limiter=rate_limiter)
+    httpx_mock.add_response(method="GET", json={})
+    with patch("blog.remote_api.time.sleep") as sleep:
+        client.retrieve(1)
+        client.retrieve(2)
+    sleep.assert_called_once()
+    assert client.stats.throttled == 1
+
+
+def test_request_releases_concurrency_limit(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    concurrency_limit = AdaptiveConcurrencyLimit(max_limit=8, initial_limit=4)
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", concurrency_limit=concurrency_limit
+    )
+    httpx_mock.add_response(method="PUT", status_code=429)
+    with pytest.raises(httpx.HTTPStatusError):
+        client.update(1, {})
+    assert concurrency_limit.in_flight == 0
+    assert concurrency_limit.limit == 2  # noqa: PLR2004
+
+
+def test_request_compresses_large_bodies(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", compression=RequestCompression(min_size=100)
+    )
+    data = {"body": "lorem ipsum " * 50}
+    httpx_mock.add_response(method="POST", json={})
+    client.create(data)
+    request = httpx_mock.get_request()
+    assert request is not None
+    assert request.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(request.content)) == data
+    assert client.stats.bytes_sent == len(request.content)
+    assert client.stats.bytes_sent_uncompressed == len(json_backend.dumps(data))
+    assert client.stats.bytes_sent < client.stats.bytes_sent_uncompressed
+
+
+def test_request_does_not_compress_small_bodies(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", compression=RequestCompression(min_size=100)
+    )
+    httpx_mock.add_response(method="PUT", match_json={"title": "short"}, json={})
+    client.update(1, {"title": "short"})
+    request = httpx_mock.get_request()
+    assert request is not None
+    assert "Content-Encoding" not in request.headers
+    assert client.stats.bytes_sent == client.stats.bytes_sent_uncompressed
+
+
+def test_request_records_compressed_response_size() -> None:
+    content = json.dumps([{"body": "lorem ipsum " * 50}]).encode()
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(
+            200,
+            content=gzip.compress(content),
+            headers={"Content-Encoding": "gzip"},
+        )
+    )
+    client = JSONAPIClient(httpx.Client(transport=transport), "http://test/blog")
+    assert client.retrieve_list() == json.loads(content)
+    assert client.stats.bytes_received < len(content)
+    assert client.stats.bytes_received_uncompressed == len(content)
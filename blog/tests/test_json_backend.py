@@ -0,0 +1,65 @@
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from blog import json_backend
+from blog.parsers import FastJSONParser
+from blog.renderers import FastJSONRenderer
+
+DATA = {
+    "id": 1,
+    "title": "Ñandú\u2028line\u2029paragraph",
+    "price": Decimal("1.50"),
+    "created": datetime.datetime(2024, 5, 1, 10, 30, 15, 123456, tzinfo=datetime.UTC),
+    "date": datetime.date(2024, 5, 1),
+    "label": gettext_lazy("title"),
+    "tags": ["a", "b"],
+    "nested": {"value": None, "flag": True, "ratio": 0.25},
+}
+
+
+def test_dumps_and_loads() -> None:
+    content = json_backend.dumps(DATA)
+    assert isinstance(content, bytes)
+    assert json_backend.loads(content)["created"] == "2024-05-01T10:30:15.123456Z"
+
+
+def test_fast_json_renderer_matches_drf_renderer() -> None:
+    assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+
+
+def test_fast_json_renderer_renders_aware_datetimes_as_drf() -> None:
+    data = {"now": timezone.now()}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_fast_json_renderer_indent_falls_back_to_drf_renderer() -> None:
+    content = FastJSONRenderer().render(DATA, "application/json; indent=4")
+    assert content == JSONRenderer().render(DATA, "application/json; indent=4")
+
+
+def test_fast_json_renderer_none() -> None:
+    assert FastJSONRenderer().render(None) == b""
+
+
+def test_fast_json_parser() -> None:
+    stream = io.BytesIO('{"title": "Ñandú", "ids": [1, 2]}'.encode())
+    assert FastJSONParser().parse(stream) == {"title": "Ñandú", "ids": [1, 2]}
+
+
+@pytest.mark.parametrize("content", [b"{", b'{"value": NaN}'])
+def test_fast_json_parser_error(content: bytes) -> None:
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io.BytesIO(content))
+
+
+def test_fast_json_parser_other_encodings() -> None:
+    stream = io.BytesIO('{"title": "Ñandú"}'.encode("latin-1"))
+    data = FastJSONParser().parse(stream, parser_context={"encoding": "latin-1"})
+    assert data == {"title": "Ñandú"}
@@ -1,9 +1,23 @@
+from contextlib import suppress
+from datetime import timedelta
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
 import pytest
 from django.db import models
+from django.db import transaction
+from django.utils import timezone
 
+from blog.managers import MAX_STORED_RUN_ERRORS
+from blog.managers import SYNC_CHANNEL
 from blog.managers import DeletedManager
 from blog.managers import SyncStatusManager
+from blog.managers import notify_sync_channel
 from blog.models import Post
+from blog.models import SyncOutbox
+from blog.models import SyncRun
+from blog.sync_reports import SyncBlogReport
+from blog.sync_reports import SyncModelReport
 from blog.tests.factories import PostFactory
 
 
@@ -131,3 +145,252 @@ def test_deleted_manager_real_delete() -> None:
     num_posts_status_deleted_expected = 0
     assert Post.deleted.count() == num_posts_status_deleted_expected
     assert Post.all_objects.count() == num_posts_expected
+
+
+@pytest.mark.django_db()
+def test_sync_status_queryset_iter_chunks() -> None:
+    posts = PostFactory.create_batch(5)
+    chunks = list(Post.objects.created().iter_chunks(2))
+    assert [[post.pk for post in chunk] for chunk in chunks] == [
+        [posts[0].pk, posts[1].pk],
+        [posts[2].pk, posts[3].pk],
+        [posts[4].pk],
+    ]
+
+
+@pytest.mark.django_db()
+def test_sync_status_queryset_iter_chunks_reads_next_chunk_lazily() -> None:
+    posts = PostFactory.create_batch(4)
+    chunks = Post.objects.created().iter_chunks(2)
+    first_chunk = next(chunks)
+    Post.objects.filter(pk__in=[post.pk for post in first_chunk]).update(
+        status=Post.SyncStatus.SYNCED
+    )
+    Post.objects.filter(pk=posts[3].pk).update(status=Post.SyncStatus.SYNCED)
+    assert [[post.pk for post in chunk] for chunk in chunks] == [[posts[2].pk]]
+
+
+@pytest.mark.django_db()
+def test_sync_status_queryset_update_records_outbox_entries() -> None:
+    posts = PostFactory.create_batch(2, status=Post.SyncStatus.SYNCED)
+    SyncOutbox.objects.all().delete()
+    Post.objects.filter(pk=posts[0].pk).update(title="new title")
+    Post.objects.filter(pk=posts[1].pk).delete()
+    entries = SyncOutbox.objects.values_list("object_id", "operation")
+    assert list(entries) == [
+        (posts[0].pk, Post.SyncStatus.UPDATED),
+        (posts[1].pk, Post.SyncStatus.DELETED),
+    ]
+
+
+@pytest.mark.django_db()
+def test_sync_status_queryset_update_records_changed_fields() -> None:
+    post = PostFactory(status=Post.SyncStatus.SYNCED)
+    SyncOutbox.objects.all().delete()
+    Post.objects.filter(pk=post.pk).update(title="new title", body="new body")
+    assert SyncOutbox.objects.get().fields == ["body", "title"]
+
+
+@pytest.mark.django_db()
+def test_sync_status_queryset_update_to_synced_does_not_record_outbox_entries(
+    django_assert_num_queries,
+) -> None:
+    PostFactory.create_batch(2)
+    SyncOutbox.objects.all().delete()
+    with django_assert_num_queries(1):
+        Post.objects.update(status=Post.SyncStatus.SYNCED)
+    assert not SyncOutbox.objects.exists()
+
+
+@pytest.mark.django_db()
+def test_sync_status_queryset_bulk_create_records_dirty_objects() -> None:
+    posts = [
+        PostFactory.build(status=Post.SyncStatus.CREATED),
+        PostFactory.build(status=Post.SyncStatus.SYNCED),
+        PostFactory.build(status=Post.SyncStatus.DELETED),
+    ]
+    Post.objects.bulk_create(posts)
+    entries = SyncOutbox.objects.values_list("object_id", "operation")
+    assert list(entries) == [
+        (posts[0].pk, Post.SyncStatus.CREATED),
+        (posts[2].pk, Post.SyncStatus.DELETED),
+    ]
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_acknowledge() -> None:
+    post = PostFactory()
+    other_post = PostFactory()
+    last_entry = SyncOutbox.objects.latest("pk")
+    post.title = "modified after being read"
+    post.save()
+    SyncOutbox.objects.acknowledge(Post, [post.pk, other_post.pk], last_entry.pk)
+    entries = SyncOutbox.objects.values_list("object_id", "operation")
+    assert list(entries) == [(post.pk, Post.SyncStatus.UPDATED)]
+    SyncOutbox.objects.acknowledge(Post, [post.pk])
+    assert not SyncOutbox.objects.exists()
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_claim_leases_whole_objects() -> None:
+    post = PostFactory()
+    other_post = PostFactory()
+    post.title = "modified"
+    post.save()
+    entries = SyncOutbox.objects.claim("worker-1", 60, 1)
+    assert [entry.object_id for entry in entries] == [post.pk, post.pk]
+    assert {entry.leased_by for entry in entries} == {"worker-1"}
+    entries = SyncOutbox.objects.claim("worker-2", 60, 10)
+    assert [entry.object_id for entry in entries] == [other_post.pk]
+    assert SyncOutbox.objects.claim("worker-3", 60, 10) == []
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_claim_skips_objects_leased_by_others() -> None:
+    post = PostFactory()
+    SyncOutbox.objects.claim("worker-1", 60, 10)
+    post.title = "modified while leased"
+    post.save()
+    assert SyncOutbox.objects.claim("worker-2", 60, 10) == []
+    entries = SyncOutbox.objects.claim("worker-1", 60, 10)
+    assert len(entries) == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_claim_reclaims_expired_leases() -> None:
+    post = PostFactory()
+    SyncOutbox.objects.claim("crashed-worker", 60, 10)
+    SyncOutbox.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+    entries = SyncOutbox.objects.claim("worker", 60, 10)
+    assert [(entry.object_id, entry.leased_by) for entry in entries] == [
+        (post.pk, "worker")
+    ]
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_renew_and_release() -> None:
+    PostFactory()
+    PostFactory()
+    SyncOutbox.objects.claim("worker-1", 60, 1)
+    SyncOutbox.objects.renew("worker-1", 3600)
+    leased = SyncOutbox.objects.get(leased_by="worker-1")
+    assert leased.lease_expires_at is not None
+    assert leased.lease_expires_at > timezone.now() + timedelta(seconds=60)
+    SyncOutbox.objects.release("worker-1")
+    assert SyncOutbox.objects.available().count() == 2  # noqa: PLR2004
+    assert not SyncOutbox.objects.exclude(leased_by="").exists()
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_record_notifies_on_commit(
+    django_capture_on_commit_callbacks,
+) -> None:
+    with (
+        patch("blog.managers.notify_sync_channel") as notify_mock,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        PostFactory()
+    notify_mock.assert_called_once_with("default")
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_record_notifies_once_per_transaction(
+    django_capture_on_commit_callbacks,
+) -> None:
+    with (
+        patch("blog.managers.notify_sync_channel") as notify_mock,
+        django_capture_on_commit_callbacks(execute=True) as callbacks,
+    ):
+        PostFactory.create_batch(3)
+    assert len(callbacks) == 1
+    notify_mock.assert_called_once_with("default")
+
+
+@pytest.mark.django_db()
+def test_sync_outbox_record_notifies_after_savepoint_rollback(
+    django_capture_on_commit_callbacks,
+) -> None:
+    with (
+        patch("blog.managers.notify_sync_channel") as notify_mock,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        with suppress(RuntimeError), transaction.atomic():
+            PostFactory()
+            raise RuntimeError
+        PostFactory()
+    notify_mock.assert_called_once_with("default")
+
+
+def test_notify_sync_channel() -> None:
+    connection = MagicMock(vendor="postgresql")
+    with patch("blog.managers.connections", {"default": connection}):
+        notify_sync_channel("default")
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.execute.assert_called_once_with("SELECT pg_notify(%s, '')", [SYNC_CHANNEL])
+
+
+def test_notify_sync_channel_only_on_postgresql() -> None:
+    connection = MagicMock(vendor="sqlite")
+    with patch("blog.managers.connections", {"default": connection}):
+        notify_sync_channel("default")
+    connection.cursor.assert_not_called()
+
+
+@pytest.mark.django_db()
+def test_sync_run_record() -> None:
+    posts_report = SyncModelReport(3, 1, 0, [])
+    posts_report.add("update", 0, ["Error updating post[pk=1]"])
+    report = SyncBlogReport(posts_report, SyncModelReport(0, 0, 2, []))
+    report.duration = 3.0
+    run = SyncRun.objects.record("sync_remote_data", report)
+    run.refresh_from_db()
+    assert run.outcome == SyncRun.Outcome.PARTIAL
+    assert (run.items_synced, run.num_errors, run.items_per_second) == (6, 1, 2.0)
+    assert run.finished_at - run.started_at == timedelta(seconds=3)
+    assert run.report["posts"]["errors_by_operation"] == {"update": 1}
+    assert run.report["comments"]["deleted"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db()
+def test_sync_run_record_truncates_errors() -> None:
+    errors = [f"error {i}" for i in range(MAX_STORED_RUN_ERRORS + 1)]
+    report = SyncBlogReport(
+        SyncModelReport(0, 0, 0, errors), SyncModelReport(0, 0, 0, [])
+    )
+    run = SyncRun.objects.record("sync_remote_data", report)
+    run.refresh_from_db()
+    assert run.num_errors == len(errors)
+    assert run.report["posts"]["errors"] == errors[:-1]
+
+
+@pytest.mark.django_db()
+def test_sync_run_record_prunes_old_runs(settings) -> None:
+    settings.BLOG_SYNC_RUN_HISTORY_DAYS = 7
+    report = SyncBlogReport(SyncModelReport(0, 0, 0, []), SyncModelReport(0, 0, 0, []))
+    old_run, recent_run = (
+        SyncRun.objects.record("sync_remote_data", report) for _ in range(2)
+    )
+    other_old_run = SyncRun.objects.record_failure("load_initial_data", "down")
+    SyncRun.objects.filter(pk__in=[old_run.pk, other_old_run.pk]).update(
+        started_at=timezone.now() - timedelta(days=8)
+    )
+    run = SyncRun.objects.record("sync_remote_data", report)
+    assert set(SyncRun.objects.values_list("pk", flat=True)) == {
+        recent_run.pk,
+        other_old_run.pk,
+        run.pk,
+    }
+    settings.BLOG_SYNC_RUN_HISTORY_DAYS = 0
+    assert SyncRun.objects.prune("load_initial_data") == 0
+
+
+@pytest.mark.django_db()
+def test_sync_run_record_failure() -> None:
+    SyncRun.objects.record_failure("load_initial_data", "remote down", 1.5)
+    run = SyncRun.objects.for_command("load_initial_data").get()
+    assert (run.outcome, run.error, run.duration) == (
+        SyncRun.Outcome.FAILED,
+        "remote down",
+        1.5,
+    )
+    assert run.report == {}
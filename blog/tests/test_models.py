@@ -3,7 +3,9 @@ import pytest
 from blog.managers import SyncStatus
 from blog.models import Comment
 from blog.models import Post
+from blog.models import SyncOutbox
 from blog.models import set_status_to_synced
+from blog.tests.factories import CommentFactory
 from blog.tests.factories import PostFactory
 
 
@@ -176,3 +178,115 @@ def test_post_save_with_status_not_in_update_fields_updates_status() -> None:
     post.title = "new title"
     post.save(update_fields=("title",))
     assert post.status == Post.SyncStatus.UPDATED
+
+
+@pytest.mark.django_db()
+def test_post_save_records_outbox_entry() -> None:
+    post = PostFactory()
+    post.title = "new title"
+    post.save()
+    entries = SyncOutbox.objects.for_model(Post).filter(object_id=post.pk)
+    assert list(entries.values_list("operation", flat=True)) == [
+        SyncStatus.CREATED,
+        SyncStatus.UPDATED,
+    ]
+
+
+@pytest.mark.django_db()
+def test_post_save_writes_only_dirty_fields() -> None:
+    post = Post.objects.get(pk=PostFactory().pk)
+    assert post.get_dirty_fields() == []
+    post.title = "new title"
+    assert post.get_dirty_fields() == ["title"]
+    post.body = "new body"
+    post.save()
+    post.refresh_from_db()
+    assert (post.title, post.body, post.status) == (
+        "new title",
+        "new body",
+        SyncStatus.UPDATED,
+    )
+    assert post.get_dirty_fields() == []
+    entry = SyncOutbox.objects.for_model(Post).latest("pk")
+    assert entry.fields == ["body", "title"]
+
+
+@pytest.mark.django_db()
+def test_post_save_update_statement_skips_untouched_columns(
+    django_assert_num_queries,
+) -> None:
+    post = Post.objects.get(pk=PostFactory().pk)
+    post.title = "new title"
+    with django_assert_num_queries(2) as context:
+        post.save()
+    update_sql = context.captured_queries[0]["sql"]
+    assert '"title"' in update_sql
+    assert '"body"' not in update_sql
+    assert '"user_id"' not in update_sql
+
+
+@pytest.mark.django_db()
+def test_post_save_without_changes_does_not_record_outbox_entry() -> None:
+    post = Post.objects.get(pk=PostFactory().pk)
+    post.save()
+    assert post.status == SyncStatus.UPDATED
+    assert SyncOutbox.objects.for_model(Post).count() == 1
+
+
+@pytest.mark.django_db()
+def test_post_refresh_from_db_takes_a_new_snapshot() -> None:
+    post = Post.objects.get(pk=PostFactory(title="old title").pk)
+    Post.objects.filter(pk=post.pk).update(title="new title")
+    post.refresh_from_db()
+    post.title = "old title"
+    assert post.get_dirty_fields() == ["title"]
+    post.save()
+    post.refresh_from_db(fields=["title"])
+    assert post.title == "old title"
+    assert post.get_dirty_fields() == []
+
+
+@pytest.mark.django_db()
+def test_post_save_without_snapshot_records_all_fields() -> None:
+    post = PostFactory.build()
+    post.save()
+    post._loaded_values = None  # noqa: SLF001
+    post.save()
+    entry = SyncOutbox.objects.for_model(Post).latest("pk")
+    assert entry.operation == SyncStatus.UPDATED
+    assert entry.fields == []
+
+
+@pytest.mark.django_db()
+def test_post_save_as_synced_does_not_record_outbox_entry() -> None:
+    post = PostFactory()
+    post.status = SyncStatus.SYNCED
+    post.save(update_fields=("status",))
+    assert SyncOutbox.objects.for_model(Post).count() == 1
+
+
+@pytest.mark.django_db()
+def test_post_delete_records_outbox_entries() -> None:
+    comment = CommentFactory()
+    post = comment.post
+    SyncOutbox.objects.all().delete()
+    post.delete()
+    entries = SyncOutbox.objects.values_list("model", "object_id", "operation")
+    assert list(entries) == [
+        ("blog.comment", comment.pk, SyncStatus.DELETED),
+        ("blog.post", post.pk, SyncStatus.DELETED),
+    ]
+
+
+@pytest.mark.django_db()
+def test_sync_post_acknowledges_outbox_entries() -> None:
+    post = PostFactory()
+    other_post = PostFactory()
+    post.sync()
+    assert not SyncOutbox.objects.filter(object_id=post.pk).exists()
+    assert SyncOutbox.objects.filter(object_id=other_post.pk).exists()
+
+
+def test_sync_outbox_str() -> None:
+    entry = SyncOutbox(model="blog.post", object_id=3, operation=SyncStatus.UPDATED)
+    assert str(entry) == "blog.post[pk=3] Updated"
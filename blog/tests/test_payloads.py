@@ -0,0 +1,67 @@
+import pytest
+from rest_framework import serializers
+
+from blog import json_backend
+from blog.models import Comment
+from blog.models import Post
+from blog.payloads import PayloadMapping
+from blog.payloads import get_payload_mapping
+from blog.serializers import RemoteCommentSerializer
+from blog.serializers import RemotePostSerializer
+from blog.tests.factories import CommentFactory
+from blog.tests.factories import PostFactory
+
+
+class PostTitleSerializer(serializers.ModelSerializer):
+    title = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = ["id", "title"]
+
+    def get_title(self, obj: Post) -> str:
+        return obj.title.upper()
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("serializer_class", "factory"),
+    [(RemotePostSerializer, PostFactory), (RemoteCommentSerializer, CommentFactory)],
+)
+def test_payload_mapping_matches_serializer(serializer_class, factory) -> None:
+    mapping = get_payload_mapping(serializer_class)
+    assert mapping.fields is not None
+    for obj in factory.create_batch(3):
+        assert json_backend.dumps(mapping.serialize(obj)) == json_backend.dumps(
+            serializer_class(obj).data
+        )
+
+
+def test_payload_mapping_serializes_changed_fields() -> None:
+    comment = Comment(id=1, post_id=2, name="name", email="a@b.com", body="body")
+    mapping = get_payload_mapping(RemoteCommentSerializer)
+    assert mapping.serialize(comment, ["post_id", "body"]) == {
+        "postId": 2,
+        "body": "body",
+    }
+
+
+def test_payload_mapping_none_values() -> None:
+    post = Post(id=1, user_id=None, title="title", body="body")  # type: ignore[misc]
+    payload = get_payload_mapping(RemotePostSerializer).serialize(post)
+    assert payload == RemotePostSerializer(post).data
+    assert payload["userId"] is None
+
+
+def test_payload_mapping_falls_back_to_serializer() -> None:
+    mapping = PayloadMapping(PostTitleSerializer)
+    assert mapping.fields is None
+    post = Post(id=1, title="title")
+    assert mapping.serialize(post) == {"id": 1, "title": "TITLE"}
+    assert mapping.serialize(post, ["id"]) == {"id": 1}
+
+
+def test_get_payload_mapping_is_cached() -> None:
+    assert get_payload_mapping(RemotePostSerializer) is get_payload_mapping(
+        RemotePostSerializer
+    )
@@ -1,11 +1,27 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import patch
+
+import httpx
 import pytest
 from httpx import HTTPStatusError
 from pytest_httpx import HTTPXMock
 
 from blog.models import Post
+from blog.remote_api import AsyncJSONAPIClient
+from blog.remote_api import AsyncRemoteModelAPI
+from blog.remote_api import BlockingRemoteModelAPI
+from blog.remote_api import JSONAPIClient
 from blog.remote_api import RemoteAPIError
+from blog.remote_api import RemoteConflictError
+from blog.remote_api import RemoteItemError
 from blog.remote_api import RemoteModelAPI
+from blog.remote_api import RemoteWriteResult
+from blog.remote_api import ThreadedRemoteModelAPI
+from blog.remote_api import payload_hash
 from blog.serializers import RemotePostSerializer
+from blog.sync_reports import WorkerStats
 
 
 @pytest.fixture()
@@ -138,6 +154,57 @@ def test_sync_updated(
     remote_posts_api.sync_updated([test_post])
 
 
+def test_serialize_changes(remote_posts_api: RemoteModelAPI, test_post: Post) -> None:
+    data = remote_posts_api.serialize_changes(test_post, ["title", "user_id"])
+    assert data == {"userId": 1, "title": "test title"}
+
+
+@pytest.mark.parametrize("partial_updates", [True, False])
+def test_sync_updated_unsynced_fields(
+    httpx_client: httpx.Client,
+    httpx_mock: HTTPXMock,
+    test_post: Post,
+    partial_updates: bool,  # noqa: FBT001
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", partial_updates=partial_updates
+    )
+    api = RemoteModelAPI(client, "Posts", RemotePostSerializer)
+    test_post.unsynced_fields = frozenset({"title"})
+    if partial_updates:
+        method, data = "PATCH", {"title": test_post.title}
+    else:
+        method, data = "PUT", RemotePostSerializer(test_post).data
+    httpx_mock.add_response(
+        method=method,
+        url=client.get_detail_url(test_post.id),
+        match_json=data,
+        json=data,
+    )
+    synced_models, errors = api.sync_updated([test_post])
+    assert synced_models == [test_post]
+    assert errors == []
+
+
+def test_async_sync_updated_unsynced_fields(
+    httpx_mock: HTTPXMock, test_post: Post
+) -> None:
+    client = AsyncJSONAPIClient(
+        httpx.AsyncClient(), "http://test/blog", partial_updates=True
+    )
+    api = AsyncRemoteModelAPI(client, "Posts", RemotePostSerializer)
+    test_post.unsynced_fields = frozenset({"body"})
+    httpx_mock.add_response(
+        method="PATCH",
+        url=client.get_detail_url(test_post.id),
+        match_json={"body": test_post.body},
+        json={},
+    )
+    synced_models, errors = asyncio.run(api.sync_updated([test_post]))
+    assert synced_models == [test_post]
+    assert errors == []
+
+
 def test_sync_deleted(
     remote_posts_api: RemoteModelAPI, httpx_mock: HTTPXMock, test_post: Post
 ) -> None:
@@ -201,3 +268,450 @@ def test__sync_client_error(
     assert isinstance(exc, HTTPStatusError)
     expected_error_message = "Server error '500 Internal Server Error'"
     assert expected_error_message in str(exc)
+
+
+@pytest.fixture()
+def async_remote_posts_api(async_json_api_client) -> AsyncRemoteModelAPI:
+    return AsyncRemoteModelAPI(
+        async_json_api_client, "Posts", RemotePostSerializer, concurrency=2
+    )
+
+
+@pytest.mark.parametrize("method", ["create", "delete", "update"])
+def test_async__sync(
+    async_remote_posts_api: AsyncRemoteModelAPI,
+    httpx_mock: HTTPXMock,
+    method: str,
+) -> None:
+    posts = [Post(id=i, user_id=1, title=f"title {i}", body="body") for i in (1, 2, 3)]
+    for post in posts:
+        url = (
+            async_remote_posts_api.client.base_url
+            if method == "create"
+            else async_remote_posts_api.client.get_detail_url(post.id)
+        )
+        httpx_mock.add_response(url=url, json={}, status_code=200)
+    synced_models, errors = asyncio.run(
+        async_remote_posts_api._sync(method, posts)  # noqa: SLF001
+    )
+    assert synced_models == posts
+    assert len(errors) == 0
+
+
+def test_async__sync_invalid_method(
+    async_remote_posts_api: AsyncRemoteModelAPI, test_post: Post
+) -> None:
+    with pytest.raises(RemoteAPIError) as exc_info:
+        asyncio.run(
+            async_remote_posts_api._sync("invalid_method", [test_post])  # noqa: SLF001
+        )
+    expected_error_message = (
+        "Error syncronazing Posts: " "invalid_method is not a valid method name"
+    )
+    assert str(exc_info.value) == expected_error_message
+
+
+def test_async__sync_client_error(
+    async_remote_posts_api: AsyncRemoteModelAPI,
+    httpx_mock: HTTPXMock,
+    test_post: Post,
+) -> None:
+    httpx_mock.add_response(
+        url=async_remote_posts_api.client.base_url,
+        status_code=500,
+    )
+    synced_models, errors = asyncio.run(
+        async_remote_posts_api.sync_created([test_post])
+    )
+    assert synced_models == []
+    assert len(errors) == 1
+    instance, exc = errors[0]
+    assert instance == test_post
+    assert isinstance(exc, HTTPStatusError)
+
+
+def test_async__sync_respects_concurrency_limit(
+    async_remote_posts_api: AsyncRemoteModelAPI,
+) -> None:
+    in_flight = 0
+    max_in_flight = 0
+
+    async def write(
+        method: str, url: str, data: dict, etag: str = ""
+    ) -> RemoteWriteResult:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return RemoteWriteResult(data, "")
+
+    posts = [Post(id=i, user_id=1, title="title", body="body") for i in range(10)]
+    with patch.object(async_remote_posts_api.client, "write", side_effect=write):
+        synced_models, _ = asyncio.run(async_remote_posts_api.sync_created(posts))
+    assert len(synced_models) == len(posts)
+    assert max_in_flight == async_remote_posts_api.concurrency
+
+
+def test_blocking_remote_model_api(
+    async_remote_posts_api: AsyncRemoteModelAPI,
+    httpx_mock: HTTPXMock,
+    test_post: Post,
+) -> None:
+    httpx_mock.add_response(
+        method="DELETE",
+        url=async_remote_posts_api.client.get_detail_url(test_post.id),
+        status_code=204,
+    )
+    with asyncio.Runner() as runner:
+        api = BlockingRemoteModelAPI(async_remote_posts_api, runner)
+        synced_models, errors = api.sync_deleted([test_post])
+    assert synced_models == [test_post]
+    assert errors == []
+
+
+@pytest.mark.parametrize("method", ["create", "delete", "update"])
+def test_threaded__sync(
+    json_api_client: JSONAPIClient,
+    httpx_mock: HTTPXMock,
+    method: str,
+) -> None:
+    posts = [Post(id=i, user_id=1, title=f"title {i}", body="body") for i in (1, 2, 3)]
+    for post in posts:
+        url = (
+            json_api_client.base_url
+            if method == "create"
+            else json_api_client.get_detail_url(post.id)
+        )
+        httpx_mock.add_response(url=url, json={}, status_code=200)
+    stats = WorkerStats()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        api = ThreadedRemoteModelAPI(
+            json_api_client, "Posts", RemotePostSerializer, executor, stats
+        )
+        synced_models, errors = api._sync(method, posts)  # noqa: SLF001
+    assert synced_models == posts
+    assert errors == []
+    assert sum(report.items for report in stats.reports()) == len(posts)
+
+
+def test_threaded__sync_client_error(
+    json_api_client: JSONAPIClient,
+    httpx_mock: HTTPXMock,
+    test_post: Post,
+) -> None:
+    httpx_mock.add_response(url=json_api_client.base_url, status_code=500)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        api = ThreadedRemoteModelAPI(
+            json_api_client, "Posts", RemotePostSerializer, executor
+        )
+        synced_models, errors = api.sync_created([test_post])
+    assert synced_models == []
+    assert len(errors) == 1
+    instance, exc = errors[0]
+    assert instance == test_post
+    assert isinstance(exc, HTTPStatusError)
+
+
+def test_threaded__sync_invalid_method(
+    json_api_client: JSONAPIClient, test_post: Post
+) -> None:
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        api = ThreadedRemoteModelAPI(
+            json_api_client, "Posts", RemotePostSerializer, executor
+        )
+        with pytest.raises(RemoteAPIError):
+            api._sync("invalid_method", [test_post])  # noqa: SLF001
+
+
+BATCH_URL = "http://test/blog/bulk"
+
+
+@pytest.fixture()
+def batch_posts() -> list[Post]:
+    return [Post(id=i, user_id=1, title=f"title {i}", body="body") for i in range(5)]
+
+
+@pytest.mark.parametrize("method", ["create", "delete", "update"])
+def test__sync_batches(
+    httpx_client: httpx.Client,
+    httpx_mock: HTTPXMock,
+    batch_posts: list[Post],
+    method: str,
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", batch_urls={method: BATCH_URL}
+    )
+    api = RemoteModelAPI(client, "Posts", RemotePostSerializer, batch_size=2)
+    for batch in (batch_posts[:2], batch_posts[2:4], batch_posts[4:]):
+        payload: list[Any] = (
+            [post.pk for post in batch]
+            if method == "delete"
+            else [RemotePostSerializer(post).data for post in batch]
+        )
+        httpx_mock.add_response(
+            method="POST",
+            url=BATCH_URL,
+            match_json=payload,
+            json=[{"status": 200} for _ in batch],
+        )
+    synced_models, errors = api._sync(method, batch_posts)  # noqa: SLF001
+    assert synced_models == batch_posts
+    assert errors == []
+
+
+def test__sync_batches_item_errors(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock, batch_posts: list[Post]
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", batch_urls={"create": BATCH_URL}
+    )
+    api = RemoteModelAPI(client, "Posts", RemotePostSerializer, batch_size=5)
+    httpx_mock.add_response(
+        method="POST",
+        url=BATCH_URL,
+        json=[
+            {"status": 201},
+            {"status": 409, "error": "duplicated"},
+            {"status": 201},
+            {"status": 201},
+            {"status": 500, "error": "boom"},
+        ],
+    )
+    synced_models, errors = api.sync_created(batch_posts)
+    assert synced_models == [batch_posts[0], batch_posts[2], batch_posts[3]]
+    assert [obj for obj, _ in errors] == [batch_posts[1], batch_posts[4]]
+    _, exc = errors[0]
+    assert isinstance(exc, RemoteItemError)
+    assert str(exc) == "Remote error 409: duplicated"
+
+
+@pytest.mark.parametrize(
+    "response_kwargs",
+    [
+        {"status_code": 502},
+        {"status_code": 200, "json": [{"status": 200}]},
+    ],
+)
+def test__sync_batches_request_error(
+    httpx_client: httpx.Client,
+    httpx_mock: HTTPXMock,
+    batch_posts: list[Post],
+    response_kwargs: dict,
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", batch_urls={"create": BATCH_URL}
+    )
+    api = RemoteModelAPI(client, "Posts", RemotePostSerializer, batch_size=5)
+    httpx_mock.add_response(method="POST", url=BATCH_URL, **response_kwargs)
+    synced_models, errors = api.sync_created(batch_posts)
+    assert synced_models == []
+    assert [obj for obj, _ in errors] == batch_posts
+
+
+def test__sync_falls_back_to_single_requests_without_batch_url(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock, batch_posts: list[Post]
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", batch_urls={"create": BATCH_URL}
+    )
+    api = RemoteModelAPI(client, "Posts", RemotePostSerializer, batch_size=5)
+    for post in batch_posts:
+        httpx_mock.add_response(method="DELETE", url=client.get_detail_url(post.pk))
+    synced_models, errors = api.sync_deleted(batch_posts)
+    assert synced_models == batch_posts
+    assert errors == []
+
+
+def test_async__sync_batches(httpx_mock: HTTPXMock, batch_posts: list[Post]) -> None:
+    client = AsyncJSONAPIClient(
+        httpx.AsyncClient(), "http://test/blog", batch_urls={"update": BATCH_URL}
+    )
+    api = AsyncRemoteModelAPI(
+        client, "Posts", RemotePostSerializer, concurrency=2, batch_size=3
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=BATCH_URL,
+        match_json=[RemotePostSerializer(post).data for post in batch_posts[:3]],
+        json=[{"status": 200}, {"status": 200}, {"status": 404, "error": "gone"}],
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=BATCH_URL,
+        match_json=[RemotePostSerializer(post).data for post in batch_posts[3:]],
+        json=[{"status": 200}, {"status": 200}],
+    )
+    synced_models, errors = asyncio.run(api.sync_updated(batch_posts))
+    assert synced_models == [post for i, post in enumerate(batch_posts) if i != 2]  # noqa: PLR2004
+    assert [obj for obj, _ in errors] == [batch_posts[2]]
+
+
+def test_threaded__sync_batches(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock, batch_posts: list[Post]
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", batch_urls={"create": BATCH_URL}
+    )
+    httpx_mock.add_response(
+        method="POST", url=BATCH_URL, json=[{"status": 201}, {"status": 201}]
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=BATCH_URL,
+        match_json=[RemotePostSerializer(batch_posts[4]).data],
+        json=[{"status": 201}],
+    )
+    stats = WorkerStats()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        api = ThreadedRemoteModelAPI(
+            client, "Posts", RemotePostSerializer, executor, stats, batch_size=2
+        )
+        synced_models, errors = api.sync_created(batch_posts)
+    assert synced_models == batch_posts
+    assert errors == []
+    assert sum(report.items for report in stats.reports()) == len(batch_posts)
+
+
+def test_payload_hash_is_stable() -> None:
+    assert payload_hash({"a": 1, "b": "x"}) == payload_hash({"b": "x", "a": 1})
+    assert payload_hash({"a": 1}) != payload_hash({"a": 2})
+
+
+def test_is_unchanged(remote_posts_api: RemoteModelAPI, test_post: Post) -> None:
+    assert not remote_posts_api.is_unchanged(test_post)
+    test_post.sync_hash = payload_hash(remote_posts_api.serialize_object(test_post))
+    assert remote_posts_api.is_unchanged(test_post)
+    test_post.title = "new title"
+    assert not remote_posts_api.is_unchanged(test_post)
+
+
+def test_sync_sets_sync_hash_of_synced_objects(
+    remote_posts_api: RemoteModelAPI, httpx_mock: HTTPXMock, test_post: Post
+) -> None:
+    failed_post = Post(id=2, user_id=1, title="failed", body="body")
+    httpx_mock.add_response(
+        method="POST",
+        url=remote_posts_api.client.base_url,
+        match_json=RemotePostSerializer(test_post).data,
+        json={},
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=remote_posts_api.client.base_url,
+        match_json=RemotePostSerializer(failed_post).data,
+        status_code=500,
+    )
+    remote_posts_api.sync_created([test_post, failed_post])
+    assert remote_posts_api.is_unchanged(test_post)
+    assert failed_post.sync_hash == ""
+
+
+def test_plan_requests(httpx_client: httpx.Client, test_post: Post) -> None:
+    client = JSONAPIClient(
+        httpx_client,
+        "http://test/blog",
+        batch_urls={"create": BATCH_URL},
+        partial_updates=True,
+    )
+    api = RemoteModelAPI(client, "Posts", RemotePostSerializer, batch_size=2)
+    other_post = Post(id=2, user_id=1, title="other", body="body")
+    assert api.plan_requests("create", [test_post, other_post]) == [
+        (
+            "POST",
+            [api.serialize_object(test_post), api.serialize_object(other_post)],
+        )
+    ]
+    other_post.unsynced_fields = frozenset({"title"})
+    assert api.plan_requests("update", [test_post, other_post]) == [
+        ("PUT", api.serialize_object(test_post)),
+        ("PATCH", {"title": "other"}),
+    ]
+    assert api.plan_requests("delete", [test_post]) == [("DELETE", None)]
+
+
+def test_sync_updated_sends_if_match_and_stores_etag(
+    remote_posts_api: RemoteModelAPI, httpx_mock: HTTPXMock, test_post: Post
+) -> None:
+    test_post.remote_etag = '"v1"'
+    httpx_mock.add_response(
+        method="PUT",
+        url=remote_posts_api.client.get_detail_url(test_post.id),
+        match_headers={"If-Match": '"v1"'},
+        json={},
+        headers={"ETag": '"v2"'},
+    )
+    synced_models, errors = remote_posts_api.sync_updated([test_post])
+    assert (synced_models, errors) == ([test_post], [])
+    assert test_post.remote_etag == '"v2"'
+
+
+def test_sync_created_stores_etag(
+    remote_posts_api: RemoteModelAPI, httpx_mock: HTTPXMock, test_post: Post
+) -> None:
+    httpx_mock.add_response(
+        method="POST",
+        url=remote_posts_api.client.base_url,
+        json={},
+        headers={"ETag": '"v1"'},
+    )
+    remote_posts_api.sync_created([test_post])
+    request = httpx_mock.get_request()
+    assert request is not None
+    assert "If-Match" not in request.headers
+    assert test_post.remote_etag == '"v1"'
+
+
+@pytest.mark.parametrize("method", ["update", "delete"])
+def test__sync_conflict(
+    remote_posts_api: RemoteModelAPI,
+    httpx_mock: HTTPXMock,
+    test_post: Post,
+    method: str,
+) -> None:
+    test_post.remote_etag = '"v1"'
+    httpx_mock.add_response(
+        url=remote_posts_api.client.get_detail_url(test_post.id),
+        match_headers={"If-Match": '"v1"'},
+        status_code=412,
+    )
+    synced_models, errors = remote_posts_api._sync(method, [test_post])  # noqa: SLF001
+    assert synced_models == []
+    [(instance, exc)] = errors
+    assert instance == test_post
+    assert isinstance(exc, RemoteConflictError)
+    assert test_post.remote_etag == '"v1"'
+
+
+def test_async__sync_conflict(
+    async_remote_posts_api: AsyncRemoteModelAPI,
+    httpx_mock: HTTPXMock,
+    test_post: Post,
+) -> None:
+    test_post.remote_etag = '"v1"'
+    httpx_mock.add_response(
+        url=async_remote_posts_api.client.get_detail_url(test_post.id),
+        match_headers={"If-Match": '"v1"'},
+        status_code=412,
+    )
+    synced_models, errors = asyncio.run(
+        async_remote_posts_api.sync_updated([test_post])
+    )
+    assert synced_models == []
+    [(_, exc)] = errors
+    assert isinstance(exc, RemoteConflictError)
+
+
+def test__sync_batches_item_conflict(
+    httpx_client: httpx.Client, httpx_mock: HTTPXMock, batch_posts: list[Post]
+) -> None:
+    client = JSONAPIClient(
+        httpx_client, "http://test/blog", batch_urls={"update": BATCH_URL}
+    )
+    api = RemoteModelAPI(client, "Posts", RemotePostSerializer, batch_size=5)
+    results = [{"status": 200}] * 4 + [{"status": 412, "error": "changed"}]
+    httpx_mock.add_response(method="POST", url=BATCH_URL, json=results)
+    _, errors = api.sync_updated(batch_posts)
+    [(instance, exc)] = errors
+    assert instance == batch_posts[4]
+    assert isinstance(exc, RemoteConflictError)
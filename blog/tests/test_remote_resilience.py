@@ -0,0 +1,233 @@
+import asyncio
+import threading
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from email.utils import format_datetime
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from blog.remote_resilience import AdaptiveConcurrencyLimit
+from blog.remote_resilience import CircuitBreaker
+from blog.remote_resilience import RetryPolicy
+from blog.remote_resilience import TokenBucket
+from blog.remote_resilience import get_retry_after
+from blog.remote_resilience import is_remote_failure
+from blog.sync_reports import RequestStats
+
+
+def make_response(status_code: int, headers: dict[str, str] | None = None):
+    return httpx.Response(status_code, headers=headers)
+
+
+@pytest.mark.parametrize(
+    ("method", "status_code", "expected"),
+    [
+        ("PUT", 502, True),
+        ("DELETE", 504, True),
+        ("GET", 429, True),
+        ("PUT", 500, False),
+        ("PUT", 404, False),
+        ("POST", 502, False),
+        ("POST", 503, True),
+        ("PATCH", 429, True),
+        ("PATCH", 504, False),
+    ],
+)
+def test_retry_policy_should_retry_response(
+    method: str,
+    status_code: int,
+    expected: bool,  # noqa: FBT001
+) -> None:
+    policy = RetryPolicy()
+    response = make_response(status_code)
+    assert policy.should_retry(method, 0, response) == expected
+
+
+@pytest.mark.parametrize(
+    ("method", "exc", "expected"),
+    [
+        ("POST", httpx.ConnectError("refused"), True),
+        ("POST", httpx.ReadTimeout("timeout"), False),
+        ("PUT", httpx.ReadTimeout("timeout"), True),
+        ("PUT", httpx.RemoteProtocolError("closed"), True),
+    ],
+)
+def test_retry_policy_should_retry_error(
+    method: str,
+    exc: Exception,
+    expected: bool,  # noqa: FBT001
+) -> None:
+    assert RetryPolicy().should_retry(method, 0, exc=exc) == expected
+
+
+def test_retry_policy_stops_after_max_retries() -> None:
+    policy = RetryPolicy(max_retries=2)
+    response = make_response(503)
+    assert policy.should_retry("PUT", 1, response)
+    assert not policy.should_retry("PUT", 2, response)
+
+
+def test_retry_policy_get_delay_uses_jittered_exponential_backoff() -> None:
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5)
+    with patch("blog.remote_resilience.random.uniform", return_value=0.3) as mock:
+        assert policy.get_delay(2) == 0.3  # noqa: PLR2004
+    mock.assert_called_once_with(0, 4)
+    with patch("blog.remote_resilience.random.uniform") as mock:
+        policy.get_delay(10)
+    mock.assert_called_once_with(0, 5)
+
+
+def test_retry_policy_get_delay_honors_retry_after() -> None:
+    policy = RetryPolicy(max_backoff=10)
+    assert policy.get_delay(0, make_response(429, {"Retry-After": "3"})) == 3  # noqa: PLR2004
+    assert policy.get_delay(0, make_response(429, {"Retry-After": "60"})) == 10  # noqa: PLR2004
+
+
+def test_get_retry_after() -> None:
+    retry_at = datetime.now(tz=UTC) + timedelta(seconds=30)
+    response = make_response(503, {"Retry-After": format_datetime(retry_at)})
+    retry_after = get_retry_after(response)
+    assert retry_after is not None
+    assert 0 < retry_after <= 30  # noqa: PLR2004
+    assert get_retry_after(make_response(503, {"Retry-After": "soon"})) is None
+    assert get_retry_after(make_response(503)) is None
+
+
+def test_circuit_breaker_opens_after_threshold() -> None:
+    stats = RequestStats()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, stats=stats)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert not breaker.allow_request()
+    assert (stats.circuit_trips, stats.rejected) == (1, 2)
+
+
+def test_circuit_breaker_success_resets_failures() -> None:
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize(
+    ("trial_succeeds", "expected_state"),
+    [(True, CircuitBreaker.CLOSED), (False, CircuitBreaker.OPEN)],
+)
+def test_circuit_breaker_half_open_trial(
+    trial_succeeds: bool,  # noqa: FBT001
+    expected_state: str,
+) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+    if trial_succeeds:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    assert breaker.state == expected_state
+
+
+@pytest.mark.parametrize(
+    ("response", "exc", "expected"),
+    [
+        (make_response(502), None, True),
+        (make_response(429), None, True),
+        (make_response(404), None, False),
+        (make_response(200), None, False),
+        (None, httpx.ConnectError("refused"), True),
+    ],
+)
+def test_is_remote_failure(
+    response: httpx.Response | None,
+    exc: Exception | None,
+    expected: bool,  # noqa: FBT001
+) -> None:
+    assert is_remote_failure(response, exc) == expected
+
+
+def test_token_bucket_reserve() -> None:
+    with patch("blog.remote_resilience.time.monotonic", return_value=100.0):
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0.5  # noqa: PLR2004
+        assert bucket.reserve() == 1
+    with patch("blog.remote_resilience.time.monotonic", return_value=102.0):
+        assert bucket.reserve() == 0
+
+
+def test_adaptive_concurrency_limit_increases_when_healthy() -> None:
+    limit = AdaptiveConcurrencyLimit(max_limit=6, initial_limit=2)
+    for _ in range(20):
+        limit.acquire()
+        limit.release(0.1, overloaded=False)
+    assert limit.limit == 6  # noqa: PLR2004
+    assert limit.in_flight == 0
+
+
+def test_adaptive_concurrency_limit_decreases_on_overload() -> None:
+    limit = AdaptiveConcurrencyLimit(max_limit=16, initial_limit=8)
+    for _ in range(3):
+        limit.acquire()
+    limit.release(0.1, overloaded=True)
+    assert limit.limit == 4  # noqa: PLR2004
+    # Responses of requests sent with the previous limit don't decrease it.
+    limit.release(0.1, overloaded=True)
+    limit.release(0.1, overloaded=True)
+    assert limit.limit == 4  # noqa: PLR2004
+
+
+def test_adaptive_concurrency_limit_decreases_on_rising_p95() -> None:
+    limit = AdaptiveConcurrencyLimit(
+        max_limit=8, initial_limit=8, latency_window=2, latency_tolerance=2
+    )
+    for latency in (0.1, 0.1, 0.5, 0.5):
+        limit.acquire()
+        limit.release(latency, overloaded=False)
+    assert limit.limit == 4  # noqa: PLR2004
+
+
+def test_adaptive_concurrency_limit_blocks_over_limit() -> None:
+    limit = AdaptiveConcurrencyLimit(max_limit=1, initial_limit=1)
+    limit.acquire()
+    acquired = threading.Event()
+
+    def acquire() -> None:
+        limit.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(0.05)
+    limit.release(0.1, overloaded=False)
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_adaptive_concurrency_limit_acquire_async() -> None:
+    limit = AdaptiveConcurrencyLimit(max_limit=2, initial_limit=2)
+    max_in_flight = 0
+
+    async def request() -> None:
+        nonlocal max_in_flight
+        await limit.acquire_async()
+        max_in_flight = max(max_in_flight, limit.in_flight)
+        await asyncio.sleep(0.01)
+        limit.release(0.01, overloaded=True)
+
+    async def run() -> None:
+        await asyncio.gather(*(request() for _ in range(6)))
+
+    asyncio.run(run())
+    assert max_in_flight == 2  # noqa: PLR2004
+    assert limit.in_flight == 0
+    assert limit.limit == 1
@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+from blog.sync_budget import SyncBudget
+
+
+def test_sync_budget_without_limits() -> None:
+    budget = SyncBudget()
+    budget.consume(1000)
+    assert budget.remaining_items is None
+    assert not budget.exhausted
+
+
+def test_sync_budget_max_items() -> None:
+    budget = SyncBudget(max_items=3)
+    budget.consume(2)
+    assert budget.remaining_items == 1
+    assert not budget.exhausted
+    budget.consume(2)
+    assert budget.remaining_items == 0
+    assert budget.exhausted
+    budget.start()
+    assert budget.remaining_items == 3  # noqa: PLR2004
+    assert not budget.exhausted
+
+
+def test_sync_budget_max_duration() -> None:
+    with patch("blog.sync_budget.time.monotonic", return_value=10.0) as monotonic:
+        budget = SyncBudget(max_duration=5.0)
+        monotonic.return_value = 14.0
+        assert budget.elapsed == 4.0  # noqa: PLR2004
+        assert not budget.exhausted
+        monotonic.return_value = 15.0
+        assert budget.exhausted
+        budget.start()
+        assert not budget.exhausted
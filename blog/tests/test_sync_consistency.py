@@ -0,0 +1,93 @@
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from blog.models import Post
+from blog.models import SyncOutbox
+from blog.models import SyncStatus
+from blog.remote_api import JSONAPIClient
+from blog.remote_api import RemoteModelAPI
+from blog.remote_api import payload_hash
+from blog.serializers import RemotePostSerializer
+from blog.sync_consistency import enqueue_resync
+from blog.sync_consistency import get_local_hashes
+from blog.sync_consistency import verify_model
+from blog.tests.factories import PostFactory
+
+POSTS_URL = "http://test/posts"
+
+
+@pytest.fixture()
+def posts_api(httpx_client: httpx.Client) -> RemoteModelAPI:
+    return RemoteModelAPI(
+        JSONAPIClient(httpx_client, POSTS_URL), "Posts", RemotePostSerializer
+    )
+
+
+@pytest.mark.django_db()
+def test_get_local_hashes(posts_api: RemoteModelAPI) -> None:
+    posts = Post.objects.bulk_create(
+        PostFactory.build_batch(3, status=SyncStatus.SYNCED, sync_hash="stored")
+    )
+    pending = posts[2]
+    hashes = get_local_hashes(posts_api, Post, {pending.pk}, bucket_size=1)
+    assert hashes == {
+        post.pk: payload_hash(posts_api.serialize_object(post)) for post in posts[:2]
+    }
+
+
+@pytest.mark.django_db()
+def test_verify_model_detects_changes_not_recorded_in_outbox(
+    posts_api: RemoteModelAPI, httpx_mock: HTTPXMock
+) -> None:
+    post = Post.objects.bulk_create(
+        PostFactory.build_batch(1, status=SyncStatus.SYNCED)
+    )[0]
+    remote_data = [posts_api.serialize_object(post)]
+    Post.all_objects.filter(pk=post.pk).update(
+        title="changed title", sync_hash=payload_hash(remote_data[0])
+    )
+    httpx_mock.add_response(method="GET", url=POSTS_URL, json=remote_data)
+    result = verify_model("posts", posts_api, Post)
+    assert result.divergent == [post.pk]
+    assert not SyncOutbox.objects.exists()
+
+
+@pytest.mark.django_db()
+def test_verify_model(posts_api: RemoteModelAPI, httpx_mock: HTTPXMock) -> None:
+    posts = Post.objects.bulk_create(
+        PostFactory.build_batch(6, status=SyncStatus.SYNCED)
+    )
+    in_sync, divergent, missing, pending = posts[0], posts[1], posts[2], posts[3]
+    Post.objects.filter(pk=pending.pk).update(title="pending title")
+    remote_data = [
+        posts_api.serialize_object(post) for post in posts if post is not missing
+    ]
+    remote_data[1]["title"] = "remote title"
+    remote_data.append({"id": 1000, "userId": 1, "title": "extra", "body": "body"})
+    httpx_mock.add_response(method="GET", url=POSTS_URL, json=remote_data)
+    result = verify_model("posts", posts_api, Post, bucket_size=2)
+    assert result.divergent == [divergent.pk]
+    assert result.missing == [missing.pk]
+    assert result.extra == [1000]
+    assert in_sync.pk not in result.divergent
+    assert (result.local_objects, result.remote_objects) == (5, 5)
+    assert not result.consistent
+
+
+@pytest.mark.django_db()
+def test_enqueue_resync(posts_api: RemoteModelAPI, httpx_mock: HTTPXMock) -> None:
+    divergent, missing = Post.objects.bulk_create(
+        PostFactory.build_batch(2, status=SyncStatus.SYNCED, remote_etag='"v1"')
+    )
+    remote_data = [posts_api.serialize_object(divergent)]
+    remote_data[0]["title"] = "remote title"
+    httpx_mock.add_response(method="GET", url=POSTS_URL, json=remote_data)
+    result = verify_model("posts", posts_api, Post)
+    assert enqueue_resync(Post, result) == 2  # noqa: PLR2004
+    assert set(SyncOutbox.objects.values_list("object_id", "operation")) == {
+        (divergent.pk, SyncStatus.UPDATED),
+        (missing.pk, SyncStatus.CREATED),
+    }
+    divergent.refresh_from_db()
+    assert (divergent.sync_hash, divergent.remote_etag) == ("", "")
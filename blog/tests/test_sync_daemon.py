@@ -0,0 +1,141 @@
+import threading
+from typing import cast
+from unittest.mock import Mock
+
+import pytest
+
+from blog.remote_api import RemoteAPIError
+from blog.sync_daemon import PollingChangeListener
+from blog.sync_daemon import SyncDaemon
+from blog.sync_daemon import get_change_listener
+from blog.sync_reports import SyncBlogReport
+from blog.sync_reports import SyncModelReport
+
+
+def make_report(created: int = 0, errors: list[str] | None = None) -> SyncBlogReport:
+    return SyncBlogReport(
+        SyncModelReport(created, 0, 0, errors or []), SyncModelReport(0, 0, 0, [])
+    )
+
+
+class FakeListener:
+    def __init__(self, stop_event: threading.Event, notifications: list[bool]):
+        self.stop_event = stop_event
+        self.notifications = notifications
+        self.waits: list[float] = []
+        self.closed = False
+
+    def wait(self, timeout: float) -> bool:
+        self.waits.append(timeout)
+        if not self.notifications:
+            self.stop_event.set()
+            return False
+        return self.notifications.pop(0)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def make_daemon(
+    listener: FakeListener,
+    sync_pass: Mock,
+    heartbeat: float = 60,
+    catch_up: float | None = None,
+) -> SyncDaemon:
+    return SyncDaemon(
+        sync_pass,
+        listener,
+        listener.stop_event,
+        on_report=Mock(),
+        on_heartbeat=Mock(),
+        on_error=Mock(),
+        debounce=0,
+        heartbeat=heartbeat,
+        catch_up=catch_up,
+    )
+
+
+def test_polling_change_listener() -> None:
+    stop_event = threading.Event()
+    listener = PollingChangeListener(stop_event, interval=0)
+    assert listener.wait(1)
+    stop_event.set()
+    listener = PollingChangeListener(stop_event, interval=10)
+    assert not listener.wait(10)
+
+
+@pytest.mark.django_db()
+def test_get_change_listener_falls_back_to_polling() -> None:
+    listener = get_change_listener(threading.Event(), 5)
+    assert isinstance(listener, PollingChangeListener)
+
+
+def test_sync_daemon_runs_pass_per_notification() -> None:
+    listener = FakeListener(threading.Event(), [True, False, True])
+    sync_pass = Mock(side_effect=[make_report(2), make_report(), make_report(1)])
+    daemon = make_daemon(listener, sync_pass)
+    daemon.run()
+    assert sync_pass.call_count == 3  # noqa: PLR2004
+    assert daemon.passes == 3  # noqa: PLR2004
+    assert daemon.items_synced == 3  # noqa: PLR2004
+    # Empty passes aren't reported.
+    assert cast(Mock, daemon.on_report).call_count == 2  # noqa: PLR2004
+    assert listener.closed
+
+
+def test_sync_daemon_drains_notifications_after_debounce() -> None:
+    listener = FakeListener(threading.Event(), [True, True])
+    daemon = make_daemon(listener, Mock(return_value=make_report()))
+    daemon.run()
+    # The second notification arrived while debouncing the first one.
+    assert daemon.passes == 2  # noqa: PLR2004
+    assert listener.waits[1] == 0
+
+
+def test_sync_daemon_drains_backlog_left_by_a_pass() -> None:
+    listener = FakeListener(threading.Event(), [False, False])
+    left_behind = make_report(2)
+    left_behind.budget_exhausted = True
+    deferred = make_report(1)
+    deferred.comments.deferred = 1
+    sync_pass = Mock(side_effect=[left_behind, deferred, make_report()])
+    daemon = make_daemon(listener, sync_pass)
+    daemon.run()
+    # The backlog is pushed without a new notification, until a pass makes
+    # no progress.
+    assert daemon.passes == 3  # noqa: PLR2004
+    assert listener.waits[:2] == [0, 0]
+    assert listener.waits[2] > 0
+
+
+def test_sync_daemon_runs_catch_up_passes() -> None:
+    listener = FakeListener(threading.Event(), [False, False])
+    daemon = make_daemon(listener, Mock(return_value=make_report()), catch_up=0)
+    daemon.run()
+    assert daemon.passes == 3  # noqa: PLR2004
+
+
+def test_sync_daemon_heartbeat() -> None:
+    listener = FakeListener(threading.Event(), [False])
+    daemon = make_daemon(listener, Mock(return_value=make_report(1)), heartbeat=0)
+    daemon.run()
+    cast(Mock, daemon.on_heartbeat).assert_called_with(1, 1)
+
+
+def test_sync_daemon_reports_errors_and_keeps_running() -> None:
+    listener = FakeListener(threading.Event(), [True])
+    error = RemoteAPIError("down")
+    sync_pass = Mock(side_effect=[error, make_report(1)])
+    daemon = make_daemon(listener, sync_pass)
+    daemon.run()
+    cast(Mock, daemon.on_error).assert_called_once_with(error)
+    assert daemon.passes == 1
+
+
+def test_sync_daemon_stop() -> None:
+    stop_event = threading.Event()
+    listener = FakeListener(stop_event, [True] * 10)
+    daemon = make_daemon(listener, Mock(return_value=make_report()))
+    daemon.stop()
+    daemon.run()
+    assert daemon.passes == 1
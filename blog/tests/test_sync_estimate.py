@@ -0,0 +1,132 @@
+import httpx
+import pytest
+from pytest_django.fixtures import SettingsWrapper
+
+from blog.models import Comment
+from blog.models import Post
+from blog.models import SyncOutbox
+from blog.models import SyncRun
+from blog.remote_api import JSONAPIClient
+from blog.remote_api import RemoteModelAPI
+from blog.remote_api import payload_hash
+from blog.serializers import RemoteCommentSerializer
+from blog.serializers import RemotePostSerializer
+from blog.sync_estimate import DEFAULT_REQUEST_LATENCY
+from blog.sync_estimate import OperationEstimate
+from blog.sync_estimate import SyncEstimate
+from blog.sync_estimate import estimate_sync
+from blog.sync_estimate import get_measured_latencies
+from blog.sync_reports import Histogram
+from blog.sync_reports import SyncBlogReport
+from blog.sync_reports import SyncModelReport
+from blog.tests.factories import CommentFactory
+from blog.tests.factories import PostFactory
+
+
+def make_apis(
+    httpx_client: httpx.Client, posts_batch_urls: dict[str, str] | None = None
+) -> dict[str, RemoteModelAPI]:
+    return {
+        "posts": RemoteModelAPI(
+            JSONAPIClient(
+                httpx_client, "http://test/posts", batch_urls=posts_batch_urls
+            ),
+            "Posts",
+            RemotePostSerializer,
+            batch_size=10,
+        ),
+        "comments": RemoteModelAPI(
+            JSONAPIClient(httpx_client, "http://test/comments"),
+            "Comments",
+            RemoteCommentSerializer,
+        ),
+    }
+
+
+@pytest.mark.django_db()
+def test_estimate_sync(httpx_client: httpx.Client) -> None:
+    posts = PostFactory.create_batch(3)
+    CommentFactory.create_batch(2, post=posts[0])
+    apis = make_apis(httpx_client, {"create": "http://test/posts/bulk"})
+    estimate = estimate_sync(apis, chunk_size=100)
+    posts_create = estimate.operations[("posts", "create")]
+    assert (posts_create.objects, posts_create.requests) == (3, {"POST": 1})
+    assert posts_create.num_bytes > 0
+    comments_create = estimate.operations[("comments", "create")]
+    assert (comments_create.objects, comments_create.requests) == (2, {"POST": 2})
+    assert estimate.num_requests == 3  # noqa: PLR2004
+    assert not estimate.latency_measured
+    assert estimate.duration == 3 * DEFAULT_REQUEST_LATENCY
+
+
+@pytest.mark.django_db()
+def test_estimate_sync_coalesces_skips_and_purges(httpx_client: httpx.Client) -> None:
+    apis = make_apis(httpx_client)
+    updated, unchanged, purged = PostFactory.create_batch(3)
+    Post.objects.exclude(pk=purged.pk).update(status=Post.SyncStatus.SYNCED)
+    SyncOutbox.objects.exclude(object_id=purged.pk).delete()
+    for post in (updated, unchanged):
+        post.refresh_from_db()
+        post.title = "new title"
+        post.save()
+        post.title = "newer title"
+        post.save()
+    Post.all_objects.filter(pk=unchanged.pk).update(
+        sync_hash=payload_hash(apis["posts"].serialize_object(unchanged))
+    )
+    purged.delete()
+    # One entry per chunk, so the entries of an object span several chunks.
+    estimate = estimate_sync(apis, chunk_size=1)
+    posts_update = estimate.operations[("posts", "update")]
+    assert (posts_update.objects, posts_update.skipped) == (1, 1)
+    assert posts_update.requests == {"PUT": 1}
+    assert estimate.avoided["posts"] == 4  # noqa: PLR2004
+    assert estimate.purged["posts"] == 1
+    assert Post.objects.filter(pk=updated.pk, status=Post.SyncStatus.UPDATED).exists()
+
+
+@pytest.mark.django_db()
+def test_estimate_sync_leaves_out_cascaded_deletes(
+    httpx_client: httpx.Client,
+) -> None:
+    post = Post.objects.bulk_create(
+        PostFactory.build_batch(1, status=Post.SyncStatus.SYNCED)
+    )[0]
+    Comment.objects.bulk_create(
+        CommentFactory.build_batch(2, post=post, status=Comment.SyncStatus.SYNCED)
+    )
+    post.delete()
+    apis = make_apis(httpx_client)
+    estimate = estimate_sync(apis, chunk_size=100, cascades=["posts"])
+    assert estimate.operations[("posts", "delete")].requests == {"DELETE": 1}
+    assert ("comments", "delete") not in estimate.operations
+    assert estimate.cascaded["comments"] == 2  # noqa: PLR2004
+    estimate = estimate_sync(apis, chunk_size=100)
+    assert estimate.operations[("comments", "delete")].objects == 2  # noqa: PLR2004
+
+
+@pytest.mark.django_db()
+def test_get_measured_latencies() -> None:
+    for latency in (0.1, 0.3):
+        posts_report = SyncModelReport(1, 0, 0, [])
+        posts_report.latencies["POST"] = Histogram()
+        posts_report.latencies["POST"].observe(latency)
+        SyncRun.objects.record(
+            "sync_remote_data",
+            SyncBlogReport(posts_report, SyncModelReport(0, 0, 0, [])),
+        )
+    SyncRun.objects.record_failure("sync_remote_data", "error")
+    assert get_measured_latencies() == {("posts", "POST"): pytest.approx(0.2)}
+
+
+def test_sync_estimate_duration(settings: SettingsWrapper) -> None:
+    estimate = SyncEstimate()
+    operation = OperationEstimate()
+    operation.requests["POST"] = 10
+    estimate.operations[("posts", "create")] = operation
+    estimate.latencies = {("posts", "POST"): 0.5}
+    assert estimate.duration == 5.0  # noqa: PLR2004
+    estimate.parallelism = 4
+    assert estimate.duration == 1.25  # noqa: PLR2004
+    estimate.rate_limit = 2.0
+    assert estimate.duration == 5.0  # noqa: PLR2004
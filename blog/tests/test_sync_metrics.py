@@ -0,0 +1,111 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+from blog.sync_metrics import CONTENT_TYPE
+from blog.sync_metrics import SyncMetrics
+from blog.sync_metrics import escape_label_value
+from blog.sync_metrics import serve_metrics
+from blog.sync_reports import Histogram
+from blog.sync_reports import SyncBlogReport
+from blog.sync_reports import SyncModelReport
+
+
+def make_report() -> SyncBlogReport:
+    posts_report = SyncModelReport(2, 1, 0, [])
+    posts_report.retries = 3
+    posts_report.bytes_sent = 120
+    posts_report.durations["create"] = 0.5
+    latencies = Histogram((0.1, 1.0))
+    latencies.observe(0.05)
+    latencies.observe(0.5)
+    posts_report.latencies["POST"] = latencies
+    comments_report = SyncModelReport(0, 0, 1, ["err"])
+    report = SyncBlogReport(posts_report, comments_report)
+    report.duration = 2.0
+    report.backlog_before = 5
+    report.backlog_after = 1
+    return report
+
+
+def test_sync_metrics_render() -> None:
+    metrics = SyncMetrics()
+    metrics.record(make_report())
+    metrics.record(make_report())
+    lines = metrics.render().splitlines()
+    bucket = 'blog_sync_request_duration_seconds_bucket{method="POST",model="posts",'
+    expected_lines = (
+        "# TYPE blog_sync_runs_total counter",
+        'blog_sync_runs_total{outcome="partial"} 2',
+        "blog_sync_run_duration_seconds_total 4.0",
+        'blog_sync_items_total{model="posts",operation="create"} 4',
+        'blog_sync_items_total{model="comments",operation="delete"} 2',
+        'blog_sync_errors_total{model="comments"} 2',
+        'blog_sync_phase_duration_seconds_total{model="posts",operation="create"} 1.0',
+        'blog_sync_retries_total{model="posts"} 6',
+        'blog_sync_bytes_sent_total{model="posts"} 240',
+        "# TYPE blog_sync_last_run_duration_seconds gauge",
+        "blog_sync_last_run_throughput_items_per_second 2.0",
+        'blog_sync_backlog_entries{when="after"} 1',
+        'blog_sync_backlog_entries{when="before"} 5',
+        "# TYPE blog_sync_request_duration_seconds histogram",
+        f'{bucket}le="0.1"}} 2',
+        f'{bucket}le="1.0"}} 4',
+        f'{bucket}le="+Inf"}} 4',
+        'blog_sync_request_duration_seconds_sum{method="POST",model="posts"} 1.1',
+        'blog_sync_request_duration_seconds_count{method="POST",model="posts"} 4',
+    )
+    for line in expected_lines:
+        assert line in lines
+
+
+def test_sync_metrics_record_failure() -> None:
+    metrics = SyncMetrics()
+    metrics.record_failure(1.5)
+    output = metrics.render()
+    assert 'blog_sync_runs_total{outcome="failed"} 1' in output
+    assert "blog_sync_last_run_duration_seconds 1.5" in output
+
+
+def test_sync_metrics_instrument() -> None:
+    metrics = SyncMetrics()
+    report = make_report()
+    assert metrics.instrument(lambda: report)() is report
+
+    def failing_pass() -> SyncBlogReport:
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        metrics.instrument(failing_pass)()
+    output = metrics.render()
+    assert 'blog_sync_runs_total{outcome="partial"} 1' in output
+    assert 'blog_sync_runs_total{outcome="failed"} 1' in output
+
+
+def test_sync_metrics_writes_textfile(tmp_path: Path) -> None:
+    textfile = tmp_path / "sync.prom"
+    metrics = SyncMetrics(str(textfile))
+    metrics.record(make_report())
+    assert textfile.read_text() == metrics.render()
+    assert list(tmp_path.iterdir()) == [textfile]
+
+
+def test_escape_label_value() -> None:
+    assert escape_label_value('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+
+
+def test_serve_metrics() -> None:
+    metrics = SyncMetrics()
+    metrics.record(make_report())
+    server = serve_metrics(metrics, 0, "127.0.0.1")
+    try:
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        response = httpx.get(f"{base_url}/metrics")
+        assert response.status_code == 200  # noqa: PLR2004
+        assert response.headers["Content-Type"] == CONTENT_TYPE
+        assert response.text == metrics.render()
+        assert httpx.get(f"{base_url}/other").status_code == 404  # noqa: PLR2004
+    finally:
+        server.shutdown()
+        server.server_close()
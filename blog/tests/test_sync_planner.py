@@ -0,0 +1,205 @@
+import pytest
+
+from blog.managers import SyncStatus
+from blog.models import Comment
+from blog.models import Post
+from blog.models import SyncOutbox
+from blog.sync_planner import OutboxLease
+from blog.sync_planner import get_operation
+from blog.sync_planner import get_unsynced_fields
+from blog.sync_planner import iter_fair_plans
+from blog.sync_planner import iter_plans
+from blog.sync_planner import plan_entries
+from blog.tests.factories import CommentFactory
+from blog.tests.factories import PostFactory
+
+
+@pytest.mark.parametrize(
+    ("status", "expected"),
+    [
+        (SyncStatus.CREATED, "create"),
+        (SyncStatus.UPDATED, "update"),
+        (SyncStatus.SYNCED, "update"),
+        (SyncStatus.DELETED, "delete"),
+    ],
+)
+def test_get_operation(status: SyncStatus, expected: str) -> None:
+    post = Post(user_id=1, title="title", body="body", status=status)
+    assert get_operation(post) == expected
+
+
+@pytest.mark.parametrize(
+    ("status", "operations", "expected"),
+    [
+        (SyncStatus.UPDATED, ["C", "U", "U"], "create"),
+        (SyncStatus.DELETED, ["C", "U", "D"], None),
+        (SyncStatus.DELETED, ["U", "D"], "delete"),
+        (SyncStatus.UPDATED, ["U", "U"], "update"),
+    ],
+)
+def test_get_operation_coalesces_operations(
+    status: SyncStatus, operations: list[str], expected: str | None
+) -> None:
+    post = Post(user_id=1, title="title", body="body", status=status)
+    assert get_operation(post, operations) == expected
+
+
+@pytest.mark.django_db()
+def test_plan_entries() -> None:
+    created_post = PostFactory()
+    comment = CommentFactory(post=created_post)
+    comment.sync()
+    updated_post = PostFactory.build(status=SyncStatus.UPDATED)
+    deleted_post = PostFactory.build(status=SyncStatus.DELETED)
+    Post.objects.bulk_create([updated_post, deleted_post])
+    comment.body = "new body"
+    comment.save()
+    entries = list(SyncOutbox.objects.all())
+    plan = plan_entries(entries)
+    assert plan.last_entry_id == entries[-1].pk
+    assert plan.objects("posts", "create") == [created_post]
+    assert plan.objects("posts", "update") == [updated_post]
+    assert plan.objects("posts", "delete") == [deleted_post]
+    assert plan.objects("comments", "update") == [comment]
+    assert plan.objects("comments", "create") == []
+    assert plan.resolved == {}
+
+
+@pytest.mark.django_db()
+def test_plan_entries_sets_oldest_entry_of_every_object() -> None:
+    first, second = PostFactory.create_batch(2)
+    first.title = "new title"
+    first.save()
+    entries = list(SyncOutbox.objects.all())
+    plan = plan_entries(entries)
+    assert plan.dirty_since["posts"] == {
+        first.pk: entries[0].pk,
+        second.pk: entries[1].pk,
+    }
+
+
+@pytest.mark.django_db()
+def test_plan_entries_resolves_missing_objects() -> None:
+    post = PostFactory()
+    Post.all_objects.filter(pk=post.pk).delete()
+    plan = plan_entries(list(SyncOutbox.objects.all()))
+    assert plan.pending == {}
+    assert plan.resolved == {"posts": [post.pk]}
+
+
+@pytest.mark.django_db()
+def test_iter_plans() -> None:
+    posts = PostFactory.create_batch(3)
+    plans = list(iter_plans(2))
+    assert [plan.objects("posts", "create") for plan in plans] == [
+        posts[:2],
+        posts[2:],
+    ]
+
+
+@pytest.fixture()
+def comments_backlog() -> tuple[list[Comment], list[Post]]:
+    """Four comments created before two posts."""
+    post = Post.objects.bulk_create(
+        PostFactory.build_batch(1, status=SyncStatus.SYNCED)
+    )[0]
+    return CommentFactory.create_batch(4, post=post), PostFactory.create_batch(2)
+
+
+@pytest.mark.django_db()
+def test_iter_fair_plans(comments_backlog: tuple[list[Comment], list[Post]]) -> None:
+    comments, posts = comments_backlog
+    assert next(iter_plans(4)).objects("posts", "create") == []
+    plans = list(iter_fair_plans(4))
+    assert [plan.objects("posts", "create") for plan in plans] == [posts, []]
+    assert [plan.objects("comments", "create") for plan in plans] == [
+        comments[:2],
+        comments[2:],
+    ]
+
+
+@pytest.mark.django_db()
+def test_iter_fair_plans_with_lease(
+    comments_backlog: tuple[list[Comment], list[Post]],
+) -> None:
+    comments, posts = comments_backlog
+    lease = OutboxLease("worker", ttl=60)
+    plans = iter_fair_plans(4, lease)
+    plan = next(plans)
+    assert plan.objects("posts", "create") == posts
+    assert plan.objects("comments", "create") == comments[:2]
+    assert SyncOutbox.objects.filter(leased_by="worker").count() == 4  # noqa: PLR2004
+    assert next(plans).objects("comments", "create") == comments[2:]
+    assert next(plans, None) is None
+
+
+@pytest.mark.django_db()
+def test_iter_plans_with_lease() -> None:
+    posts = PostFactory.create_batch(3)
+    SyncOutbox.objects.claim("other-worker", 60, 1)
+    lease = OutboxLease("worker", ttl=60)
+    plans = list(iter_plans(1, lease))
+    assert [plan.objects("posts", "create") for plan in plans] == [
+        posts[1:2],
+        posts[2:],
+    ]
+    assert set(SyncOutbox.objects.values_list("leased_by", flat=True)) == {
+        "other-worker",
+        "worker",
+    }
+    lease.release()
+    assert SyncOutbox.objects.filter(leased_by="worker").count() == 0
+
+
+@pytest.mark.django_db()
+def test_plan_entries_coalesces_history() -> None:
+    created_post = PostFactory()
+    for title in ("first title", "second title"):
+        created_post.title = title
+        created_post.save()
+    purged_post = PostFactory()
+    purged_comment = CommentFactory(post=purged_post)
+    purged_post.delete()
+    # Only the first entry is in the chunk, but the whole history is planned.
+    plan = plan_entries(list(SyncOutbox.objects.all()[:1]))
+    assert plan.objects("posts", "create") == [created_post]
+    assert plan.objects("posts", "update") == []
+    assert (
+        plan.last_entry_id
+        == SyncOutbox.objects.for_model(Post)
+        .filter(object_id=created_post.pk)
+        .latest("id")
+        .pk
+    )
+    assert plan.avoided == {"posts": 2}
+
+    plan = plan_entries(list(SyncOutbox.objects.all()))
+    assert plan.purged == {"posts": [purged_post], "comments": [purged_comment]}
+    assert plan.pending == {("posts", "create"): [created_post]}
+    assert plan.avoided == {"posts": 4, "comments": 2}
+
+
+@pytest.mark.parametrize(
+    ("changed_fields", "expected"),
+    [
+        ([["title"], ["body", "title"]], frozenset({"body", "title"})),
+        ([["title"], []], None),
+        ([], None),
+    ],
+)
+def test_get_unsynced_fields(
+    changed_fields: list[list[str]], expected: frozenset[str] | None
+) -> None:
+    assert get_unsynced_fields(changed_fields) == expected
+
+
+@pytest.mark.django_db()
+def test_plan_entries_sets_unsynced_fields() -> None:
+    post = PostFactory()
+    post.sync()
+    post.title = "new title"
+    post.save()
+    Post.objects.filter(pk=post.pk).update(body="new body")
+    plan = plan_entries(list(SyncOutbox.objects.all()))
+    (planned_post,) = plan.objects("posts", "update")
+    assert planned_post.unsynced_fields == frozenset({"body", "title"})
@@ -1,7 +1,13 @@
+import threading
+
 import pytest
 
+from blog.sync_reports import Histogram
+from blog.sync_reports import RequestStats
 from blog.sync_reports import SyncBlogReport
 from blog.sync_reports import SyncModelReport
+from blog.sync_reports import WorkerReport
+from blog.sync_reports import WorkerStats
 
 
 def test_sync_model_report_successs() -> None:
@@ -116,3 +122,116 @@ def test_sync_blog_report_num_errors(
         SyncModelReport(4, 5, 6, comments_errors),
     )
     assert report.num_errors == expected
+
+
+@pytest.mark.parametrize(
+    ("items", "elapsed", "expected"),
+    [
+        (0, 0.0, 0.0),
+        (10, 0.0, 0.0),
+        (10, 2.0, 5.0),
+    ],
+)
+def test_worker_report_items_per_second(
+    items: int, elapsed: float, expected: float
+) -> None:
+    report = WorkerReport("worker", items, elapsed)
+    assert report.items_per_second == expected
+
+
+def test_worker_stats_records_per_thread() -> None:
+    stats = WorkerStats()
+    stats.record(0.5)
+    worker = threading.Thread(target=stats.record, args=(1.5,), name="worker-1")
+    worker.start()
+    worker.join()
+    stats.record(0.25)
+    reports = {report.name: report for report in stats.reports()}
+    main_report = reports[threading.current_thread().name]
+    assert main_report.items == 2  # noqa: PLR2004
+    assert main_report.elapsed == 0.75  # noqa: PLR2004
+    assert reports["worker-1"].items == 1
+    assert reports["worker-1"].elapsed == 1.5  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("operation", "expected"),
+    [
+        ("create", (2, 0, 0)),
+        ("update", (0, 2, 0)),
+        ("delete", (0, 0, 2)),
+    ],
+)
+def test_sync_model_report_add(operation: str, expected: tuple[int, int, int]) -> None:
+    report = SyncModelReport(0, 0, 0, ["err1"])
+    report.add(operation, 1, [])
+    report.add(operation, 1, ["err2"])
+    assert (report.created, report.updated, report.deleted) == expected
+    assert report.errors == ["err1", "err2"]
+
+
+def test_histogram_observe() -> None:
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.cumulative_counts() == [2, 3, 4]
+    assert histogram.count == 4  # noqa: PLR2004
+    assert histogram.sum == 2.65  # noqa: PLR2004
+
+
+def test_histogram_merge() -> None:
+    histogram = Histogram((0.1, 1.0))
+    histogram.observe(0.5)
+    other = Histogram((0.1, 1.0))
+    other.observe(0.05)
+    other.observe(0.5)
+    histogram.merge(other)
+    assert histogram.counts == [1, 2, 0]
+    assert histogram.count == 3  # noqa: PLR2004
+    assert histogram.sum == 1.05  # noqa: PLR2004
+
+
+def test_sync_model_report_add_request_stats_merges_latencies() -> None:
+    report = SyncModelReport(0, 0, 0, [])
+    for latencies in ((0.01, 0.2), (0.02,)):
+        stats = RequestStats()
+        for latency in latencies:
+            stats.observe_latency("POST", latency)
+        stats.observe_latency("GET", 1.0)
+        report.add_request_stats(stats)
+    assert report.latencies["POST"].count == 3  # noqa: PLR2004
+    assert report.latencies["GET"].count == 2  # noqa: PLR2004
+
+
+def test_sync_model_report_counts_errors_by_operation() -> None:
+    report = SyncModelReport(0, 0, 0, [])
+    report.add("create", 1, ["err1", "err2"])
+    report.add("delete", 1, [])
+    report.add("update", 0, ["err3"])
+    assert report.errors_by_operation == {"create": 2, "update": 1}
+
+
+def test_sync_blog_report_to_dict() -> None:
+    posts_report = SyncModelReport(2, 0, 0, ["err"])
+    stats = RequestStats()
+    stats.observe_latency("POST", 0.2)
+    posts_report.add_request_stats(stats)
+    report = SyncBlogReport(
+        posts_report,
+        SyncModelReport(0, 1, 0, []),
+        [WorkerReport("worker-1", 3, 1.5)],
+    )
+    report.duration = 1.5
+    data = report.to_dict()
+    assert (data["success"], data["items_synced"], data["num_errors"]) == (
+        False,
+        3,
+        1,
+    )
+    assert data["items_per_second"] == 2.0  # noqa: PLR2004
+    assert data["posts"]["errors"] == ["err"]
+    assert data["posts"]["latencies"]["POST"]["count"] == 1
+    assert data["comments"]["updated"] == 1
+    assert data["workers"][0]["items_per_second"] == 2.0  # noqa: PLR2004
+    assert data["connections"] is None
@@ -0,0 +1,56 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from blog.models import SyncRun
+from blog.sync_reports import SyncBlogReport
+from blog.sync_reports import SyncModelReport
+
+
+def record_run(created: int) -> SyncRun:
+    report = SyncBlogReport(
+        SyncModelReport(created, 0, 0, []), SyncModelReport(0, 0, 0, [])
+    )
+    report.duration = 2.0
+    return SyncRun.objects.record("sync_remote_data", report)
+
+
+@pytest.mark.django_db()
+def test_retrieve_sync_run_list_requires_auth(api_client) -> None:
+    url = reverse("api:syncrun-list")
+    response = api_client.get(url, format="json")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db()
+def test_retrieve_sync_run_list(api_authorized_client) -> None:
+    runs = [record_run(1), record_run(2)]
+    url = reverse("api:syncrun-list")
+    response = api_authorized_client.get(url, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == len(runs)
+    # Latest runs first.
+    assert [run["id"] for run in response.data["results"]] == [
+        runs[1].id,
+        runs[0].id,
+    ]
+
+
+@pytest.mark.django_db()
+def test_retrieve_sync_run(api_authorized_client) -> None:
+    run = record_run(4)
+    url = reverse("api:syncrun-detail", kwargs={"pk": run.id})
+    response = api_authorized_client.get(url, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["command"] == "sync_remote_data"
+    assert response.data["outcome"] == SyncRun.Outcome.SUCCESS
+    assert response.data["items_synced"] == 4  # noqa: PLR2004
+    assert response.data["items_per_second"] == 2.0  # noqa: PLR2004
+    assert response.data["report"]["posts"]["created"] == 4  # noqa: PLR2004
+
+
+@pytest.mark.django_db()
+def test_sync_runs_are_read_only(api_authorized_client) -> None:
+    url = reverse("api:syncrun-list")
+    response = api_authorized_client.post(url, data={}, format="json")
+    assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
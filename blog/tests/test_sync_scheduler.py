@@ -0,0 +1,221 @@
+from collections.abc import Collection
+
+import pytest
+
+from blog.managers import SyncStatus
+from blog.models import Comment
+from blog.models import Post
+from blog.models import SyncStatusMixin
+from blog.sync_budget import SyncBudget
+from blog.sync_planner import SyncPlan
+from blog.sync_scheduler import SyncScheduler
+from blog.tests.factories import CommentFactory
+from blog.tests.factories import PostFactory
+
+
+def run(
+    scheduler: SyncScheduler, failed: Collection[SyncStatusMixin] = frozenset()
+) -> list[tuple]:
+    """Runs the scheduler, failing the `failed` objects, and returns the steps."""
+    steps = []
+    for step in scheduler:
+        steps.append((step.name, step.operation, step.objects))
+        scheduler.complete(step, [obj for obj in step.objects if obj not in failed])
+    return steps
+
+
+def synced_post(pk: int) -> Post:
+    return Post(id=pk, user_id=1, title="title", body="body", status=SyncStatus.SYNCED)
+
+
+@pytest.mark.django_db()
+def test_scheduler_releases_comments_after_their_post() -> None:
+    posts = [Post(id=1), Post(id=2)]
+    comments = [Comment(id=1, post_id=1), Comment(id=2, post_id=2)]
+    ready_comment = Comment(id=3, post_id=synced_post(3).pk)
+    updated_comment = Comment(id=4, post_id=2)
+    plan = SyncPlan(1)
+    plan.pending[("posts", "create")] = [*posts]
+    plan.pending[("comments", "create")] = [*comments, ready_comment]
+    plan.pending[("comments", "update")] = [updated_comment]
+    steps = run(SyncScheduler(plan, checkpoint_size=1))
+    assert steps == [
+        ("posts", "create", [posts[0]]),
+        ("comments", "create", [comments[0]]),
+        ("posts", "create", [posts[1]]),
+        ("comments", "create", [comments[1]]),
+        ("comments", "update", [updated_comment]),
+        ("comments", "create", [ready_comment]),
+    ]
+
+
+@pytest.mark.django_db()
+def test_scheduler_defers_dependents_of_failed_posts() -> None:
+    posts = [Post(id=1), Post(id=2)]
+    comments = [Comment(id=1, post_id=1), Comment(id=2, post_id=2)]
+    plan = SyncPlan(1)
+    plan.pending[("posts", "create")] = [*posts]
+    plan.pending[("comments", "create")] = [*comments]
+    scheduler = SyncScheduler(plan, checkpoint_size=10)
+    steps = run(scheduler, failed={posts[0]})
+    assert steps == [
+        ("posts", "create", posts),
+        ("comments", "create", [comments[1]]),
+    ]
+    assert scheduler.deferred == {"comments": 1}
+
+
+@pytest.mark.django_db()
+def test_scheduler_defers_dependents_of_unsynced_posts() -> None:
+    post = PostFactory()
+    assert post.status == SyncStatus.CREATED
+    comment = Comment(id=1, post_id=post.pk)
+    plan = SyncPlan(1)
+    plan.pending[("comments", "update")] = [comment]
+    scheduler = SyncScheduler(plan, checkpoint_size=10)
+    assert run(scheduler) == []
+    assert scheduler.deferred == {"comments": 1}
+
+
+@pytest.mark.django_db()
+def test_scheduler_deletes_comments_before_their_post() -> None:
+    posts = [Post(id=1), Post(id=2)]
+    comments = [Comment(id=1, post_id=1), Comment(id=2, post_id=2)]
+    other_comment = Comment(id=3, post_id=3)
+    plan = SyncPlan(1)
+    plan.pending[("posts", "delete")] = [*posts]
+    plan.pending[("comments", "delete")] = [*comments, other_comment]
+    scheduler = SyncScheduler(plan, checkpoint_size=1)
+    steps = run(scheduler, failed={comments[1]})
+    assert steps == [
+        ("comments", "delete", [other_comment]),
+        ("comments", "delete", [comments[0]]),
+        ("posts", "delete", [posts[0]]),
+        ("comments", "delete", [comments[1]]),
+    ]
+    assert scheduler.deferred == {"posts": 1}
+
+
+@pytest.mark.django_db()
+def test_scheduler_checkpoints_comment_deletes_before_their_post() -> None:
+    post = Post(id=1)
+    comments = [Comment(id=pk, post_id=1) for pk in range(1, 4)]
+    plan = SyncPlan(1)
+    plan.pending[("posts", "delete")] = [post]
+    plan.pending[("comments", "delete")] = [*comments]
+    scheduler = SyncScheduler(plan, checkpoint_size=2)
+    steps = run(scheduler, failed={comments[0]})
+    assert steps == [
+        ("comments", "delete", comments[:2]),
+        ("comments", "delete", comments[2:]),
+    ]
+    assert scheduler.deferred == {"posts": 1}
+
+
+@pytest.mark.parametrize("max_items", [1, 7])
+@pytest.mark.django_db()
+def test_scheduler_splits_comment_deletes_to_the_budget(max_items: int) -> None:
+    posts = [Post(id=pk) for pk in range(1, 5)]
+    comments = [Comment(id=pk, post_id=(pk - 1) // 50 + 1) for pk in range(1, 201)]
+    plan = SyncPlan(1)
+    plan.pending[("posts", "delete")] = [*posts]
+    plan.pending[("comments", "delete")] = [*comments]
+    budget = SyncBudget(max_items=max_items)
+    scheduler = SyncScheduler(plan, checkpoint_size=2, budget=budget)
+    sizes = []
+    for step in scheduler:
+        if budget.exhausted:
+            break
+        sizes.append(len(step.objects))
+        budget.consume(len(step.objects))
+        scheduler.complete(step, step.objects)
+    assert max(sizes) <= 2  # noqa: PLR2004
+    assert sum(sizes) == max_items
+
+
+@pytest.mark.django_db()
+def test_scheduler_splits_posts_with_their_cascaded_comments() -> None:
+    posts = [Post(id=1), Post(id=2)]
+    comments = [Comment(id=1, post_id=1), Comment(id=2, post_id=2)]
+    plan = SyncPlan(1)
+    plan.pending[("posts", "delete")] = [*posts]
+    plan.pending[("comments", "delete")] = [*comments]
+    budget = SyncBudget(max_items=1)
+    scheduler = SyncScheduler(
+        plan, checkpoint_size=2, cascades=["posts"], budget=budget
+    )
+    step = next(iter(scheduler))
+    assert step.objects == posts[:1]
+    cascaded = scheduler.resolve_cascaded(step, step.objects)
+    assert cascaded is not None
+    assert cascaded.objects == comments[:1]
+
+
+@pytest.mark.django_db()
+def test_scheduler_resolves_comments_cascaded_by_their_post_delete() -> None:
+    posts = [Post(id=1), Post(id=2)]
+    comments = [Comment(id=1, post_id=1), Comment(id=2, post_id=2)]
+    other_comment = Comment(id=3, post_id=3)
+    plan = SyncPlan(1)
+    plan.pending[("posts", "delete")] = [*posts]
+    plan.pending[("comments", "delete")] = [*comments, other_comment]
+    scheduler = SyncScheduler(plan, checkpoint_size=1, cascades=["posts"])
+    resolved = []
+    steps = []
+    for step in scheduler:
+        steps.append((step.name, step.operation, step.objects))
+        synced = [obj for obj in step.objects if obj is not posts[1]]
+        if cascaded := scheduler.resolve_cascaded(step, synced):
+            resolved.append((cascaded.name, cascaded.objects))
+        scheduler.complete(step, synced)
+    assert steps == [
+        ("comments", "delete", [other_comment]),
+        ("posts", "delete", [posts[0]]),
+        ("posts", "delete", [posts[1]]),
+    ]
+    assert resolved == [("comments", [comments[0]])]
+    assert scheduler.deferred == {"comments": 1}
+
+
+@pytest.mark.django_db()
+def test_scheduler_shares_budget_fairly_oldest_first() -> None:
+    posts = [synced_post(pk) for pk in range(1, 5)]
+    comments = [Comment(id=pk, post_id=1) for pk in range(1, 7)]
+    plan = SyncPlan(1)
+    plan.pending[("posts", "update")] = [*posts]
+    plan.pending[("comments", "update")] = [*comments]
+    # The last post changed first.
+    plan.dirty_since["posts"] = {4: 1, 1: 2, 2: 3, 3: 4}
+    budget = SyncBudget(max_items=6)
+    scheduler = SyncScheduler(plan, checkpoint_size=10, budget=budget)
+    steps = []
+    for step in scheduler:
+        if budget.exhausted:
+            break
+        steps.append((step.name, step.operation, step.objects))
+        budget.consume(len(step.objects))
+        scheduler.complete(step, step.objects)
+    assert steps == [
+        ("posts", "update", [posts[3], posts[0], posts[1]]),
+        ("comments", "update", comments[:1]),
+        ("posts", "update", [posts[2]]),
+        ("comments", "update", comments[1:2]),
+    ]
+
+
+@pytest.mark.django_db()
+def test_scheduler_checkpoints() -> None:
+    posts = Post.objects.bulk_create(
+        PostFactory.build_batch(5, status=SyncStatus.SYNCED)
+    )
+    comment = CommentFactory.build(post=posts[0], id=1)
+    plan = SyncPlan(1)
+    plan.pending[("posts", "update")] = [*posts]
+    plan.pending[("comments", "update")] = [comment]
+    steps = run(SyncScheduler(plan, checkpoint_size=2))
+    assert steps == [
+        ("posts", "update", posts[:2]),
+        ("posts", "update", posts[2:4]),
+        ("posts", "update", posts[4:]),
+        ("comments", "update", [comment]),
+    ]
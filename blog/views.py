@@ -1,11 +1,14 @@
 from rest_framework.filters import OrderingFilter
 from rest_framework.filters import SearchFilter
 from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from .models import Comment
 from .models import Post
+from .models import SyncRun
 from .serializers import CommentSerializer
 from .serializers import PostSerializer
+from .serializers import SyncRunSerializer
 
 
 class PostViewSet(ModelViewSet):
@@ -25,3 +28,12 @@ class CommentViewSet(ModelViewSet):
     ordering_fields = ("id", "post", "name")
     ordering = ("id", "post")
     search_fields = ("name", "email", "body")
+
+
+class SyncRunViewSet(ReadOnlyModelViewSet):
+    serializer_class = SyncRunSerializer
+    queryset = SyncRun.objects.all()
+    filter_backends = (OrderingFilter, SearchFilter)
+    ordering_fields = ("started_at", "duration", "items_synced", "items_per_second")
+    ordering = ("-started_at", "-id")
+    search_fields = ("command", "outcome")
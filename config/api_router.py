@@ -4,11 +4,13 @@ from rest_framework.routers import SimpleRouter
 
 from blog.views import CommentViewSet
 from blog.views import PostViewSet
+from blog.views import SyncRunViewSet
 
 router = DefaultRouter() if settings.DEBUG else SimpleRouter()
 
 router.register("posts", PostViewSet)
 router.register("comments", CommentViewSet)
+router.register("sync-runs", SyncRunViewSet)
 
 
 app_name = "api"
@@ -224,6 +224,15 @@ REST_FRAMEWORK = {
         "config.authentication.BearerTokenAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    "DEFAULT_RENDERER_CLASSES": (
+        "blog.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "blog.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 100,
@@ -242,3 +251,72 @@ SPECTACULAR_SETTINGS = {
     "SERVE_PERMISSIONS": ["rest_framework.permissions.IsAdminUser"],
     "SCHEMA_PATH_PREFIX": "/api/",
 }
+
+# BLOG REMOTE SYNC
+# ------------------------------------------------------------------------------
+# Bulk endpoints of the remote API by collection and sync method ("create",
+# "update", "delete"). Methods without a bulk endpoint are synced one by one.
+BLOG_SYNC_BATCH_URLS = env.json(
+    "BLOG_SYNC_BATCH_URLS",
+    default={"posts": {}, "comments": {}},
+)
+# Send updates of objects whose changed fields are known as PATCH requests
+# holding only those fields, instead of PUT requests with the whole object.
+# Opt-in, as it requires a remote API accepting PATCH requests.
+BLOG_SYNC_PARTIAL_UPDATES = env.bool("BLOG_SYNC_PARTIAL_UPDATES", default=False)
+# Collections whose remote deletes cascade to their dependents ("posts" to
+# their comments). The dependents deleted with them aren't sent, they are
+# resolved once the delete of their parent succeeds.
+BLOG_SYNC_CASCADE_DELETES = env.list("BLOG_SYNC_CASCADE_DELETES", default=[])
+# Updates and deletes are sent with the ETag stored when the object was last
+# synced, and are rejected as conflicts if the remote object changed since.
+# Conflicted objects stay pending and are reported on every run until this is
+# enabled: then their stored ETag is cleared so the next run overwrites the
+# remote object with the local one.
+BLOG_SYNC_OVERWRITE_CONFLICTS = env.bool("BLOG_SYNC_OVERWRITE_CONFLICTS", default=False)
+# Retries of failed requests to the remote API, with exponential backoff (in
+# seconds) and jitter. Retry-After headers are honored up to the max backoff.
+BLOG_SYNC_MAX_RETRIES = env.int("BLOG_SYNC_MAX_RETRIES", default=3)
+BLOG_SYNC_RETRY_BACKOFF_FACTOR = env.float(
+    "BLOG_SYNC_RETRY_BACKOFF_FACTOR",
+    default=0.5,
+)
+BLOG_SYNC_RETRY_MAX_BACKOFF = env.float("BLOG_SYNC_RETRY_MAX_BACKOFF", default=30.0)
+# Consecutive failures opening the circuit breaker of a remote endpoint, and
+# seconds before a trial request is let through again.
+BLOG_SYNC_CIRCUIT_BREAKER_THRESHOLD = env.int(
+    "BLOG_SYNC_CIRCUIT_BREAKER_THRESHOLD",
+    default=5,
+)
+BLOG_SYNC_CIRCUIT_BREAKER_RESET_TIMEOUT = env.float(
+    "BLOG_SYNC_CIRCUIT_BREAKER_RESET_TIMEOUT",
+    default=30.0,
+)
+# Requests per second allowed to the remote API (0 disables the limit) and
+# size of the bursts allowed over it.
+BLOG_SYNC_RATE_LIMIT = env.float("BLOG_SYNC_RATE_LIMIT", default=0)
+BLOG_SYNC_RATE_LIMIT_BURST = env.int("BLOG_SYNC_RATE_LIMIT_BURST", default=10)
+# Adapt the concurrent requests of the --concurrency and --workers modes to
+# the latency and errors of the remote, up to the given maximum.
+BLOG_SYNC_ADAPTIVE_CONCURRENCY = env.bool(
+    "BLOG_SYNC_ADAPTIVE_CONCURRENCY",
+    default=True,
+)
+# HTTP clients of the remote API. HTTP/2 is used when the h2 package is
+# installed (httpx[http2]). The pool size applies to the sequential mode; the
+# --workers and --concurrency modes size it to the requests in flight.
+BLOG_HTTP2 = env.bool("BLOG_HTTP2", default=True)
+BLOG_HTTP_MAX_CONNECTIONS = env.int("BLOG_HTTP_MAX_CONNECTIONS", default=10)
+BLOG_HTTP_KEEPALIVE_EXPIRY = env.float("BLOG_HTTP_KEEPALIVE_EXPIRY", default=60.0)
+BLOG_HTTP_CONNECT_TIMEOUT = env.float("BLOG_HTTP_CONNECT_TIMEOUT", default=5.0)
+BLOG_HTTP_READ_TIMEOUT = env.float("BLOG_HTTP_READ_TIMEOUT", default=30.0)
+# Compression of request bodies to the remote API: "" (disabled), "gzip" or
+# "zstd" (requires the zstandard package). Smaller bodies are sent as is.
+BLOG_HTTP_REQUEST_COMPRESSION = env.str("BLOG_HTTP_REQUEST_COMPRESSION", default="")
+BLOG_HTTP_COMPRESSION_MIN_SIZE = env.int("BLOG_HTTP_COMPRESSION_MIN_SIZE", default=1024)
+# Store the report of every sync_remote_data and load_initial_data run in the
+# SyncRun table. Passes of --watch mode with nothing to sync aren't stored.
+BLOG_SYNC_RUN_HISTORY = env.bool("BLOG_SYNC_RUN_HISTORY", default=True)
+# Days the stored runs are kept, older ones of the same command are deleted
+# whenever a run is stored. 0 keeps them all.
+BLOG_SYNC_RUN_HISTORY_DAYS = env.int("BLOG_SYNC_RUN_HISTORY_DAYS", default=30)